@@ -0,0 +1,43 @@
+# benchmarks/render_latency.py
+#
+# Compare per-frame latency of the NumPy and datashader renderers.
+# Run from the repository root:  python -m benchmarks.render_latency
+
+import argparse
+import time
+import numpy as np
+from modules.wave_packet_tunneling.wavefunction import WaveFunction
+from modules.wave_packet_tunneling.visualization import Visualizer
+
+def time_renderer(renderer, psi, x, width, height, repeats, warmup=2):
+    """Return the per-frame render times in milliseconds."""
+    visualizer = Visualizer({'width': width, 'height': height, 'renderer': renderer})
+    for _ in range(warmup):
+        visualizer.create_frame(psi, x, barrier_center=30.215, barrier_width=32.6)
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        visualizer.create_frame(psi, x, barrier_center=30.215, barrier_width=32.6)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-frame render latency.")
+    parser.add_argument('--points', type=int, default=2000)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=640)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    x = np.linspace(-100, 100, args.points)
+    psi = WaveFunction.initialize_wavefunction(x, 4, -70.0)
+
+    print(f"{args.points} points, {args.width}x{args.height}, {args.repeats} frames")
+    for renderer in Visualizer.RENDERERS:
+        timings = time_renderer(renderer, psi, x, args.width, args.height, args.repeats)
+        print(f"{renderer:>10}: median {np.median(timings):8.2f} ms/frame, "
+              f"min {timings.min():8.2f} ms, max {timings.max():8.2f} ms")
+
+if __name__ == "__main__":
+    main()
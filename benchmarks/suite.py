@@ -0,0 +1,314 @@
+# benchmarks/suite.py
+#
+# Benchmark the solver, the renderers and the full animation pipeline on
+# synthetic parameters, and compare results against a stored baseline.
+# Run from the repository root:
+#   python -m benchmarks.suite run --output bench.json
+#   python -m benchmarks.suite compare baseline.json bench.json
+# The startup group times cold imports of the entry points:
+#   python -m benchmarks.suite run --suite startup
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Never open a display, whatever the local matplotlib configuration
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from modules.wave_packet_tunneling.wavefunction import WaveFunction
+from modules.wave_packet_tunneling.potential import PotentialBarrier
+from modules.wave_packet_tunneling.evolution import WaveFunctionEvolution, SplitOperatorPropagator
+
+GRID_SIZES = (1024, 4096, 16384, 65536)
+RESOLUTIONS = ((640, 320), (1280, 640), (1920, 960))
+ANIMATION_GRID_SIZES = (1024, 2048)
+ANIMATION_FRAME_COUNTS = (30, 120)
+
+# Modules whose cold import time is tracked: the GUI, the animation CLI,
+# the menu, the render CLI and the solver core
+STARTUP_ENTRY_POINTS = (
+    'gui', 'main', 'modules.wave_packet_tunneling.main',
+    'modules.wave_packet_tunneling.render', 'modules.wave_packet_tunneling.simulation',
+)
+# Slow-to-import dependencies that entry points should only load when a run needs them
+HEAVY_MODULES = ('matplotlib', 'pandas', 'dask', 'datashader', 'xarray', 'scipy', 'pyfftw')
+
+# Quick mode keeps a run under a minute for use while iterating
+QUICK_GRID_SIZES = (1024, 4096)
+QUICK_RESOLUTIONS = ((640, 320),)
+QUICK_ANIMATION_FRAME_COUNTS = (30,)
+
+def synthetic_problem(points):
+    """Grid, initial state and potential of the default menu scenario."""
+    x = np.linspace(-100, 100, points)
+    psi = WaveFunction.initialize_wavefunction(x, 4, -70.0)
+    V_total = PotentialBarrier.create_total_potential(x, 30.215, 150.0, 32.6, 0.05)
+    return x, psi, V_total
+
+def measure(func, repeats, warmup=1):
+    """Return the wall times of repeated calls to func in seconds."""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return np.array(timings)
+
+def result(name, params, metric, samples, higher_is_better):
+    return {
+        'name': name,
+        'params': params,
+        'metric': metric,
+        'value': float(np.median(samples)),
+        'min': float(np.min(samples)),
+        'max': float(np.max(samples)),
+        'higher_is_better': higher_is_better,
+    }
+
+def bench_evolve_wavefunction(grid_sizes, repeats, steps=20):
+    results = []
+    for points in grid_sizes:
+        x, psi, V_total = synthetic_problem(points)
+        dt = WaveFunctionEvolution.compute_time_step(x)
+
+        def run():
+            state = psi
+            for _ in range(steps):
+                state = WaveFunctionEvolution.evolve_wavefunction(state, x, dt, V_total)
+
+        timings = measure(run, repeats)
+        results.append(result('evolve_wavefunction', {'points': points}, 'steps_per_s', steps / timings, True))
+    return results
+
+def bench_split_operator(grid_sizes, repeats, steps=200):
+    results = []
+    for points in grid_sizes:
+        x, psi, V_total = synthetic_problem(points)
+        for precision in SplitOperatorPropagator.PRECISIONS:
+            propagator = SplitOperatorPropagator(
+                x, WaveFunctionEvolution.compute_time_step(x), V_total, precision=precision
+            )
+            # advance() works in place on states of its own dtype; give each
+            # precision its own copy so the shared psi is left untouched
+            state = psi.astype(propagator.dtype)
+            timings = measure(lambda: propagator.advance(state, steps), repeats)
+            results.append(result(
+                'split_operator_advance', {'points': points, 'precision': precision},
+                'steps_per_s', steps / timings, True
+            ))
+    return results
+
+def bench_create_total_potential(grid_sizes, repeats, calls=20):
+    results = []
+    for points in grid_sizes:
+        x = np.linspace(-100, 100, points)
+
+        def run():
+            for _ in range(calls):
+                PotentialBarrier.create_total_potential(x, 30.215, 150.0, 32.6, 0.05)
+
+        timings = measure(run, repeats)
+        results.append(result(
+            'create_total_potential', {'points': points}, 'ms_per_call', timings / calls * 1000, False
+        ))
+    return results
+
+def bench_render(grid_sizes, resolutions, repeats):
+    # Imported here so that a missing renderer dependency only skips these cases
+    try:
+        from modules.wave_packet_tunneling.visualization import Visualizer
+        from .render_latency import time_renderer
+    except ImportError as e:
+        return [{'name': 'create_frame', 'params': {}, 'skipped': str(e)}]
+
+    results = []
+    for points in grid_sizes:
+        x, psi, _ = synthetic_problem(points)
+        for width, height in resolutions:
+            for renderer in Visualizer.RENDERERS:
+                params = {'points': points, 'width': width, 'height': height, 'renderer': renderer}
+                try:
+                    timings = time_renderer(renderer, psi, x, width, height, repeats)
+                except ImportError as e:
+                    results.append({'name': 'create_frame', 'params': params, 'skipped': str(e)})
+                    continue
+                results.append(result('create_frame', params, 'ms_per_frame', timings, False))
+    return results
+
+def bench_animation(grid_sizes, frame_counts, repeats, total_time=0.5):
+    try:
+        from main import create_tunneling_animation
+    except ImportError as e:
+        return [{'name': 'create_tunneling_animation', 'params': {}, 'skipped': str(e)}]
+
+    results = []
+    for points in grid_sizes:
+        for num_frames in frame_counts:
+            params = {'points': points, 'num_frames': num_frames, 'total_time': total_time}
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                def run():
+                    # The run's own progress output would swamp the report
+                    with open(os.devnull, 'w') as devnull, \
+                            contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+                        create_tunneling_animation(
+                            output_filename=os.path.join(tmp_dir, 'bench.gif'),
+                            num_frames=num_frames, spatial_points=points,
+                            total_time=total_time, barrier_width=32.6, V0=150.0,
+                            vis_settings={'width': 640, 'height': 320},
+                            n=4, x0=-70.0, barrier_center_init=30.215
+                        )
+
+                cwd = os.getcwd()
+                os.chdir(tmp_dir)  # the probability plot is written to the working directory
+                try:
+                    timings = measure(run, repeats, warmup=0)
+                finally:
+                    os.chdir(cwd)
+            results.append(result('create_tunneling_animation', params, 'ms_per_frame', timings / num_frames * 1000, False))
+    return results
+
+def bench_startup(entry_points, repeats):
+    """Time the import of each entry point in a fresh interpreter, as on a cold start."""
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(elapsed, ','.join(m for m in {heavy!r} if m in sys.modules))\n"
+    )
+    results = []
+    for module in entry_points:
+        code = script.format(module=module, heavy=HEAVY_MODULES)
+        timings = []
+        try:
+            for _ in range(repeats):
+                output = subprocess.run(
+                    [sys.executable, '-c', code], capture_output=True, text=True, check=True
+                ).stdout.split()
+                timings.append(float(output[0]))
+        except subprocess.CalledProcessError as e:
+            message = e.stderr.strip().splitlines()[-1] if e.stderr.strip() else str(e)
+            results.append({'name': 'import_time', 'params': {'module': module}, 'skipped': message})
+            continue
+        entry = result('import_time', {'module': module}, 'ms', np.array(timings) * 1000, False)
+        # Which heavy dependencies the import pulled in, to spot eager imports creeping back
+        entry['heavy_modules'] = output[1].split(',') if len(output) > 1 else []
+        results.append(entry)
+    return results
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'fft_backend': os.environ.get('VIZPHYS_FFT_BACKEND'),
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+SUITES = ('solver', 'potential', 'render', 'animation', 'startup')
+
+def run_suite(suites, quick=False, repeats=5):
+    grid_sizes = QUICK_GRID_SIZES if quick else GRID_SIZES
+    resolutions = QUICK_RESOLUTIONS if quick else RESOLUTIONS
+    frame_counts = QUICK_ANIMATION_FRAME_COUNTS if quick else ANIMATION_FRAME_COUNTS
+
+    results = []
+    if 'solver' in suites:
+        results += bench_evolve_wavefunction(grid_sizes, repeats)
+        results += bench_split_operator(grid_sizes, repeats)
+    if 'potential' in suites:
+        results += bench_create_total_potential(grid_sizes, repeats)
+    if 'render' in suites:
+        results += bench_render(grid_sizes, resolutions, repeats)
+    if 'animation' in suites:
+        results += bench_animation(ANIMATION_GRID_SIZES[:1] if quick else ANIMATION_GRID_SIZES,
+                                   frame_counts, max(1, repeats // 2))
+    if 'startup' in suites:
+        results += bench_startup(STARTUP_ENTRY_POINTS, repeats)
+    return {'environment': environment(), 'results': results}
+
+def result_key(entry):
+    return (entry['name'], json.dumps(entry['params'], sort_keys=True))
+
+def compare(baseline, current, tolerance):
+    """
+    Print current results against a baseline and return the number of regressions.
+
+    A case regresses when it is worse than the baseline by more than
+    tolerance (a fraction) in its own metric.
+    """
+    baseline_results = {result_key(entry): entry for entry in baseline['results'] if 'value' in entry}
+    regressions = 0
+    print(f"{'benchmark':<28} {'params':<60} {'baseline':>12} {'current':>12} {'change':>8}")
+    for entry in current['results']:
+        key = result_key(entry)
+        params = ' '.join(f"{k}={v}" for k, v in entry['params'].items())
+        if 'value' not in entry:
+            print(f"{entry['name']:<28} {params:<60} skipped: {entry['skipped']}")
+            continue
+        if key not in baseline_results:
+            print(f"{entry['name']:<28} {params:<60} {'-':>12} {entry['value']:>12.4g}      new")
+            continue
+        base = baseline_results[key]['value']
+        change = (entry['value'] - base) / base
+        # Express the change so that positive always means faster
+        improvement = change if entry['higher_is_better'] else -change
+        flag = ''
+        if improvement < -tolerance:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"{entry['name']:<28} {params:<60} {base:>12.4g} {entry['value']:>12.4g} "
+              f"{improvement:>+7.1%}{flag}")
+    print(f"\n{regressions} regression(s) beyond {tolerance:.0%} "
+          f"({baseline['environment'].get('commit')} -> {current['environment'].get('commit')})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the solver, renderers and animation pipeline.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the benchmarks and write JSON results")
+    run_parser.add_argument('--output', default='bench_results.json', help="results file")
+    run_parser.add_argument('--suite', action='append', choices=SUITES,
+                            help="benchmark group to run (repeatable, default all)")
+    run_parser.add_argument('--quick', action='store_true', help="smaller grids and fewer cases")
+    run_parser.add_argument('--repeats', type=int, default=5)
+
+    compare_parser = commands.add_parser('compare', help="compare results against a baseline")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--tolerance', type=float, default=0.10,
+                                help="allowed slowdown as a fraction before a case counts as a regression")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = run_suite(args.suite or SUITES, quick=args.quick, repeats=args.repeats)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {len(results['results'])} results to {args.output}")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        sys.exit(1 if compare(baseline, current, args.tolerance) else 0)
+
+if __name__ == "__main__":
+    main()
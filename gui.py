@@ -4,17 +4,25 @@ from prompt_toolkit.application import Application
 from prompt_toolkit.buffer import Buffer
 from prompt_toolkit.layout import Layout
 from prompt_toolkit.widgets import TextArea
-from prompt_toolkit.layout.containers import VSplit, HSplit, Window
+from prompt_toolkit.layout.containers import VSplit, HSplit, Window, ConditionalContainer
 from prompt_toolkit.layout.controls import BufferControl, FormattedTextControl
 from prompt_toolkit.layout.dimension import Dimension
 from prompt_toolkit.key_binding import KeyBindings
+from prompt_toolkit.filters import Condition
 from prompt_toolkit.styles import Style
+from jobs import Job, JobManager
+
+MENU_WIDTH = 40
+# Rows of each panel (|psi|^2 and Re psi) of the live preview
+PREVIEW_ROWS = 5
 
 class MainGUI:
     def __init__(self):
         self.output_text = ""
         self.current_view = None
         self.previous_view = None
+        # Redraw as often as running jobs publish previews
+        self.jobs = JobManager(on_update=self.update_display, refresh_interval=Job.DEFAULT_PREVIEW_INTERVAL)
         self.setup_ui()
 
     def setup_ui(self):
@@ -25,6 +33,10 @@ class MainGUI:
             'menu': 'bg:#3c3c3c #dcdcdc',
             'line': '#888888',
             'prompt': 'bold #00ff00',
+            'preview-label': 'bg:#1e1e1e #888888',
+            'preview-density': 'bg:#1e1e1e #00d7ff',
+            'preview-real': 'bg:#1e1e1e #5fd75f',
+            'preview-barrier': 'bg:#5f3700',
         })
 
         @self.kb.add('h')
@@ -35,6 +47,10 @@ class MainGUI:
         def _(event):
             self.handle_b_key()
 
+        @self.kb.add('c-x')
+        def _(event):
+            self.handle_cancel_key()
+
         self.input_field = TextArea(
             height=1,
             prompt='> ',
@@ -55,9 +71,22 @@ class MainGUI:
         self.menu_buffer = Buffer()
         self.menu_control = BufferControl(buffer=self.menu_buffer)
 
+        # Live plot of the running job, shown while it publishes previews
+        self.preview_window = ConditionalContainer(
+            HSplit([
+                Window(
+                    content=FormattedTextControl(self.preview_fragments),
+                    height=2 * PREVIEW_ROWS + 1
+                ),
+                Window(height=1, char='─', style='class:line'),
+            ]),
+            filter=Condition(lambda: self.jobs.latest_preview() is not None)
+        )
+
         root_container = VSplit([
-            Window(content=self.menu_control, width=40, style='class:menu'),
+            Window(content=self.menu_control, width=MENU_WIDTH, style='class:menu'),
             HSplit([
+                self.preview_window,
                 self.output_window,
                 Window(height=1, char='─', style='class:line'),
                 self.input_field,
@@ -76,11 +105,28 @@ class MainGUI:
         from modules.wave_packet_tunneling.main import WavePacketMenu
         self.current_view = WavePacketMenu(self)
         self.update_display()
-        self.application.run()
+        try:
+            self.application.run()
+        finally:
+            # Stop background jobs before the interpreter waits on their threads
+            self.jobs.shutdown()
+
+    def preview_fragments(self):
+        preview = self.jobs.latest_preview()
+        if preview is None:
+            return []
+        # Only reached once a run has loaded the simulation package
+        from modules.wave_packet_tunneling.preview import TerminalPreview
+        width = self.application.output.get_size().columns - MENU_WIDTH
+        return TerminalPreview.render(preview, width, PREVIEW_ROWS)
 
     def update_display(self):
         self.menu_buffer.text = self.current_view.get_menu_text()
-        self.output_buffer.text = self.current_view.get_output()
+        output = self.current_view.get_output()
+        jobs_text = self.jobs.status_text()
+        if jobs_text:
+            output = f"{output}\n\n{jobs_text}" if output else jobs_text
+        self.output_buffer.text = output
         self.application.layout.focus(self.input_field)
         self.application.invalidate()
 
@@ -90,4 +136,22 @@ class MainGUI:
         if command == 'h':
             self.handle_h_key()
         elif command == 'b':
-            self.handle_b_key()
\ No newline at end of file
+            self.handle_b_key()
+        else:
+            self.current_view.execute_command(command)
+            self.update_display()
+
+    def handle_h_key(self):
+        self.current_view.execute_command('h')
+        self.update_display()
+
+    def handle_b_key(self):
+        self.current_view.execute_command('b')
+        self.update_display()
+
+    def handle_cancel_key(self):
+        self.jobs.cancel_next()
+        self.update_display()
+
+if __name__ == "__main__":
+    MainGUI().run()
@@ -0,0 +1,218 @@
+# jobs.py
+
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class JobCancelled(Exception):
+    """Raised inside a job's worker thread once the job has been cancelled."""
+
+class Job:
+    """
+    A long-running task executed off the UI thread.
+
+    The task function receives the job and reports back through report()
+    and log(). report() raises JobCancelled once cancel() has been called,
+    so a task stops at its next progress report. A task may also publish a
+    live preview of its state with show_preview(), at most once per
+    preview_interval seconds; preview_due() tells it when the next one is
+    wanted, so it can skip the work of building one in between.
+    """
+    DEFAULT_PREVIEW_INTERVAL = 0.1
+
+    def __init__(self, job_id, name, notify, preview_interval=DEFAULT_PREVIEW_INTERVAL):
+        self.id = job_id
+        self.name = name
+        self.status = 'queued'
+        self.messages = []
+        self.result = None
+        self.error = None
+        self.future = None
+        self.step = 0
+        self.total = None
+        self.norm = None
+        self.started = None
+        self.finished = None
+        self.preview = None
+        self.preview_interval = preview_interval
+        self._last_preview = None
+        self._notify = notify
+        self._cancel_event = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ('queued', 'running')
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """Cancel the job, either before it starts or at its next progress report."""
+        self._cancel_event.set()
+        if self.future is not None and self.future.cancel():
+            self.status = 'cancelled'
+            self._notify(force=True)
+
+    def report(self, step=None, total=None, norm=None):
+        """Record progress from the worker thread."""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+        if step is not None:
+            self.step = step
+        if total is not None:
+            self.total = total
+        if norm is not None:
+            self.norm = norm
+        self._notify()
+
+    def preview_due(self):
+        """Whether preview_interval has passed since the last preview."""
+        return self._last_preview is None or time.perf_counter() - self._last_preview >= self.preview_interval
+
+    def show_preview(self, preview):
+        """Publish a preview from the worker thread, replacing the previous one."""
+        self.preview = preview
+        self._last_preview = time.perf_counter()
+        self._notify()
+
+    def log(self, message):
+        """Add a line to the job's output."""
+        self.messages.append(message)
+        self._notify()
+
+    def rate(self):
+        """Steps per second since the job started."""
+        if self.started is None:
+            return 0.0
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        return self.step / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        """Estimated seconds until the job finishes, or None if unknown."""
+        rate = self.rate()
+        if not self.total or rate == 0:
+            return None
+        return (self.total - self.step) / rate
+
+    def run(self, func, *args, **kwargs):
+        if self._cancel_event.is_set():
+            self.status = 'cancelled'
+            return None
+        self.status = 'running'
+        self.started = time.perf_counter()
+        self._notify(force=True)
+        try:
+            self.result = func(self, *args, **kwargs)
+            self.status = 'done'
+        except JobCancelled:
+            self.status = 'cancelled'
+        except Exception as e:
+            self.error = e
+            self.status = 'failed'
+        finally:
+            self.finished = time.perf_counter()
+            self._notify(force=True)
+        return self.result
+
+    def status_text(self):
+        line = f"[{self.id}] {self.status:<9} {self.name}"
+        if self.status == 'running' and self.total:
+            line += f"  {self.step}/{self.total} steps  {self.rate():.0f} steps/s"
+            eta = self.eta()
+            if eta is not None:
+                line += f"  ETA {int(eta) // 60}:{int(eta) % 60:02d}"
+        if self.norm is not None and self.status in ('running', 'done'):
+            line += f"  norm {self.norm:.6f}"
+        if self.status == 'failed':
+            line += f"\n    Error: {self.error}"
+        for message in self.messages:
+            for message_line in message.splitlines():
+                line += f"\n    {message_line}"
+        return line
+
+class JobManager:
+    """
+    Queue of background jobs for the GUI.
+
+    Jobs run on a thread pool, max_workers at a time, in submission order.
+    Progress reports from the worker threads are forwarded to on_update on
+    the asyncio event loop that submitted the jobs, at most once per
+    refresh_interval seconds; status changes are forwarded immediately.
+    """
+
+    def __init__(self, on_update=None, max_workers=1, refresh_interval=0.25):
+        self.on_update = on_update
+        self.refresh_interval = refresh_interval
+        self.jobs = []
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._ids = itertools.count(1)
+        self._loop = None
+        self._lock = threading.Lock()
+        self._last_update = 0.0
+
+    def submit(self, name, func, *args, **kwargs):
+        """
+        Queue func(job, *args, **kwargs) and return its Job.
+
+        When called from a running event loop, updates are delivered on that
+        loop; otherwise on_update is called directly from the worker thread.
+        """
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+        job = Job(next(self._ids), name, self._notify)
+        self.jobs.append(job)
+        job.future = self._executor.submit(job.run, func, *args, **kwargs)
+        self._notify(force=True)
+        return job
+
+    def active_jobs(self):
+        return [job for job in self.jobs if job.active]
+
+    def latest_preview(self):
+        """The preview of the most recently submitted running job that has one, or None."""
+        for job in reversed(self.jobs):
+            if job.status == 'running' and job.preview is not None:
+                return job.preview
+        return None
+
+    def cancel_next(self):
+        """Cancel the oldest active job and return it, or None if all jobs are finished."""
+        for job in self.jobs:
+            if job.active and not job.cancel_requested:
+                job.cancel()
+                return job
+        return None
+
+    def status_text(self):
+        if not self.jobs:
+            return ""
+        return "Jobs (Ctrl-X cancels the oldest active job)\n" + "\n".join(
+            job.status_text() for job in self.jobs
+        )
+
+    def _notify(self, force=False):
+        if self.on_update is None:
+            return
+        # Throttle progress updates so the UI is not redrawn for every report
+        with self._lock:
+            now = time.perf_counter()
+            if not force and now - self._last_update < self.refresh_interval:
+                return
+            self._last_update = now
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.on_update)
+        else:
+            self.on_update()
+
+    def shutdown(self):
+        """Cancel all active jobs and wait for the running ones to stop."""
+        for job in self.jobs:
+            if job.active:
+                job.cancel()
+        self.on_update = None
+        self._executor.shutdown(wait=True)
@@ -1,11 +1,14 @@
 # main.py
 import numpy as np
-import matplotlib.pyplot as plt
 from tqdm import tqdm
-from modules.wave_packet_tunneling.wavefunction import WaveFunction  # Changed from relative import
-from modules.wave_packet_tunneling.potential import PotentialBarrier  # Changed from relative import
-from modules.wave_packet_tunneling.evolution import WaveFunctionEvolution  # Changed from relative import
+from modules.wave_packet_tunneling.simulation import Simulation, Simulation2D
+from modules.wave_packet_tunneling.potential import DEFAULT_ABSORBER_STRENGTH
 from modules.wave_packet_tunneling.visualization import Visualizer  # Changed from relative import
+from modules.wave_packet_tunneling.encoding import create_writer
+from modules.wave_packet_tunneling.pipeline import FramePipeline
+from modules.wave_packet_tunneling.trajectory import TrajectoryWriter
+from modules.wave_packet_tunneling.profiling import Profiler
+from modules.wave_packet_tunneling.planner import GridPlanner
 
 def create_tunneling_animation(
     output_filename='quantum_tunneling.gif',
@@ -19,74 +22,198 @@ def create_tunneling_animation(
     vis_settings={'width': 2000, 'height': 1000},
     n=1,
     x0=-100.0,
-    barrier_center_init=0.0
+    barrier_center_init=0.0,
+    engine='split_operator',
+    fft_backend=None,
+    precision='double',
+    absorber_width=0.0,
+    absorber_strength=DEFAULT_ABSORBER_STRENGTH,
+    barrier_schedule='static',
+    schedule_params=None,
+    auto_grid=False,
+    trajectory_path=None,
+    profiler=None
 ):
-    """Create an animation of quantum tunneling."""
-    # Initialize spatial grid
-    x = np.linspace(spatial_range[0], spatial_range[1], spatial_points)
-    dx = x[1] - x[0]
-    
-    # Initialize components
-    psi = WaveFunction.initialize_wavefunction(x, n, x0)
-    V_total = PotentialBarrier.create_total_potential(x, barrier_center_init, V0, barrier_width, transition_width)
-    visualizer = Visualizer(vis_settings)
-    
-    # Calculate time step
-    max_k = np.max(np.abs(2 * np.pi * np.fft.fftfreq(spatial_points, d=dx)))
-    dt = 0.05 / (max_k**2 / 2)
+    """
+    Create an animation of quantum tunneling.
+
+    engine selects the evolution method: 'split_operator' time-steps the wave
+    function, 'eigen' diagonalizes the Hamiltonian once and evaluates each
+    frame directly at its time, and 'chebyshev' jumps from frame to frame
+    with a Chebyshev expansion. fft_backend selects 'numpy', 'scipy', 'pyfftw'
+    or 'auto'; by default the VIZPHYS_FFT_BACKEND environment variable is used.
+    precision='single' runs the split-operator engine in complex64.
+    absorber_width > 0 adds absorbing layers of that width at both ends of
+    spatial_range (split-operator engine only), so packets leaving the grid
+    are removed instead of wrapping around and a smaller range suffices.
+    barrier_schedule ('static', 'translating', 'oscillating' or 'ramped')
+    moves the barrier or changes its height over time; schedule_params holds
+    its sim_params keys, e.g. {'barrier_velocity': 2.0} (see
+    BarrierSchedule.from_params).
+    auto_grid=True replaces spatial_points and the time step with the
+    smallest grid and largest step that resolve the packet and barrier (see
+    GridPlanner), and prints the plan and its predicted cost first.
+    If trajectory_path is given, every frame's wave function and observables
+    are also stored there, so the animation can be re-rendered later with
+    modules.wave_packet_tunneling.render without re-simulating.
+    profiler records the time and memory of each pipeline stage and its
+    report is printed at the end; by default it is configured from the
+    VIZPHYS_PROFILE_* environment variables (see Profiler.from_env).
+    """
+    sim_params = {
+        'output_filename': output_filename, 'num_frames': num_frames,
+        'spatial_points': spatial_points, 'spatial_range': spatial_range,
+        'total_time': total_time, 'barrier_width': barrier_width, 'V0': V0,
+        'transition_width': transition_width, 'vis_settings': vis_settings,
+        'n': n, 'x0': x0, 'barrier_center_init': barrier_center_init,
+        'engine': engine, 'fft_backend': fft_backend, 'precision': precision,
+        'absorber_width': absorber_width, 'absorber_strength': absorber_strength,
+        'barrier_schedule': barrier_schedule, **(schedule_params or {})
+    }
+    if auto_grid:
+        plan = GridPlanner().plan(sim_params)
+        print(plan.report())
+        sim_params = plan.apply(sim_params)
+    if profiler is None:
+        profiler = Profiler.from_env()
+    simulation = Simulation(sim_params, profiler=profiler)
+    visualizer = Visualizer(vis_settings, profiler=profiler)
     
-    # Setup time evolution
-    num_time_steps = int(total_time / dt) + 1
-    times = np.linspace(0, total_time, num_time_steps)
-    frame_indices = np.linspace(0, num_time_steps - 1, num_frames).astype(int)
+    # Frames are rendered and encoded in the background while the solver runs
+    writer = create_writer(
+        output_filename, duration=int(total_time / num_frames * 1000),
+        profiler=profiler, palette=Visualizer.scene_palette()
+    )
+    pipeline = FramePipeline(visualizer.create_frame, writer)
     
-    frames = []
-    probabilities = []
+    # Optionally stream frames to an on-disk trajectory as well
+    trajectory = None
+    if trajectory_path:
+        trajectory = TrajectoryWriter(trajectory_path, simulation.x, len(simulation.frame_steps), params=sim_params)
     
-    print("Generating frames...")
-    for i in tqdm(range(num_time_steps)):
-        # Evolve wave function
-        psi = WaveFunctionEvolution.evolve_wavefunction(psi, x, dt, V_total)
-        
-        # Record probability
-        total_prob = WaveFunction.compute_total_probability(psi, dx)
-        probabilities.append(total_prob)
-        
-        # Capture frame if needed
-        if i in frame_indices:
-            img = visualizer.create_datashader_frame(
-                psi, x, 
-                barrier_center=barrier_center_init, 
+    def capture(psi, t, observables):
+        # Time blocked here is back-pressure from the render workers
+        with profiler.stage('frame_queue'):
+            pipeline.submit(
+                psi, simulation.x, 
+                barrier_center=simulation.barrier_center(t), 
                 barrier_width=barrier_width
             )
-            frames.append(img)
+        if trajectory is not None:
+            with profiler.stage('trajectory_write'):
+                trajectory.append(t, psi, **observables)
+    
+    def report_progress(step, total):
+        progress.set_postfix_str(profiler.postfix(), refresh=False)
+        progress.update(step - progress.n)
+    
+    print(f"Generating frames and streaming animation to {output_filename}...")
+    with profiler:
+        with pipeline, tqdm(total=simulation.num_time_steps) as progress:
+            results = simulation.run(on_frame=capture, on_progress=report_progress)
+        print(simulation.summary())
     
-    # Plot probability
-    plt.figure(figsize=(10, 6))
-    plt.plot(times, probabilities)
-    plt.xlabel('Time')
-    plt.ylabel('Total Probability')
-    plt.title('Total Probability Over Time')
-    plt.grid(True)
-    plt.savefig("probability_over_time.png")
-    plt.close()
+        if trajectory is not None:
+            trajectory.close()
+            print(f"Trajectory saved to {trajectory_path}")
     
-    # Save animation
-    if frames:
-        print(f"Saving animation to {output_filename}...")
-        frames[0].save(
-            output_filename,
-            save_all=True,
-            append_images=frames[1:],
-            duration=int(total_time / num_frames * 1000),
-            loop=0
-        )
+        # Plot probability
+        probability_times, probabilities = results['probability']
+        with profiler.stage('probability_plot'):
+            # Imported on first use, so solver-only callers never load matplotlib
+            import matplotlib.pyplot as plt
+            plt.figure(figsize=(10, 6))
+            plt.plot(probability_times, probabilities)
+            plt.xlabel('Time')
+            plt.ylabel('Total Probability')
+            plt.title('Total Probability Over Time')
+            plt.grid(True)
+            plt.savefig("probability_over_time.png")
+            plt.close()
+    print(profiler.report())
+    
+    if pipeline.frame_count:
         print("Animation complete!")
         return output_filename
     else:
         print("No frames were generated. Please check the simulation parameters.")
         return None
 
+def create_tunneling_animation_2d(
+    output_filename='quantum_tunneling_2d.gif',
+    num_frames=120,
+    spatial_points=256,
+    spatial_range=(-50, 50),
+    total_time=12.0,
+    barrier_width=2.0,
+    V0=5.0,
+    transition_width=0.05,
+    vis_settings={'width': 800, 'height': 800},
+    n=1,
+    x0=-25.0,
+    y0=0.0,
+    barrier_center_init=0.0,
+    shape='barrier',
+    shape_params=None,
+    fft_backend=None,
+    precision='double',
+    profiler=None
+):
+    """
+    Create a heatmap animation of a 2D wave packet hitting a barrier, slits or a well.
+
+    The grid is spatial_points x spatial_points over spatial_range in both
+    directions. shape and shape_params select the potential (see
+    PotentialBarrier2D.create_total_potential). |psi|^2 is streamed through
+    the same frame pipeline and encoders as the 1D animation, as float32 to
+    keep queued frames small.
+    """
+    sim_params = {
+        'output_filename': output_filename, 'num_frames': num_frames,
+        'spatial_points': spatial_points, 'spatial_range': spatial_range,
+        'total_time': total_time, 'barrier_width': barrier_width, 'V0': V0,
+        'transition_width': transition_width, 'vis_settings': vis_settings,
+        'n': n, 'x0': x0, 'y0': y0, 'barrier_center_init': barrier_center_init,
+        'shape': shape, 'fft_backend': fft_backend, 'precision': precision,
+        **(shape_params or {})
+    }
+    if profiler is None:
+        profiler = Profiler.from_env()
+    simulation = Simulation2D(sim_params, profiler=profiler)
+    visualizer = Visualizer(vis_settings, profiler=profiler)
+    potential_mask = Visualizer.potential_mask(simulation.V_total)
+
+    writer = create_writer(
+        output_filename, duration=int(total_time / num_frames * 1000),
+        profiler=profiler, palette=Visualizer.heatmap_palette()
+    )
+    pipeline = FramePipeline(visualizer.create_heatmap_frame, writer)
+
+    def capture(psi, t, observables):
+        with profiler.stage('frame_queue'):
+            density = np.square(psi.real, dtype=np.float32)
+            density += np.square(psi.imag, dtype=np.float32)
+            pipeline.submit(density, simulation.x, simulation.y, potential_mask=potential_mask)
+
+    def report_progress(step, total):
+        progress.set_postfix_str(profiler.postfix(), refresh=False)
+        progress.update(step - progress.n)
+
+    print(f"Generating 2D frames and streaming animation to {output_filename}...")
+    with profiler:
+        with pipeline, tqdm(total=simulation.num_time_steps) as progress:
+            results = simulation.run(on_frame=capture, on_progress=report_progress)
+        print(simulation.summary())
+        print(f"Transmission: {results['transmission'][1][-1]:.4f}, "
+              f"reflection: {results['reflection'][1][-1]:.4f}")
+    print(profiler.report())
+
+    if pipeline.frame_count:
+        print("Animation complete!")
+        return output_filename
+    print("No frames were generated. Please check the simulation parameters.")
+    return None
+
 if __name__ == "__main__":
     # Example usage
     output_file = create_tunneling_animation(
@@ -0,0 +1,248 @@
+# modules/wave_packet_tunneling/batch.py
+#
+# Headless batch runs from a JSON or TOML job file.
+#   python -m modules.wave_packet_tunneling.batch jobs.toml --output-dir batch_out --workers 4
+#
+# The file holds a list of jobs in the sim_params schema, either as a bare
+# JSON list or as a 'jobs' array, with an optional 'defaults' table that is
+# applied to every job. Jobs run in double precision unless they set
+# 'precision', and plan their grid only with auto_grid = 1:
+#
+#   [defaults]
+#   total_time = 3.0
+#   outputs = ["probability", "final_state"]
+#
+#   [[jobs]]
+#   name = "low-barrier"
+#   V0 = 50.0
+#
+#   [[jobs]]
+#   V0 = 150.0
+#   outputs = ["gif", "probability"]
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from .simulation import Simulation
+from .planner import GridPlanner
+from .params import default_sim_params, validate_params
+from .store import ResultStore
+
+# Per-job outputs and the file each is written to in the job's directory
+OUTPUTS = {
+    'gif': 'animation.gif',
+    'probability': 'probability.csv',
+    'final_state': 'final_state.npy',
+}
+DEFAULT_OUTPUTS = ('gif', 'probability')
+# Batch runs are production runs: double precision on the grid as given,
+# instead of the menu's single-precision quick looks
+PRODUCTION_PARAMS = {'precision': 'double', 'auto_grid': 0}
+MANIFEST_NAME = 'manifest.json'
+
+def load_jobs(path):
+    """
+    Read a job file and return the fully resolved jobs.
+
+    Each job starts from the menu's default parameters with
+    PRODUCTION_PARAMS, then the file's defaults, then its own entries.
+    'name' (default job-NNN) names the job's output directory and 'outputs'
+    lists what to write, from OUTPUTS.
+    Every job is checked with the menu's range checks; ValueError lists all
+    invalid jobs.
+    """
+    if os.path.splitext(path)[1].lower() == '.toml':
+        import tomllib
+        with open(path, 'rb') as f:
+            data = tomllib.load(f)
+    else:
+        with open(path) as f:
+            data = json.load(f)
+    if isinstance(data, list):
+        data = {'jobs': data}
+    defaults = data.get('defaults', {})
+    entries = data.get('jobs', [])
+    if not entries:
+        raise ValueError(f"No jobs found in {path}")
+
+    jobs = []
+    errors = []
+    for index, entry in enumerate(entries):
+        job = {**default_sim_params(), **PRODUCTION_PARAMS, **defaults, **entry}
+        job.setdefault('name', f"job-{index:03d}")
+        job.setdefault('outputs', list(DEFAULT_OUTPUTS))
+        # JSON and TOML have no tuples
+        job['spatial_range'] = tuple(job['spatial_range'])
+        unknown = sorted(set(job['outputs']) - set(OUTPUTS))
+        if unknown:
+            errors.append(f"{job['name']}: unknown outputs {unknown}; choose from {sorted(OUTPUTS)}")
+        try:
+            jobs.append(validate_params(job))
+        except ValueError as e:
+            errors.append(f"{job['name']}: {e}")
+    names = [job['name'] for job in jobs]
+    errors += [f"{name}: duplicate job name" for name in sorted({n for n in names if names.count(n) > 1})]
+    if errors:
+        raise ValueError("Invalid jobs:\n  " + "\n  ".join(errors))
+    return jobs
+
+def run_job(job, output_dir):
+    """
+    Run one job and write its outputs to output_dir/<name>.
+
+    Returns the job's manifest entry. Runs in a worker process, so it only
+    takes and returns plain data. A job that fails leaves no output
+    directory behind.
+    """
+    job_dir = os.path.join(output_dir, job['name'])
+    os.makedirs(job_dir, exist_ok=True)
+    try:
+        return _run_job(job, job_dir)
+    except BaseException:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+
+def _run_job(job, job_dir):
+    paths = {output: os.path.join(job_dir, OUTPUTS[output]) for output in job['outputs']}
+    sim_params = {key: value for key, value in job.items() if key not in ('name', 'outputs')}
+    entry = {'name': job['name'], 'params': sim_params}
+
+    start = time.perf_counter()
+    if sim_params.get('auto_grid'):
+        plan = GridPlanner().plan(sim_params)
+        entry['plan'] = plan.report()
+        sim_params = plan.apply(sim_params)
+    solver_start = time.perf_counter()
+    simulation = Simulation(sim_params)
+
+    if 'gif' in paths:
+        # Rendering is only loaded by jobs that produce an animation
+        from .visualization import Visualizer
+        from .encoding import create_writer
+        from .pipeline import FramePipeline
+
+        visualizer = Visualizer(sim_params['vis_settings'])
+        writer = create_writer(
+            paths['gif'],
+            duration=int(sim_params['total_time'] / sim_params['num_frames'] * 1000),
+            palette=Visualizer.scene_palette()
+        )
+        pipeline = FramePipeline(visualizer.create_frame, writer)
+
+        def capture(psi, t, observables):
+            pipeline.submit(
+                psi, simulation.x,
+                barrier_center=simulation.barrier_center(t),
+                barrier_width=sim_params['barrier_width']
+            )
+
+        with pipeline:
+            results = simulation.run(on_frame=capture)
+    else:
+        results = simulation.run()
+    solver_done = time.perf_counter()
+
+    if 'probability' in paths:
+        times, probability = results['probability']
+        np.savetxt(
+            paths['probability'],
+            np.column_stack([times, probability, results['transmission'][1], results['reflection'][1]]),
+            delimiter=',', header='time,probability,transmission,reflection', comments=''
+        )
+    if 'final_state' in paths:
+        np.save(paths['final_state'], simulation.psi)
+    end = time.perf_counter()
+
+    entry.update({
+        'status': 'done',
+        'wall_time_s': end - start,
+        'num_time_steps': simulation.num_time_steps,
+        'steps_per_s': simulation.num_time_steps / (solver_done - solver_start),
+        'spatial_points': simulation.N,
+        'dt': simulation.dt,
+        'final_probability': float(results['probability'][1][-1]),
+        'transmission': float(results['transmission'][1][-1]),
+        'reflection': float(results['reflection'][1][-1]),
+        'outputs': paths,
+    })
+    return entry
+
+class BatchRunner:
+    """
+    Run a list of jobs over a process pool and write a manifest of the results.
+
+    Each job's outputs go to its own directory under output_dir.
+    manifest.json there records, per job, the wall time, the solver's steps
+    per second (including frame capture for animations), the grid and time
+    step used, the final observables and the output paths; failed jobs are
+    recorded with their error and the others keep running.
+    """
+
+    def __init__(self, output_dir, max_workers=None):
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def run(self, jobs, progress=None):
+        """
+        Run every job and return the manifest.
+
+        progress, if given, is called as progress(done, total, entry) as
+        each job finishes.
+        """
+        start = time.perf_counter()
+        entries = {}
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(run_job, job, self.output_dir): job for job in jobs}
+            for done, future in enumerate(as_completed(futures), start=1):
+                job = futures[future]
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    entry = {'name': job['name'], 'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+                entries[job['name']] = entry
+                if progress is not None:
+                    progress(done, len(jobs), entry)
+
+        manifest = {
+            'wall_time_s': time.perf_counter() - start,
+            'max_workers': self.max_workers or os.cpu_count(),
+            # In the order of the job file
+            'jobs': [entries[job['name']] for job in jobs],
+        }
+        with open(os.path.join(self.output_dir, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2, default=ResultStore.json_default)
+        return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Run simulation jobs from a JSON or TOML file without the GUI.")
+    parser.add_argument('jobs', help="job file (.json or .toml)")
+    parser.add_argument('--output-dir', default='batch_output', help="directory for job outputs and manifest.json")
+    parser.add_argument('--workers', type=int, help="jobs run at once (default: number of CPUs)")
+    args = parser.parse_args()
+
+    try:
+        jobs = load_jobs(args.jobs)
+    except ValueError as e:
+        parser.error(str(e))
+
+    def report(done, total, entry):
+        if entry['status'] == 'done':
+            print(f"[{done}/{total}] {entry['name']}: {entry['wall_time_s']:.1f} s, "
+                  f"{entry['steps_per_s']:.0f} steps/s, transmission {entry['transmission']:.4f}")
+        else:
+            print(f"[{done}/{total}] {entry['name']}: failed, {entry['error']}")
+
+    manifest = BatchRunner(args.output_dir, args.workers).run(jobs, progress=report)
+    failed = sum(entry['status'] != 'done' for entry in manifest['jobs'])
+    print(f"{len(jobs) - failed}/{len(jobs)} jobs done in {manifest['wall_time_s']:.1f} s; "
+          f"manifest at {os.path.join(args.output_dir, MANIFEST_NAME)}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
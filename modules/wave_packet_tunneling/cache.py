@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import numpy as np
+from .store import ResultStore
+from .trajectory import TrajectoryWriter
+
+class ResultCache:
+    """
+    Disk cache of finished runs, keyed on the simulation parameters and code version.
+
+    Each entry is a directory named after the simulation key. It holds the
+    run's trajectory (every frame, the frame times and the probability,
+    transmission and reflection series), final_state.npy, and a renders/
+    directory with one animation per distinct set of vis_settings. The
+    stored frames let a run whose only change is vis_settings be re-rendered
+    without re-simulating.
+
+    The total size of all entries is kept under max_bytes by evicting whole
+    entries, least recently used first.
+    """
+    # Parameters that only affect the output, not the simulated frames
+    OUTPUT_PARAMS = ResultStore.RENDER_PARAMS + ('trajectory_path',)
+    # Sources whose changes invalidate the stored simulations and renders
+    SIMULATION_SOURCES = ('simulation.py', 'evolution.py', 'wavefunction.py', 'potential.py', 'fft_backend.py')
+    RENDER_SOURCES = ('visualization.py', 'encoding.py', 'pipeline.py')
+    DEFAULT_ROOT = '.vizphys_cache'
+    DEFAULT_MAX_BYTES = 2 * 1024**3
+
+    _lock = threading.Lock()
+
+    def __init__(self, root, max_bytes=None):
+        self.root = root
+        self.max_bytes = self.DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Create the cache configured by the environment.
+
+        VIZPHYS_CACHE_DIR sets the directory and VIZPHYS_CACHE_MAX_MB the
+        disk budget in megabytes.
+        """
+        root = os.environ.get('VIZPHYS_CACHE_DIR', cls.DEFAULT_ROOT)
+        max_mb = os.environ.get('VIZPHYS_CACHE_MAX_MB')
+        max_bytes = int(float(max_mb) * 1024**2) if max_mb else None
+        return cls(root, max_bytes)
+
+    @staticmethod
+    def code_version(sources):
+        """Hash the given source files of this package."""
+        digest = hashlib.sha256()
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for name in sources:
+            with open(os.path.join(package_dir, name), 'rb') as f:
+                digest.update(name.encode() + b'\0' + f.read())
+        return digest.hexdigest()
+
+    @staticmethod
+    def simulation_key(sim_params):
+        params = {
+            key: value for key, value in sim_params.items()
+            if key not in ResultCache.OUTPUT_PARAMS
+        }
+        params['code_version'] = ResultCache.code_version(ResultCache.SIMULATION_SOURCES)
+        return ResultStore.params_key(params)
+
+    @staticmethod
+    def render_key(sim_params):
+        settings = {
+            'vis_settings': sim_params['vis_settings'],
+            'format': os.path.splitext(sim_params['output_filename'])[1].lower(),
+            'code_version': ResultCache.code_version(ResultCache.RENDER_SOURCES),
+        }
+        text = json.dumps(settings, sort_keys=True, default=ResultStore.json_default)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def entry_path(self, sim_params):
+        return os.path.join(self.root, self.simulation_key(sim_params))
+
+    def animation_path(self, sim_params):
+        extension = os.path.splitext(sim_params['output_filename'])[1].lower()
+        return os.path.join(self.entry_path(sim_params), 'renders', f"{self.render_key(sim_params)}{extension}")
+
+    def lookup(self, sim_params):
+        """
+        Look up a run and mark it as recently used.
+
+        Returns (trajectory_path, animation_path). Both are None on a miss;
+        only animation_path is None when the simulation is cached but has not
+        been rendered with these vis_settings.
+        """
+        path = self.entry_path(sim_params)
+        with self._lock:
+            if not os.path.isdir(path):
+                return None, None
+            os.utime(path)
+        animation = self.animation_path(sim_params)
+        return path, animation if os.path.exists(animation) else None
+
+    def trajectory_writer(self, sim_params, x, num_frames):
+        """Start a new entry; its frames are written to a temporary directory until commit()."""
+        tmp_path = os.path.join(
+            self.root, f"tmp-{self.simulation_key(sim_params)}-{os.getpid()}-{threading.get_ident()}"
+        )
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        return TrajectoryWriter(tmp_path, x, num_frames, params=sim_params)
+
+    def commit(self, sim_params, writer, final_state):
+        """Close a trajectory started with trajectory_writer() and add it to the cache."""
+        writer.close()
+        np.save(os.path.join(writer.path, 'final_state.npy'), final_state)
+        os.makedirs(os.path.join(writer.path, 'renders'))
+        path = self.entry_path(sim_params)
+        with self._lock:
+            if os.path.isdir(path):
+                # Another run of the same parameters finished first
+                shutil.rmtree(writer.path)
+            else:
+                os.replace(writer.path, path)
+        self.evict()
+        return path
+
+    def discard(self, writer):
+        """Drop a trajectory started with trajectory_writer(), e.g. after a cancelled run."""
+        writer.close()
+        shutil.rmtree(writer.path, ignore_errors=True)
+
+    def store_animation(self, sim_params, filename):
+        """Copy a rendered animation into the entry of its simulation."""
+        # Frame directories are cheap to re-render from the stored frames
+        if os.path.isdir(filename):
+            return None
+        animation = self.animation_path(sim_params)
+        with self._lock:
+            # The entry may have been evicted since it was looked up
+            if not os.path.isdir(os.path.dirname(animation)):
+                return None
+            tmp_path = f"{animation}.{os.getpid()}.{threading.get_ident()}.tmp"
+            shutil.copyfile(filename, tmp_path)
+            os.replace(tmp_path, animation)
+            os.utime(self.entry_path(sim_params))
+        self.evict()
+        return animation
+
+    def final_state(self, sim_params):
+        return np.load(os.path.join(self.entry_path(sim_params), 'final_state.npy'))
+
+    @staticmethod
+    def _size(path):
+        return sum(
+            os.path.getsize(os.path.join(directory, name))
+            for directory, _, names in os.walk(path) for name in names
+        )
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = [
+                os.path.join(self.root, name) for name in os.listdir(self.root)
+                if not name.startswith('tmp-')
+            ]
+            entries = sorted(
+                (os.path.getmtime(path), self._size(path), path)
+                for path in entries if os.path.isdir(path)
+            )
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
@@ -0,0 +1,265 @@
+import io
+import os
+import struct
+import zlib
+import numpy as np
+from PIL import Image, GifImagePlugin
+from .profiling import NULL_PROFILER
+
+def palette_image(colors):
+    """Build a 'P' image carrying the given RGB colours as its palette, for Image.quantize."""
+    flat = [channel for color in colors for channel in color]
+    if len(flat) > 768:
+        raise ValueError(f"A palette holds at most 256 colours. Received {len(colors)}")
+    image = Image.new('P', (1, 1))
+    image.putpalette(flat + [0] * (768 - len(flat)))
+    return image
+
+def changed_region(previous, current):
+    """Return the bounding box (left, top, right, bottom) of the pixels that differ, or None."""
+    diff = previous != current
+    if diff.ndim == 3:
+        diff = diff.any(axis=2)
+    rows = np.flatnonzero(diff.any(axis=1))
+    if len(rows) == 0:
+        return None
+    cols = np.flatnonzero(diff.any(axis=0))
+    return cols[0], rows[0], cols[-1] + 1, rows[-1] + 1
+
+class GifWriter:
+    """
+    Write an animated GIF incrementally, one frame at a time.
+
+    Frames are quantized and written to disk as they arrive, so memory use
+    does not grow with the number of frames. Quantization and encoding are
+    recorded as stages of profiler, if given.
+
+    With a shared palette (a list of RGB colours, e.g.
+    Visualizer.scene_palette()) every frame is mapped onto the same global
+    colour table, which is much faster than adaptive quantization, and each
+    frame after the first only stores the rectangle that changed since the
+    previous one (delta=True). Without a palette every frame is quantized
+    adaptively and carries its own colour table.
+
+    prepare() does the quantization and may run on several threads at once;
+    FramePipeline calls it on its render workers. write() accepts prepared
+    frames or plain images.
+    """
+
+    def __init__(self, filename, duration, loop=0, profiler=None, palette=None, delta=True):
+        self.filename = filename
+        self.duration = duration
+        self.loop = loop
+        self.profiler = profiler or NULL_PROFILER
+        self.palette = palette_image(palette) if palette is not None else None
+        self.delta = delta and palette is not None
+        self.frame_count = 0
+        self._file = None
+        self._previous = None
+
+    def prepare(self, img):
+        """Quantize a frame to a palette image."""
+        with self.profiler.stage('quantization'):
+            if self.palette is None:
+                return img.convert('RGB').convert('P', palette=Image.Palette.ADAPTIVE)
+            return img.convert('RGB').quantize(palette=self.palette, dither=Image.Dither.NONE)
+
+    def write(self, img):
+        """Append a frame to the animation, quantizing it first if needed."""
+        frame = img if img.mode == 'P' else self.prepare(img)
+
+        with self.profiler.stage('gif_encoding'):
+            # The file is only created once the first frame arrives
+            if self._file is None:
+                self._file = open(self.filename, 'wb')
+                header, _ = GifImagePlugin.getheader(frame, info={'loop': self.loop})
+                for chunk in header:
+                    self._file.write(chunk)
+
+            offset = (0, 0)
+            if self.delta:
+                # Draw only the changed rectangle over the previous frame
+                indices = np.asarray(frame)
+                if self._previous is not None:
+                    box = changed_region(self._previous, indices) or (0, 0, 1, 1)
+                    offset = box[:2]
+                    self._previous = indices
+                    frame = frame.crop(box)
+                else:
+                    self._previous = indices
+
+            # Frames carry their own colour table unless the palette is shared
+            for chunk in GifImagePlugin.getdata(
+                frame, offset=offset, duration=self.duration,
+                disposal=1 if self.delta else 0,
+                include_color_table=self.palette is None
+            ):
+                self._file.write(chunk)
+        self.frame_count += 1
+
+    def close(self):
+        """Write the GIF trailer and close the file."""
+        if self._file is not None:
+            self._file.write(b';')
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class APNGWriter:
+    """
+    Write an animated PNG incrementally, one frame at a time.
+
+    Frames are stored losslessly in RGB, or as indices into one shared
+    palette if palette is given. With delta=True each frame after the first
+    only stores the rectangle that changed since the previous one. The
+    frame count in the animation header is filled in by close().
+    """
+    SIGNATURE = b'\x89PNG\r\n\x1a\n'
+    COMPRESSION_LEVEL = 6
+
+    def __init__(self, filename, duration, loop=0, profiler=None, palette=None, delta=True):
+        self.filename = filename
+        self.duration = duration
+        self.loop = loop
+        self.profiler = profiler or NULL_PROFILER
+        self.palette = palette_image(palette) if palette is not None else None
+        self._palette_bytes = bytes(
+            channel for color in palette for channel in color
+        ) if palette is not None else None
+        self.delta = delta
+        self.frame_count = 0
+        self._file = None
+        self._actl_offset = None
+        self._sequence = 0
+        self._previous = None
+
+    def prepare(self, img):
+        """Convert a frame to an array of palette indices (H, W) or RGB values (H, W, 3)."""
+        with self.profiler.stage('quantization'):
+            if self.palette is None:
+                return np.asarray(img.convert('RGB'))
+            return np.asarray(img.convert('RGB').quantize(palette=self.palette, dither=Image.Dither.NONE))
+
+    def _chunk(self, tag, data):
+        self._file.write(struct.pack('>I', len(data)) + tag + data)
+        self._file.write(struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    def _write_header(self, frame):
+        height, width = frame.shape[:2]
+        color_type = 3 if self.palette is not None else 2
+        self._file = open(self.filename, 'wb')
+        self._file.write(self.SIGNATURE)
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0))
+        self._actl_offset = self._file.tell()
+        self._chunk(b'acTL', struct.pack('>II', 0, self.loop))
+        if self.palette is not None:
+            self._chunk(b'PLTE', self._palette_bytes)
+
+    def write(self, img):
+        """Append a frame to the animation, converting it first if needed."""
+        frame = img if isinstance(img, np.ndarray) else self.prepare(img)
+
+        with self.profiler.stage('apng_encoding'):
+            if self._file is None:
+                self._write_header(frame)
+
+            left, top = 0, 0
+            region = frame
+            if self.delta and self._previous is not None:
+                left, top, right, bottom = changed_region(self._previous, frame) or (0, 0, 1, 1)
+                region = frame[top:bottom, left:right]
+            self._previous = frame
+            height, width = region.shape[:2]
+
+            self._chunk(b'fcTL', struct.pack(
+                '>IIIIIHHBB', self._sequence, width, height, left, top,
+                self.duration, 1000, 0, 0  # delay in ms; keep frame, overwrite region
+            ))
+            self._sequence += 1
+
+            # Each scanline is preceded by its filter type (0, none)
+            rows = region.reshape(height, -1)
+            scanlines = np.zeros((height, rows.shape[1] + 1), dtype=np.uint8)
+            scanlines[:, 1:] = rows
+            data = zlib.compress(scanlines.tobytes(), self.COMPRESSION_LEVEL)
+            if self.frame_count == 0:
+                self._chunk(b'IDAT', data)
+            else:
+                self._chunk(b'fdAT', struct.pack('>I', self._sequence) + data)
+                self._sequence += 1
+        self.frame_count += 1
+
+    def close(self):
+        """Record the frame count, write the end chunk and close the file."""
+        if self._file is not None:
+            self._chunk(b'IEND', b'')
+            self._file.seek(self._actl_offset)
+            self._chunk(b'acTL', struct.pack('>II', self.frame_count, self.loop))
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class FrameDirectoryWriter:
+    """
+    Write every frame as a numbered PNG file (frame_00000.png, ...) in a directory.
+
+    prepare() encodes the PNG in memory and may run on several threads at
+    once, so only the file writes are sequential.
+    """
+    COMPRESSION_LEVEL = 1
+
+    def __init__(self, path, duration=None, loop=0, profiler=None, palette=None):
+        self.path = path
+        self.duration = duration
+        self.profiler = profiler or NULL_PROFILER
+        self.frame_count = 0
+        os.makedirs(self.path, exist_ok=True)
+
+    def prepare(self, img):
+        """Encode a frame as PNG bytes."""
+        with self.profiler.stage('png_encoding'):
+            buffer = io.BytesIO()
+            img.convert('RGB').save(buffer, format='PNG', compress_level=self.COMPRESSION_LEVEL)
+            return buffer.getvalue()
+
+    def write(self, img):
+        """Write a frame to the next numbered file, encoding it first if needed."""
+        data = img if isinstance(img, bytes) else self.prepare(img)
+        with open(os.path.join(self.path, f"frame_{self.frame_count:05d}.png"), 'wb') as f:
+            f.write(data)
+        self.frame_count += 1
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+WRITERS = {'.gif': GifWriter, '.png': APNGWriter, '.apng': APNGWriter}
+
+def create_writer(filename, duration, loop=0, profiler=None, palette=None):
+    """
+    Create the animation writer for an output name.
+
+    .gif writes an animated GIF, .png or .apng an animated PNG, and a name
+    without an extension a directory of numbered PNG frames.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if not extension:
+        return FrameDirectoryWriter(filename, duration, loop, profiler=profiler)
+    if extension not in WRITERS:
+        raise ValueError(f"Unknown animation format '{extension}'. Choose from {sorted(WRITERS)} or a directory")
+    return WRITERS[extension](filename, duration, loop, profiler=profiler, palette=palette)
@@ -0,0 +1,95 @@
+import numpy as np
+from .wavefunction import WaveFunction
+from .potential import PotentialBarrier
+from .evolution import WaveFunctionEvolution, SplitOperatorPropagator
+
+class EnsembleEvolution:
+    """
+    Evolve a batch of simulations together as (B, N) arrays.
+
+    Every member is a dict in the sim_params schema. Members may differ in
+    their packet and barrier parameters but must share the spatial grid and
+    total simulation time, so that they share one time step. fft_backend
+    selects the FFT backend used for the batched transforms and precision
+    is 'double' or 'single'.
+    """
+    SHARED_PARAMS = ('spatial_points', 'spatial_range', 'total_time')
+
+    def __init__(self, members, fft_backend=None, precision='double'):
+        if not members:
+            raise ValueError("An ensemble needs at least one member.")
+        for param in self.SHARED_PARAMS:
+            values = {tuple(np.atleast_1d(member[param])) for member in members}
+            if len(values) > 1:
+                raise ValueError(f"All ensemble members must share '{param}'. Received {sorted(values)}")
+
+        self.members = members
+        self.fft_backend = fft_backend
+        self.precision = precision
+        first = members[0]
+
+        # Shared spatial grid and time step
+        self.x = np.linspace(first['spatial_range'][0], first['spatial_range'][1], first['spatial_points'])
+        self.dx = self.x[1] - self.x[0]
+        self.dt = WaveFunctionEvolution.compute_time_step(self.x)
+        self.num_time_steps = int(first['total_time'] / self.dt) + 1
+        self.times = np.linspace(0, first['total_time'], self.num_time_steps)
+
+        # Stacked initial wave functions and potentials, built like a single run
+        self.psi0 = np.stack([
+            WaveFunction.initialize_wavefunction(self.x, member['n'], member['x0'])
+            for member in members
+        ])
+        self.V_total = np.stack([
+            PotentialBarrier.create_total_potential(
+                self.x, member['barrier_center_init'], member['V0'],
+                member['barrier_width'], member['transition_width']
+            )
+            for member in members
+        ])
+        self.barrier_center = np.array([member['barrier_center_init'] for member in members])
+        self.barrier_width = np.array([member['barrier_width'] for member in members])
+
+    def run(self, num_snapshots=None):
+        """
+        Evolve all members over the full simulation time.
+
+        Returns a dict with per-member 'transmission', 'reflection' and
+        'probability' (final total probability). If num_snapshots is given,
+        'snapshot_times' and 'snapshots' of shape (num_snapshots, B, N) are
+        included, taken at the same steps as the frames of a single run.
+        """
+        propagator = SplitOperatorPropagator(
+            self.x, self.dt, self.V_total,
+            fft_backend=self.fft_backend, precision=self.precision
+        )
+        psi = self.psi0.astype(propagator.dtype)
+        results = {}
+
+        if num_snapshots:
+            snapshot_indices = np.unique(
+                np.linspace(0, self.num_time_steps - 1, num_snapshots).astype(int)
+            )
+            snapshots = np.empty((len(snapshot_indices),) + psi.shape, dtype=psi.dtype)
+        else:
+            snapshot_indices = np.array([], dtype=int)
+
+        step = 0
+        for i, snapshot_index in enumerate(snapshot_indices):
+            n_steps = snapshot_index + 1 - step
+            psi = propagator.advance(psi, n_steps)
+            step += n_steps
+            snapshots[i] = psi
+        psi = propagator.advance(psi, self.num_time_steps - step)
+
+        transmitted, reflected = WaveFunction.compute_transmission_reflection(
+            psi, self.x, self.dx, self.barrier_center, self.barrier_width
+        )
+        results['transmission'] = transmitted
+        results['reflection'] = reflected
+        results['probability'] = propagator.total_probability(psi)
+        results['final_state'] = psi
+        if num_snapshots:
+            results['snapshot_times'] = self.times[snapshot_indices]
+            results['snapshots'] = snapshots
+        return results
@@ -1,4 +1,9 @@
+import hashlib
+import threading
+import warnings
+from collections import OrderedDict
 import numpy as np
+from .fft_backend import get_fft_backend
 
 class WaveFunctionEvolution:
     @staticmethod
@@ -26,4 +31,507 @@ class WaveFunctionEvolution:
         psi_k *= exp_T
         psi = np.fft.ifft(psi_k)
         
-        return psi
\ No newline at end of file
+        return psi
+
+    @staticmethod
+    def compute_time_step(x):
+        """Compute the time step used for a grid, from its largest wavenumber."""
+        dx = x[1] - x[0]
+        max_k = np.max(np.abs(2 * np.pi * np.fft.fftfreq(len(x), d=dx)))
+        return 0.05 / (max_k**2 / 2)
+
+class NormDriftError(RuntimeError):
+    """Raised when the total probability drifts further than allowed."""
+
+class SplitOperatorPropagator:
+    """
+    Split-operator propagator built once for a fixed grid, time step and potential.
+
+    Consecutive kinetic half-steps are fused into full steps (Strang splitting),
+    so each step costs two FFTs instead of four. V_total may be a stack of
+    potentials of shape (B, N) to evolve a batch of wave functions at once.
+    fft_backend names the FFT backend (see get_fft_backend).
+
+    precision='single' runs the wave function, propagator tables and FFTs in
+    complex64. Probabilities are still accumulated in float64, and after each
+    advance() the drift of the total probability from its initial value is
+    checked against norm_tolerance: on_norm_drift='warn' warns once, 'raise'
+    raises NormDriftError.
+
+    A complex V_total with a negative imaginary part (absorbing layers)
+    removes probability. The amount removed in the left and right halves of
+    the grid is accumulated in absorbed[..., 0] and absorbed[..., 1], and
+    counted in the norm drift check, so only unexplained loss is reported.
+    """
+    PRECISIONS = {'double': np.complex128, 'single': np.complex64}
+    # Single-precision rounding alone drifts the norm by about 1e-2 per 30k steps
+    DEFAULT_NORM_TOLERANCE = {'double': 1e-8, 'single': 5e-2}
+
+    def __init__(self, x, dt, V_total, fft_backend=None, precision='double',
+                 norm_tolerance=None, on_norm_drift='warn'):
+        self._init_common(dt, fft_backend, precision, norm_tolerance, on_norm_drift)
+        self.dx = x[1] - x[0]
+        self.N = len(x)
+        V_total = np.asarray(V_total)
+        self._fft = self.fft_backend.fft
+        self._ifft = self.fft_backend.ifft
+
+        # Momentum space grid and kinetic energy
+        k = np.fft.fftfreq(self.N, d=self.dx) * 2 * np.pi
+        T = (k**2) / 2
+
+        # Cached propagator tables, computed in double precision
+        exp_T_half = np.exp(-1j * T * dt / 2)
+        self.exp_T_half = exp_T_half.astype(self.dtype)
+        self.exp_T = (exp_T_half**2).astype(self.dtype)
+        self.exp_V = np.exp(-1j * V_total * dt).astype(self.dtype)
+        self._kinetic_half = (self.exp_T_half,)
+        self._kinetic_full = (self.exp_T,)
+
+        # Absorbing layers: per step, a potential step removes
+        # |psi|^2 (exp(2 W dt) - 1) dx of probability, measured after the step
+        self.absorbed = np.zeros(V_total.shape[:-1] + (2,))
+        self._absorber_slices = []
+        if np.iscomplexobj(V_total) and np.any(V_total.imag < 0):
+            W = np.maximum(-V_total.imag, 0)
+            self._absorber_loss = np.expm1(2 * W * dt) * self.dx
+            absorbing = np.flatnonzero(np.any(W > 0, axis=tuple(range(W.ndim - 1))))
+            half = self.N // 2
+            left = absorbing[absorbing < half]
+            right = absorbing[absorbing >= half]
+            self._absorber_slices = [
+                slice(left[0], left[-1] + 1) if len(left) else slice(0, 0),
+                slice(right[0], right[-1] + 1) if len(right) else slice(0, 0),
+            ]
+
+        # Preallocated momentum space buffer
+        self._psi_k = self.fft_backend.empty(V_total.shape, dtype=self.dtype)
+
+    def _init_common(self, dt, fft_backend, precision, norm_tolerance, on_norm_drift):
+        """Set up the settings shared by the 1D and 2D propagators."""
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}'. Choose from {list(self.PRECISIONS)}")
+        if on_norm_drift not in ('warn', 'raise'):
+            raise ValueError(f"on_norm_drift must be 'warn' or 'raise'. Received '{on_norm_drift}'")
+        self.dt = dt
+        self.fft_backend = get_fft_backend(fft_backend)
+        self.precision = precision
+        self.dtype = self.PRECISIONS[precision]
+
+        # Norm drift guardrail
+        if norm_tolerance is None:
+            norm_tolerance = self.DEFAULT_NORM_TOLERANCE[precision]
+        self.norm_tolerance = norm_tolerance
+        self.on_norm_drift = on_norm_drift
+        self.reference_norm = None
+        self.norm_drift = 0.0
+        self._drift_warned = False
+        # Steps taken by advance() so far, and the hook that updates exp_V
+        # before each step of a time-dependent potential
+        self.steps_taken = 0
+        self._update_potential = None
+
+    def total_probability(self, psi):
+        """Total probability of psi, accumulated in float64."""
+        return (np.einsum('...i,...i->...', psi.real, psi.real, dtype=np.float64) +
+                np.einsum('...i,...i->...', psi.imag, psi.imag, dtype=np.float64)) * self.dx
+
+    def advance(self, psi, n_steps, probabilities=None):
+        """
+        Advance psi by n_steps time steps, in place.
+
+        psi is converted to the propagator's precision if needed, so use the
+        returned array. If a list is given as probabilities, the total
+        probability after each step is appended to it (one value per batch
+        member for batched psi).
+        """
+        psi = np.asarray(psi, dtype=self.dtype)
+        if self.reference_norm is None:
+            self.reference_norm = self.total_probability(psi)
+        if n_steps <= 0:
+            return psi
+
+        if self._psi_k.shape != psi.shape:
+            self._psi_k = self.fft_backend.empty(psi.shape, dtype=self.dtype)
+        psi_k = self._psi_k
+        exp_V = self.exp_V
+        fft = self._fft
+        ifft = self._ifft
+
+        # Opening kinetic half-step
+        fft(psi, out=psi_k)
+        for factor in self._kinetic_half:
+            psi_k *= factor
+
+        update_potential = self._update_potential
+        for step in range(n_steps):
+            ifft(psi_k, out=psi)
+            if update_potential is not None:
+                update_potential(self.steps_taken + step)
+            psi *= exp_V
+            for side, region in enumerate(self._absorber_slices):
+                segment = psi[..., region]
+                self.absorbed[..., side] += np.einsum(
+                    '...i,...i->...', segment.real**2 + segment.imag**2,
+                    self._absorber_loss[..., region], dtype=np.float64
+                )
+            if probabilities is not None:
+                # The remaining kinetic phase does not change |psi|^2
+                probabilities.append(self.total_probability(psi))
+            fft(psi, out=psi_k)
+            # Fuse this step's closing half-step with the next opening one
+            for factor in (self._kinetic_full if step < n_steps - 1 else self._kinetic_half):
+                psi_k *= factor
+
+        ifft(psi_k, out=psi)
+        self.steps_taken += n_steps
+        self._check_norm(psi)
+        return psi
+
+    def _check_norm(self, psi):
+        total = self.total_probability(psi) + self.absorbed.sum(axis=-1)
+        self.norm_drift = float(np.max(np.abs(total - self.reference_norm)))
+        if self.norm_drift <= self.norm_tolerance:
+            return
+        message = (f"Total probability drifted by {self.norm_drift:.2e} "
+                   f"(tolerance {self.norm_tolerance:.0e}, {self.precision} precision)")
+        if self.on_norm_drift == 'raise':
+            raise NormDriftError(message)
+        if not self._drift_warned:
+            warnings.warn(message, RuntimeWarning)
+            self._drift_warned = True
+
+class TimeDependentPropagator(SplitOperatorPropagator):
+    """
+    Split-operator propagator for a barrier that changes over time.
+
+    V_base is the static part of the potential (zeros, or absorbing layers)
+    and schedule a BarrierSchedule. Each step uses the potential at the
+    step's midpoint, and only exp_V where the potential changes is updated:
+    exp_V over schedule.changed_slices() (for a moving barrier, near its
+    edges) is computed for BLOCK_STEPS steps at a time in one vectorized
+    pass, so a step only copies rows of that block into place. For
+    periodic schedules whose period is a whole number of steps, exp_V over
+    schedule.region(), the part of the grid the barrier can reach, is
+    instead cached per step of the period and reused every period, unless
+    the cache would exceed max_table_bytes. Other periods would put the
+    cached step midpoints off the actual ones, so they use the exact block
+    updates. Once a schedule settles, updates stop.
+    """
+    # Relative tolerance for a period to count as a whole number of steps
+    PERIOD_TOLERANCE = 1e-9
+    DEFAULT_MAX_TABLE_BYTES = 256 * 1024**2
+    BLOCK_STEPS = 64
+
+    def __init__(self, x, dt, V_base, schedule, t_end, max_table_bytes=None, **kwargs):
+        self.V_base = np.asarray(V_base)
+        super().__init__(x, dt, self.V_base + schedule.potential(x, dt / 2), **kwargs)
+        self.x = x
+        self.schedule = schedule
+        self.region = schedule.region(x, t_end)
+        self.table_hits = 0
+        self._t_previous = dt / 2
+        self._block = None
+
+        # Phase tables of periodic schedules
+        self._tables = None
+        self.phases = None
+        steps_per_period = None if schedule.period is None else schedule.period / dt
+        if steps_per_period is not None and abs(steps_per_period - round(steps_per_period)) <= \
+                self.PERIOD_TOLERANCE * steps_per_period:
+            self.phases = int(round(steps_per_period))
+            region_bytes = self.V_base[..., self.region].size * np.dtype(self.dtype).itemsize
+            if max_table_bytes is None:
+                max_table_bytes = self.DEFAULT_MAX_TABLE_BYTES
+            if self.phases * region_bytes <= max_table_bytes:
+                self._tables = {}
+
+        if not schedule.static:
+            self._update_potential = self._update_phase if self._tables is not None else self._update_block
+
+    def _exp_V(self, region, t):
+        """exp_V over a region at time t, or at each of an array of times (one row per time)."""
+        x = self.x[region]
+        if np.ndim(t):
+            t = np.asarray(t)[:, None]
+            x = np.broadcast_to(x, (len(t), len(x)))
+        V = self.V_base[..., region] + self.schedule.potential(x, t)
+        return np.exp(-1j * V * self.dt).astype(self.dtype, copy=False)
+
+    def _update_block(self, step):
+        if self._block is None or step >= self._block[0] + self.BLOCK_STEPS:
+            settles_at = self.schedule.settles_at
+            if settles_at is not None and self._t_previous >= settles_at:
+                # exp_V already holds the final potential
+                self._update_potential = None
+                return
+            times = (step + np.arange(self.BLOCK_STEPS) + 0.5) * self.dt
+            # Compare against every time in the block, not just its ends
+            regions = self.schedule.changed_slices(self.x, np.concatenate(([self._t_previous], times)))
+            self._block = (step, [(region, self._exp_V(region, times)) for region in regions])
+            self._t_previous = times[-1]
+        first, tables = self._block
+        for region, table in tables:
+            self.exp_V[..., region] = table[step - first]
+
+    def _update_phase(self, step):
+        # The period is a whole number of steps, so step midpoints repeat exactly
+        phase = step % self.phases
+        table = self._tables.get(phase)
+        if table is None:
+            table = self._tables[phase] = self._exp_V(self.region, (phase + 0.5) * self.dt)
+        else:
+            self.table_hits += 1
+        self.exp_V[..., self.region] = table
+
+class WaveFunctionEvolution2D:
+    @staticmethod
+    def evolve_wavefunction(psi, x, y, dt, V_total):
+        """Evolve a 2D wave function psi[y, x] by one split-operator step."""
+        kx = np.fft.fftfreq(len(x), d=x[1] - x[0]) * 2 * np.pi
+        ky = np.fft.fftfreq(len(y), d=y[1] - y[0]) * 2 * np.pi
+        exp_T = np.exp(-1j * np.add.outer(ky**2, kx**2) / 2 * dt / 2)
+        exp_V = np.exp(-1j * V_total * dt)
+
+        psi_k = np.fft.fft2(psi) * exp_T
+        psi = np.fft.ifft2(psi_k) * exp_V
+        psi_k = np.fft.fft2(psi) * exp_T
+        return np.fft.ifft2(psi_k)
+
+    @staticmethod
+    def compute_time_step(x, y):
+        """Compute the time step used for a 2D grid, from its largest kinetic energy."""
+        max_kx = np.max(np.abs(2 * np.pi * np.fft.fftfreq(len(x), d=x[1] - x[0])))
+        max_ky = np.max(np.abs(2 * np.pi * np.fft.fftfreq(len(y), d=y[1] - y[0])))
+        return 0.05 / ((max_kx**2 + max_ky**2) / 2)
+
+class SplitOperatorPropagator2D(SplitOperatorPropagator):
+    """
+    Split-operator propagator for 2D wave functions psi[y, x].
+
+    The kinetic phase exp(-i (kx^2 + ky^2) dt / 2) factors into a row along
+    x and a column along y, so only those 1D factors are stored and applied
+    by broadcasting. The only full-grid arrays are exp_V and one momentum
+    space buffer, and psi is advanced in place. Transforms use the
+    backend's fft2/ifft2; the scipy and pyfftw backends run them on all
+    cores. Steps are fused and the norm drift checked as in 1D.
+    """
+
+    def __init__(self, x, y, dt, V_total, fft_backend=None, precision='double',
+                 norm_tolerance=None, on_norm_drift='warn'):
+        self._init_common(dt, fft_backend, precision, norm_tolerance, on_norm_drift)
+        self.dx = x[1] - x[0]
+        self.dy = y[1] - y[0]
+        V_total = np.asarray(V_total)
+        self._fft = self.fft_backend.fft2
+        self._ifft = self.fft_backend.ifft2
+
+        # Separable kinetic factors, computed in double precision
+        kx = np.fft.fftfreq(len(x), d=self.dx) * 2 * np.pi
+        ky = np.fft.fftfreq(len(y), d=self.dy) * 2 * np.pi
+        exp_Tx_half = np.exp(-1j * kx**2 / 2 * dt / 2)
+        exp_Ty_half = np.exp(-1j * ky**2 / 2 * dt / 2)[:, None]
+        self._kinetic_half = (exp_Tx_half.astype(self.dtype), exp_Ty_half.astype(self.dtype))
+        self._kinetic_full = ((exp_Tx_half**2).astype(self.dtype), (exp_Ty_half**2).astype(self.dtype))
+        self.exp_V = np.exp(-1j * V_total * dt).astype(self.dtype)
+
+        # No absorbing layers in 2D
+        self.absorbed = np.zeros(V_total.shape[:-2] + (2,))
+        self._absorber_slices = []
+
+        # Preallocated momentum space buffer
+        self._psi_k = self.fft_backend.empty(V_total.shape, dtype=self.dtype)
+
+    def total_probability(self, psi):
+        """Total probability of psi, accumulated in float64."""
+        return (np.einsum('...ij,...ij->...', psi.real, psi.real, dtype=np.float64) +
+                np.einsum('...ij,...ij->...', psi.imag, psi.imag, dtype=np.float64)) * self.dx * self.dy
+
+class EigenPropagator:
+    """
+    Propagator that diagonalizes the Hamiltonian of a static potential once.
+
+    With H = U diag(E) U^T, the state at any time is
+    psi(t) = U exp(-i E t) U^T psi(0), so frames can be evaluated directly at
+    their times, in any order, without time stepping. Eigenpairs are cached
+    per (grid, potential), so changing only the initial packet reuses them.
+
+    kinetic='spectral' uses the same FFT kinetic operator as the split-operator
+    method; 'finite_difference' uses a tridiagonal second difference, which is
+    cheaper to diagonalize but under-resolves packets with large k * dx.
+    """
+    KINETIC_OPERATORS = ('spectral', 'finite_difference')
+    CACHE_SIZE = 4
+    _cache = OrderedDict()
+    # Scrubs and eigen-engine runs are jobs on different threads
+    _cache_lock = threading.Lock()
+
+    def __init__(self, x, V_total, kinetic='spectral'):
+        if kinetic not in self.KINETIC_OPERATORS:
+            raise ValueError(f"Unknown kinetic operator '{kinetic}'. Choose from {self.KINETIC_OPERATORS}")
+        self.dx = x[1] - x[0]
+        self.N = len(x)
+
+        key = hashlib.sha1(
+            np.ascontiguousarray(x).tobytes() + np.ascontiguousarray(V_total).tobytes() + kinetic.encode()
+        ).hexdigest()
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is None:
+            # Diagonalize outside the lock, so other grids are not held up
+            cached = self._diagonalize(x, V_total, kinetic)
+            with self._cache_lock:
+                self._cache[key] = cached
+                while len(self._cache) > self.CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        self.energies, self.eigenvectors = cached
+
+    @staticmethod
+    def _diagonalize(x, V_total, kinetic):
+        dx = x[1] - x[0]
+        N = len(x)
+
+        if kinetic == 'finite_difference':
+            diagonal = 1 / dx**2 + V_total
+            off_diagonal = np.full(N - 1, -1 / (2 * dx**2))
+            try:
+                from scipy.linalg import eigh_tridiagonal
+                return eigh_tridiagonal(diagonal, off_diagonal)
+            except ImportError:
+                H = np.diag(diagonal) + np.diag(off_diagonal, 1) + np.diag(off_diagonal, -1)
+                return np.linalg.eigh(H)
+
+        # The FFT kinetic operator is a circulant matrix in position space
+        k = np.fft.fftfreq(N, d=dx) * 2 * np.pi
+        kernel = np.fft.ifft((k**2) / 2).real
+        indices = np.arange(N)
+        H = kernel[(indices[:, None] - indices[None, :]) % N]
+        H[indices, indices] += V_total
+        return np.linalg.eigh(H)
+
+    def project(self, psi):
+        """Expand a wave function in the energy eigenbasis."""
+        return self.eigenvectors.T @ psi
+
+    def state_at(self, coefficients, t):
+        """Evaluate the wave function at time t from its eigenbasis coefficients."""
+        return self.eigenvectors @ (np.exp(-1j * self.energies * t) * coefficients)
+
+    def states_at(self, coefficients, times):
+        """Evaluate the wave function at several times, returned as rows."""
+        phases = np.exp(-1j * np.outer(self.energies, times)) * coefficients[:, None]
+        return (self.eigenvectors @ phases).T
+
+class ChebyshevPropagator:
+    """
+    Propagator that expands exp(-i H t) in Chebyshev polynomials of H.
+
+    Jumps straight from one frame time to the next with a single expansion
+    whose length is chosen from the requested tolerance, instead of many
+    small fixed time steps. H uses the same FFT kinetic operator as the
+    split-operator method.
+    """
+
+    def __init__(self, x, V_total, tolerance=1e-10, fft_backend=None):
+        self.dx = x[1] - x[0]
+        self.N = len(x)
+        self.fft_backend = get_fft_backend(fft_backend)
+        self.tolerance = tolerance
+        self.V_total = np.asarray(V_total)
+
+        # Momentum space grid and kinetic energy
+        k = np.fft.fftfreq(self.N, d=self.dx) * 2 * np.pi
+        self.T = (k**2) / 2
+
+        # Map the spectrum of H onto [-1, 1], with a small safety margin
+        E_min = self.V_total.min()
+        E_max = self.T.max() + self.V_total.max()
+        self.E_center = (E_max + E_min) / 2
+        self.E_half_width = 1.01 * (E_max - E_min) / 2
+
+        # Preallocated momentum space buffer
+        self._psi_k = self.fft_backend.empty(self.N, dtype=complex)
+        self.hamiltonian_applications = 0
+
+    def apply_hamiltonian(self, psi, out):
+        """Compute H psi into out."""
+        self.fft_backend.fft(psi, out=self._psi_k)
+        self._psi_k *= self.T
+        self.fft_backend.ifft(self._psi_k, out=out)
+        out += self.V_total * psi
+        self.hamiltonian_applications += 1
+        return out
+
+    def energy(self, psi):
+        """Compute the expectation value of H, normalized by the norm of psi."""
+        psi_k = self.fft_backend.fft(psi, out=self._psi_k)
+        kinetic = np.sum(self.T * np.abs(psi_k)**2) / self.N
+        potential = np.sum(self.V_total * np.abs(psi)**2)
+        return (kinetic + potential) / np.vdot(psi, psi).real
+
+    @staticmethod
+    def bessel_coefficients(R, tolerance):
+        """
+        Return J_k(R) for k = 0, 1, ... until the series has converged.
+
+        Uses Miller's backward recurrence, normalized with J_0 + 2 sum J_2k = 1.
+        """
+        if R == 0:
+            return np.array([1.0])
+        start = int(R + 15 * R**(1 / 3) + 30)
+        J = np.zeros(start + 2)
+        J[start] = 1e-300
+        for k in range(start, 0, -1):
+            J[k - 1] = 2 * k / R * J[k] - J[k + 1]
+            # Rescale to avoid overflow on long recurrences
+            if abs(J[k - 1]) > 1e250:
+                J[k - 1:] *= 1e-250
+        J /= J[0] + 2 * np.sum(J[2::2])
+
+        # Keep terms up to the last one above the tolerance
+        significant = np.nonzero(np.abs(J) > tolerance)[0]
+        return J[:significant[-1] + 1]
+
+    def advance(self, psi, delta_t):
+        """
+        Propagate psi by delta_t in one Chebyshev expansion.
+
+        Returns the new wave function and a dict with the number of terms and
+        the change in norm and energy over the jump.
+        """
+        norm_before = np.sqrt(np.vdot(psi, psi).real * self.dx)
+        energy_before = self.energy(psi)
+
+        R = self.E_half_width * delta_t
+        J = self.bessel_coefficients(R, self.tolerance)
+
+        # T_0 and T_1 of the normalized Hamiltonian applied to psi
+        phi_prev = psi.astype(complex)
+        phi = self.apply_hamiltonian(phi_prev, np.empty_like(phi_prev))
+        phi -= self.E_center * phi_prev
+        phi /= self.E_half_width
+        result = J[0] * phi_prev
+        if len(J) > 1:
+            result += 2 * (-1j) * J[1] * phi
+
+        # Three-term recurrence phi_{k+1} = 2 H_norm phi_k - phi_{k-1}
+        phi_next = np.empty_like(phi)
+        for k in range(2, len(J)):
+            self.apply_hamiltonian(phi, phi_next)
+            phi_next -= self.E_center * phi
+            phi_next *= 2 / self.E_half_width
+            phi_next -= phi_prev
+            result += 2 * (-1j)**k * J[k] * phi_next
+            phi_prev, phi, phi_next = phi, phi_next, phi_prev
+
+        result *= np.exp(-1j * self.E_center * delta_t)
+
+        norm_after = np.sqrt(np.vdot(result, result).real * self.dx)
+        info = {
+            'n_terms': len(J),
+            'norm_error': float(abs(norm_after - norm_before)),
+            'energy_error': float(abs(self.energy(result) - energy_before)),
+        }
+        return result, info
@@ -0,0 +1,168 @@
+import os
+import threading
+import numpy as np
+
+# Environment variables used when no backend is given explicitly
+FFT_BACKEND_ENV = 'VIZPHYS_FFT_BACKEND'
+FFT_WORKERS_ENV = 'VIZPHYS_FFT_WORKERS'
+
+class NumpyFFTBackend:
+    """numpy.fft, writing into the output buffer where NumPy supports it."""
+    name = 'numpy'
+
+    def __init__(self, workers=None):
+        # numpy.fft is single-threaded; workers is accepted for a uniform interface
+        self.workers = 1
+        self._supports_out = int(np.__version__.split('.')[0]) >= 2
+
+    def empty(self, shape, dtype=complex):
+        return np.empty(shape, dtype=dtype)
+
+    def fft(self, a, out):
+        """Forward FFT of a along its last axis, written into out."""
+        if self._supports_out:
+            return np.fft.fft(a, out=out)
+        out[...] = np.fft.fft(a)
+        return out
+
+    def ifft(self, a, out):
+        """Inverse FFT of a along its last axis, written into out."""
+        if self._supports_out:
+            return np.fft.ifft(a, out=out)
+        out[...] = np.fft.ifft(a)
+        return out
+
+    def fft2(self, a, out):
+        """Forward FFT of a over its last two axes, written into out."""
+        # One axis at a time: fft2(out=) leaves out[0, 0] unset in NumPy 2.x
+        if self._supports_out:
+            np.fft.fft(a, axis=-2, out=out)
+            return np.fft.fft(out, axis=-1, out=out)
+        out[...] = np.fft.fft2(a)
+        return out
+
+    def ifft2(self, a, out):
+        """Inverse FFT of a over its last two axes, written into out."""
+        if self._supports_out:
+            np.fft.ifft(a, axis=-2, out=out)
+            return np.fft.ifft(out, axis=-1, out=out)
+        out[...] = np.fft.ifft2(a)
+        return out
+
+class ScipyFFTBackend:
+    """scipy.fft with multithreaded transforms over batched arrays."""
+    name = 'scipy'
+
+    def __init__(self, workers=None):
+        import scipy.fft
+        self._fft = scipy.fft
+        self.workers = workers or -1
+
+    def empty(self, shape, dtype=complex):
+        return np.empty(shape, dtype=dtype)
+
+    def fft(self, a, out):
+        out[...] = self._fft.fft(a, workers=self.workers)
+        return out
+
+    def ifft(self, a, out):
+        out[...] = self._fft.ifft(a, workers=self.workers)
+        return out
+
+    def fft2(self, a, out):
+        out[...] = self._fft.fft2(a, workers=self.workers)
+        return out
+
+    def ifft2(self, a, out):
+        out[...] = self._fft.ifft2(a, workers=self.workers)
+        return out
+
+class FFTWBackend:
+    """
+    pyFFTW with plans built once per array shape and dtype.
+
+    Buffers from empty() are SIMD-aligned, so planned transforms run directly
+    between the caller's arrays without extra copies.
+    """
+    name = 'pyfftw'
+
+    def __init__(self, workers=None, planner_effort='FFTW_MEASURE'):
+        import pyfftw
+        self._pyfftw = pyfftw
+        self.workers = workers or os.cpu_count() or 1
+        self.planner_effort = planner_effort
+        self._plans = {}
+        # A plan is bound to its arrays while it runs, so runs are serialized
+        self._lock = threading.Lock()
+
+    def empty(self, shape, dtype=complex):
+        return self._pyfftw.empty_aligned(shape, dtype=dtype)
+
+    def _plan(self, a, direction, axes=(-1,)):
+        key = (a.shape, a.dtype.str, direction, axes)
+        plan = self._plans.get(key)
+        if plan is None:
+            # Planning may overwrite its arrays, so plan on scratch buffers
+            plan = self._pyfftw.FFTW(
+                self.empty(a.shape, a.dtype), self.empty(a.shape, a.dtype),
+                axes=axes, direction=direction,
+                threads=self.workers, flags=(self.planner_effort,)
+            )
+            self._plans[key] = plan
+        return plan
+
+    def _execute(self, plan, a, out):
+        with self._lock:
+            if self._pyfftw.is_n_byte_aligned(out, plan.simd_alignment):
+                return plan(a, out)
+            # Unaligned outputs cannot be bound to the plan, so copy the result
+            out[...] = plan(a)
+            return out
+
+    def fft(self, a, out):
+        return self._execute(self._plan(a, 'FFTW_FORWARD'), a, out)
+
+    def ifft(self, a, out):
+        return self._execute(self._plan(a, 'FFTW_BACKWARD'), a, out)
+
+    def fft2(self, a, out):
+        return self._execute(self._plan(a, 'FFTW_FORWARD', axes=(-2, -1)), a, out)
+
+    def ifft2(self, a, out):
+        return self._execute(self._plan(a, 'FFTW_BACKWARD', axes=(-2, -1)), a, out)
+
+FFT_BACKENDS = {
+    'numpy': NumpyFFTBackend,
+    'scipy': ScipyFFTBackend,
+    'pyfftw': FFTWBackend,
+}
+
+# Backends are shared so FFTW plans are reused across propagators
+_backend_instances = {}
+
+def get_fft_backend(name=None, workers=None):
+    """
+    Return a shared FFT backend instance.
+
+    name is 'numpy', 'scipy', 'pyfftw' or 'auto' (the fastest one installed).
+    When name or workers are not given, the VIZPHYS_FFT_BACKEND and
+    VIZPHYS_FFT_WORKERS environment variables are used, defaulting to numpy.
+    """
+    name = name or os.environ.get(FFT_BACKEND_ENV, 'numpy')
+    if workers is None and os.environ.get(FFT_WORKERS_ENV):
+        workers = int(os.environ[FFT_WORKERS_ENV])
+
+    if name == 'auto':
+        for candidate in ('pyfftw', 'scipy', 'numpy'):
+            try:
+                return get_fft_backend(candidate, workers)
+            except ImportError:
+                continue
+
+    if name not in FFT_BACKENDS:
+        raise ValueError(f"Unknown FFT backend '{name}'. Choose from {list(FFT_BACKENDS) + ['auto']}")
+
+    key = (name, workers)
+    if key not in _backend_instances:
+        _backend_instances[key] = FFT_BACKENDS[name](workers)
+    return _backend_instances[key]
@@ -1,34 +1,30 @@
 # modules/wave_packet_tunneling/main.py
 
+import os
+import shutil
 import numpy as np
-import matplotlib.pyplot as plt
-from PIL import Image
-from tqdm import tqdm
 from .wavefunction import WaveFunction
-from .potential import PotentialBarrier
-from .evolution import WaveFunctionEvolution
+from .evolution import EigenPropagator
+from .simulation import Simulation
 from .visualization import Visualizer
+from .encoding import create_writer
+from .pipeline import FramePipeline
+from .trajectory import TrajectoryWriter, TrajectoryReader
+from .cache import ResultCache
+from .render import render_trajectory
+from .profiling import Profiler
+from .planner import GridPlanner
+from .preview import TerminalPreview
+from .params import PARAM_SPECS, default_sim_params
 
 class WavePacketMenu:
     def __init__(self, main_gui):
         self.main_gui = main_gui
         self.output_text = ""
-        self.sim_params = {
-            'output_filename': 'quantum_tunneling.gif',
-            'num_frames': 120,
-            'spatial_points': 2000,
-            'spatial_range': (-100, 100),
-            'total_time': 6.0,
-            'barrier_width': 32.6,
-            'V0': 150.0,
-            'transition_width': 0.05,
-            'vis_settings': {'width': 1280, 'height': 640},
-            'n': 4,
-            'x0': -70.0,
-            'barrier_center_init': 30.215
-        }
+        self.sim_params = default_sim_params()
         self.menu_state = 'main'
         self.param_input_state = None
+        self.cache = ResultCache.from_env()
 
     def get_menu_text(self):
         if self.menu_state == 'main':
@@ -39,9 +35,11 @@ class WavePacketMenu:
                 "2. Modify parameters\n"
                 "3. View current parameters\n"
                 "4. Reset to defaults\n"
-                "5. Exit\n\n"
+                "5. Scrub to time\n"
+                "6. Exit\n\n"
                 "h - home\n"
-                "b - back\n\n"
+                "b - back\n"
+                "Ctrl-X - cancel job\n\n"
                 "Enter your choice: "
             )
         elif self.menu_state == 'params':
@@ -55,7 +53,8 @@ class WavePacketMenu:
                 "5. Barrier center: {:.3f}\n"
                 "6. Number of frames: {}\n"
                 "7. Total simulation time: {:.1f}\n"
-                "8. Return to main menu\n\n"
+                "8. Automatic grid and time step: {}\n"
+                "9. Return to main menu\n\n"
                 "Enter parameter number to modify: "
             ).format(
                 self.sim_params['x0'],
@@ -64,7 +63,8 @@ class WavePacketMenu:
                 self.sim_params['n'],
                 self.sim_params['barrier_center_init'],
                 self.sim_params['num_frames'],
-                self.sim_params['total_time']
+                self.sim_params['total_time'],
+                'on' if self.sim_params['auto_grid'] else 'off'
             )
 
     def get_output(self):
@@ -107,46 +107,43 @@ class WavePacketMenu:
         elif choice == 4:
             self._reset_params()
         elif choice == 5:
+            self._start_scrub()
+        elif choice == 6:
             self.main_gui.application.exit()
         else:
-            self.output_text = "Invalid choice. Please select 1-5."
+            self.output_text = "Invalid choice. Please select 1-6."
 
     def _handle_params_menu(self, choice):
-        if choice == 8:
+        if choice == 9:
             self.menu_state = 'main'
             return
 
-        param_map = {
-            1: ('x0', 'Enter new initial position (-100.0 to 0.0): ', float, -100.0, 0.0),
-            2: ('barrier_width', 'Enter new barrier width (0.1-50.0): ', float, 0.1, 50.0),
-            3: ('V0', 'Enter new barrier height (1.0-200.0): ', float, 1.0, 200.0),
-            4: ('n', 'Enter new number of energy levels (1-10): ', int, 1, 10),
-            5: ('barrier_center_init', 'Enter new barrier center (-50.0 to 50.0): ', float, -50.0, 50.0),
-            6: ('num_frames', 'Enter new number of frames (30-240): ', int, 30, 240),
-            7: ('total_time', 'Enter new simulation time (1.0-20.0): ', float, 1.0, 20.0)
-        }
-
-        if choice in param_map:
-            param_name, prompt, param_type, min_val, max_val = param_map[choice]
+        if 1 <= choice <= len(PARAM_SPECS):
+            spec = PARAM_SPECS[choice - 1]
             self.param_input_state = {
-                'param_name': param_name,
-                'prompt': prompt,
-                'type': param_type,
-                'min_val': min_val,
-                'max_val': max_val
+                'param_name': spec.name,
+                'prompt': spec.prompt,
+                'type': spec.type,
+                'min_val': spec.min_val,
+                'max_val': spec.max_val
             }
-            self.output_text = prompt
+            self.output_text = spec.prompt
         else:
-            self.output_text = "Invalid choice. Please select 1-8."
+            self.output_text = "Invalid choice. Please select 1-9."
 
     def _handle_param_input(self, input_value):
         try:
             value = self.param_input_state['type'](input_value)
             if (value >= self.param_input_state['min_val'] and 
                 value <= self.param_input_state['max_val']):
-                self.sim_params[self.param_input_state['param_name']] = value
-                self.output_text = f"Parameter updated successfully."
+                param_name = self.param_input_state['param_name']
+                action = self.param_input_state.get('action')
                 self.param_input_state = None
+                if action:
+                    action(value)
+                    return
+                self.sim_params[param_name] = value
+                self.output_text = f"Parameter updated successfully."
             else:
                 self.output_text = (f"Value must be between "
                                   f"{self.param_input_state['min_val']} and "
@@ -155,85 +152,228 @@ class WavePacketMenu:
             self.output_text = "Invalid input. Please enter a number."
 
     def _run_simulation(self):
-        self.output_text = "Starting simulation...\n"
+        # Run on a snapshot of the parameters, so they can be edited and
+        # further runs queued while this one is in progress
+        sim_params = dict(self.sim_params, vis_settings=dict(self.sim_params['vis_settings']))
+        job = self.main_gui.jobs.submit(
+            sim_params['output_filename'], self._create_tunneling_animation, sim_params
+        )
+        self.output_text = f"Simulation queued as job {job.id}."
+
+    def _create_tunneling_animation(self, job, sim_params):
+        """
+        Create an animation of quantum tunneling with the given parameters.
+
+        Runs as a background job: progress and the current norm are reported
+        to the job, which stops the run when it is cancelled. Repeated runs
+        are served from the result cache; if only the visualization settings
+        changed, the cached frames are re-rendered without re-simulating.
+        With 'auto_grid' set, the grid and time step are planned first (see
+        GridPlanner) and the plan and its predicted cost are logged.
+        The per-stage profile of the run is added to the job's output.
+        """
+        output_filename = sim_params['output_filename']
+        if sim_params.get('auto_grid'):
+            plan = GridPlanner().plan(sim_params)
+            job.log(plan.report())
+            sim_params = plan.apply(sim_params)
+        # The animation is written under a temporary name, so that a
+        # cancelled or failed run leaves no truncated file at output_filename
+        root, extension = os.path.splitext(output_filename)
+        partial_filename = f"{root}.partial{extension}"
+        profiler = Profiler.from_env()
         try:
-            output_file = self._create_tunneling_animation()
-            self.output_text += f"Simulation completed! Animation saved to: {output_file}"
-        except Exception as e:
-            self.output_text += f"Error during simulation: {str(e)}"
+            with profiler:
+                trajectory_path, animation_path = self.cache.lookup(sim_params)
+                if trajectory_path is None:
+                    probability_times, probabilities = self._simulate(job, sim_params, profiler, partial_filename)
+                else:
+                    cached = TrajectoryReader(trajectory_path)
+                    probability_times = np.array(cached.times)
+                    probabilities = np.array(cached.observables['probability'])
+                    job.report(norm=float(probabilities[-1]))
+                    if animation_path is not None:
+                        job.log("Loaded animation from cache.")
+                        shutil.copyfile(animation_path, partial_filename)
+                    else:
+                        job.log("Loaded simulation from cache, rendering frames...")
+                        render_trajectory(
+                            trajectory_path, partial_filename, sim_params['vis_settings'],
+                            progress=lambda done, total: job.report(step=done, total=total),
+                            profiler=profiler
+                        )
+                        self.cache.store_animation(sim_params, partial_filename)
 
-    def _create_tunneling_animation(self):
+                # Save probability plot; pyplot's global figure state is not safe to
+                # use from background threads. matplotlib is imported on first use
+                # so that opening the menu stays fast
+                with profiler.stage('probability_plot'):
+                    from matplotlib.figure import Figure
+                    fig = Figure(figsize=(10, 6))
+                    ax = fig.subplots()
+                    ax.plot(probability_times, probabilities)
+                    ax.set_xlabel('Time')
+                    ax.set_ylabel('Total Probability')
+                    ax.set_title('Total Probability Over Time')
+                    ax.grid(True)
+                    fig.savefig("probability_over_time.png")
+        except BaseException:
+            self._remove_output(partial_filename)
+            raise
+        self._remove_output(output_filename)
+        os.replace(partial_filename, output_filename)
+
+        job.log(profiler.report())
+        job.log(f"Animation saved to: {output_filename}")
+        return output_filename
+
+    @staticmethod
+    def _remove_output(filename):
+        """Remove an animation file or frame directory, if there is one."""
+        if os.path.isdir(filename):
+            shutil.rmtree(filename)
+        elif os.path.exists(filename):
+            os.remove(filename)
+
+    def _simulate(self, job, sim_params, profiler, output_filename):
         """
-        Create an animation of quantum tunneling with current parameters.
+        Run the solver, streaming frames to output_filename and the cache.
+
+        Frames are also published as the job's live preview, at most at the
+        job's preview rate.
+
+        Returns the times and values of the total probability.
         """
-        # Initialize spatial grid
-        x = np.linspace(self.sim_params['spatial_range'][0], 
-                       self.sim_params['spatial_range'][1], 
-                       self.sim_params['spatial_points'])
-        dx = x[1] - x[0]
+        # Quick-look runs abort instead of warning on norm drift, since
+        # warnings would garble the full-screen interface
+        simulation = Simulation(sim_params, on_norm_drift='raise', profiler=profiler)
+        x = simulation.x
+        visualizer = Visualizer(sim_params['vis_settings'], profiler=profiler)
         
-        # Initialize components
-        psi = WaveFunction.initialize_wavefunction(x, self.sim_params['n'], self.sim_params['x0'])
-        V_total = PotentialBarrier.create_total_potential(
-            x, self.sim_params['barrier_center_init'], 
-            self.sim_params['V0'], self.sim_params['barrier_width'], 
-            self.sim_params['transition_width']
+        # Frames are rendered and encoded in the background while the solver runs
+        writer = create_writer(
+            output_filename,
+            duration=int(sim_params['total_time'] / sim_params['num_frames'] * 1000),
+            profiler=profiler, palette=Visualizer.scene_palette()
         )
-        visualizer = Visualizer(self.sim_params['vis_settings'])
+        pipeline = FramePipeline(visualizer.create_frame, writer)
         
-        # Calculate time step
-        max_k = np.max(np.abs(2 * np.pi * np.fft.fftfreq(self.sim_params['spatial_points'], d=dx)))
-        dt = 0.05 / (max_k**2 / 2)
+        # Frames are always stored in the cache, and optionally in a
+        # trajectory of the user's own as well
+        trajectories = [self.cache.trajectory_writer(sim_params, x, len(simulation.frame_steps))]
+        if sim_params.get('trajectory_path'):
+            trajectories.append(TrajectoryWriter(
+                sim_params['trajectory_path'], x,
+                len(simulation.frame_steps), params=sim_params
+            ))
         
-        # Setup time evolution
-        num_time_steps = int(self.sim_params['total_time'] / dt) + 1
-        times = np.linspace(0, self.sim_params['total_time'], num_time_steps)
-        frame_indices = np.linspace(0, num_time_steps - 1, self.sim_params['num_frames']).astype(int)
-        
-        frames = []
-        probabilities = []
-        
-        self.output_text += "Generating frames...\n"
-        for i in range(num_time_steps):
-            # Evolve wave function
-            psi = WaveFunctionEvolution.evolve_wavefunction(psi, x, dt, V_total)
-            
-            # Record probability
-            total_prob = WaveFunction.compute_total_probability(psi, dx)
-            probabilities.append(total_prob)
-            
-            # Capture frame if needed
-            if i in frame_indices:
-                img = visualizer.create_datashader_frame(
+        def capture(psi, t, observables):
+            job.report(norm=observables['probability'])
+            if job.preview_due():
+                with profiler.stage('preview'):
+                    barrier_center = simulation.barrier_center(t)
+                    job.show_preview(TerminalPreview.capture(
+                        psi, x, t,
+                        barrier_center - sim_params['barrier_width'] / 2,
+                        barrier_center + sim_params['barrier_width'] / 2
+                    ))
+            # Time blocked here is back-pressure from the render workers
+            with profiler.stage('frame_queue'):
+                pipeline.submit(
                     psi, x,
-                    barrier_center=self.sim_params['barrier_center_init'],
-                    barrier_width=self.sim_params['barrier_width']
+                    barrier_center=simulation.barrier_center(t),
+                    barrier_width=sim_params['barrier_width']
                 )
-                frames.append(img)
+            with profiler.stage('trajectory_write'):
+                for trajectory in trajectories:
+                    trajectory.append(t, psi, **observables)
         
-        # Save probability plot
-        plt.figure(figsize=(10, 6))
-        plt.plot(times, probabilities)
-        plt.xlabel('Time')
-        plt.ylabel('Total Probability')
-        plt.title('Total Probability Over Time')
-        plt.grid(True)
-        plt.savefig("probability_over_time.png")
-        plt.close()
-        
-        # Save animation
-        if frames:
-            self.output_text += f"Saving animation to {self.sim_params['output_filename']}...\n"
-            frames[0].save(
-                self.sim_params['output_filename'],
-                save_all=True,
-                append_images=frames[1:],
-                duration=int(self.sim_params['total_time'] / self.sim_params['num_frames'] * 1000),
-                loop=0
-            )
-            return self.sim_params['output_filename']
-        else:
+        if simulation.engine == 'eigen':
+            job.log("Diagonalizing Hamiltonian...")
+        try:
+            with pipeline:
+                results = simulation.run(
+                    on_frame=capture,
+                    on_progress=lambda step, total: job.report(step=step, total=total)
+                )
+        except Exception:
+            self.cache.discard(trajectories[0])
+            raise
+        finally:
+            for trajectory in trajectories[1:]:
+                trajectory.close()
+        job.log(simulation.summary())
+        if len(trajectories) > 1:
+            job.log(f"Trajectory saved to {sim_params['trajectory_path']}")
+        if not pipeline.frame_count:
+            self.cache.discard(trajectories[0])
             raise RuntimeError("No frames were generated. Please check the simulation parameters.")
+        
+        self.cache.commit(sim_params, trajectories[0], simulation.psi)
+        self.cache.store_animation(sim_params, output_filename)
+        return results['probability']
+
+    def _start_scrub(self):
+        prompt = f"Enter time to view (0.0-{self.sim_params['total_time']:.1f}): "
+        self.param_input_state = {
+            'param_name': None,
+            'prompt': prompt,
+            'type': float,
+            'min_val': 0.0,
+            'max_val': self.sim_params['total_time'],
+            'action': self._scrub_to_time
+        }
+        self.output_text = prompt
+
+    def _scrub_to_time(self, t):
+        # Diagonalizing and rendering can take seconds on large grids, so
+        # run them as a job on a snapshot of the parameters
+        sim_params = dict(self.sim_params, vis_settings=dict(self.sim_params['vis_settings']))
+        output_file = f"{os.path.splitext(sim_params['output_filename'])[0]}_t{t:.2f}.png"
+        job = self.main_gui.jobs.submit(output_file, self._render_scrub, sim_params, t, output_file)
+        self.output_text = f"Scrub to t = {t:.3f} queued as job {job.id}."
+
+    def _render_scrub(self, job, sim_params, t, output_file):
+        """
+        Render the state at time t of the run sim_params describes, without re-simulating.
+
+        The grid, packet and potential are those of the run, on its planned
+        grid with 'auto_grid' set, evolved in the eigenbasis of the potential,
+        which is cached, so scrubbing repeatedly through one configuration
+        only diagonalizes once. Runs the eigen engine cannot represent are
+        refused. Runs as a background job; the observables are added to its
+        output.
+        """
+        if sim_params.get('auto_grid'):
+            sim_params = GridPlanner().plan(sim_params).apply(sim_params)
+        try:
+            simulation = Simulation(dict(sim_params, engine='eigen', precision='double'))
+        except ValueError as e:
+            raise ValueError(f"Cannot scrub this run: {e}") from e
+        x = simulation.x
+        dx = simulation.dx
+
+        propagator = EigenPropagator(x, simulation.V_total)
+        psi = propagator.state_at(propagator.project(simulation.psi), t)
+
+        visualizer = Visualizer(sim_params['vis_settings'])
+        visualizer.create_frame(
+            psi, x,
+            barrier_center=sim_params['barrier_center_init'],
+            barrier_width=sim_params['barrier_width']
+        ).save(output_file)
+
+        transmitted, reflected = WaveFunction.compute_transmission_reflection(
+            psi, x, dx, sim_params['barrier_center_init'], sim_params['barrier_width']
+        )
+        job.log(
+            f"State at t = {t:.3f} ({simulation.N} points):\n"
+            f"Total probability: {WaveFunction.compute_total_probability(psi, dx):.6f}\n"
+            f"Transmitted: {transmitted:.6f}\n"
+            f"Reflected: {reflected:.6f}\n"
+            f"Frame saved to: {output_file}"
+        )
+        return output_file
 
     def _display_current_params(self):
         self.output_text = "Current Parameters:\n\n"
@@ -243,18 +383,5 @@ class WavePacketMenu:
                 self.output_text += f"{key}: {value}\n"
 
     def _reset_params(self):
-        self.sim_params = {
-            'output_filename': 'quantum_tunneling.gif',
-            'num_frames': 120,
-            'spatial_points': 2000,
-            'spatial_range': (-100, 100),
-            'total_time': 6.0,
-            'barrier_width': 32.6,
-            'V0': 150.0,
-            'transition_width': 0.05,
-            'vis_settings': {'width': 1280, 'height': 640},
-            'n': 4,
-            'x0': -70.0,
-            'barrier_center_init': 30.215
-        }
+        self.sim_params = default_sim_params()
         self.output_text = "Parameters reset to defaults."
\ No newline at end of file
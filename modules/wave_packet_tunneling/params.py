@@ -0,0 +1,103 @@
+class ParamSpec:
+    """An editable simulation parameter: its type, allowed range, menu prompt and meaning."""
+
+    def __init__(self, name, prompt, param_type, min_val, max_val, doc=None):
+        self.name = name
+        self.prompt = prompt
+        self.type = param_type
+        self.min_val = min_val
+        self.max_val = max_val
+        self.doc = doc
+
+    def check(self, value):
+        """Convert value to the parameter's type and check its range; raises ValueError."""
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError(f"{self.name} must be a number. Received {value!r}")
+        converted = self.type(value)
+        if self.type is int and converted != float(value):
+            raise ValueError(f"{self.name} must be an integer. Received {value!r}")
+        if not self.min_val <= converted <= self.max_val:
+            raise ValueError(f"{self.name} must be between {self.min_val} and {self.max_val}. Received {value!r}")
+        return converted
+
+# Parameters the menu lets the user edit, in menu order
+PARAM_SPECS = (
+    ParamSpec('x0', 'Enter new initial position (-100.0 to 0.0): ', float, -100.0, 0.0,
+              "Initial center of the packet."),
+    ParamSpec('barrier_width', 'Enter new barrier width (0.1-50.0): ', float, 0.1, 50.0,
+              "Width of the barrier between the midpoints of its edges."),
+    ParamSpec('V0', 'Enter new barrier height (1.0-200.0): ', float, 1.0, 200.0,
+              "Height of the barrier; negative values make a well."),
+    ParamSpec('n', 'Enter new number of energy levels (1-10): ', int, 1, 10,
+              "Carrier wavenumber index of the packet (see WaveFunction.calculate_kappa_n)."),
+    ParamSpec('barrier_center_init', 'Enter new barrier center (-50.0 to 50.0): ', float, -50.0, 50.0,
+              "Center of the barrier, at t = 0 for moving barriers."),
+    ParamSpec('num_frames', 'Enter new number of frames (30-240): ', int, 30, 240,
+              "Frames taken, at np.linspace over the time steps."),
+    ParamSpec('total_time', 'Enter new simulation time (1.0-20.0): ', float, 1.0, 20.0,
+              "Simulated time."),
+    ParamSpec('auto_grid', 'Plan the grid and time step automatically (0 = off, 1 = on): ', int, 0, 1,
+              "Replace spatial_points and dt with those GridPlanner chooses."),
+)
+
+# The other keys of the sim_params schema; every key but those marked is optional
+OPTION_DOCS = {
+    'spatial_points': "Number of grid points (required).",
+    'spatial_range': "(start, end) of the grid (required).",
+    'transition_width': "Width of the barrier's smooth edges (required).",
+    'engine': "'split_operator' (default), 'eigen' or 'chebyshev'; see Simulation.ENGINES.",
+    'precision': "'double' (default) or 'single'; single precision is split-operator only.",
+    'fft_backend': "FFT backend of the propagator (see get_fft_backend).",
+    'dt': "Time step, instead of WaveFunctionEvolution.compute_time_step.",
+    'packet_alpha': "Width parameter of the initial packet (see WaveFunction.wavefunction_1d).",
+    'absorber_width': "Width of absorbing layers at the grid edges, split-operator only; the "
+                      "probability they remove counts as transmitted or reflected.",
+    'absorber_strength': "Peak absorption rate of those layers.",
+    'barrier_schedule': "How the barrier moves or changes height (see BarrierSchedule.from_params), "
+                        "split-operator only; transmission and reflection are then measured "
+                        "beyond the whole range the barrier sweeps.",
+    'output_filename': "Animation written by the menu and the CLI.",
+    'vis_settings': "Frame size, {'width': ..., 'height': ...}.",
+    'trajectory_path': "Also store every frame in a trajectory file (see TrajectoryWriter).",
+}
+
+DEFAULT_SIM_PARAMS = {
+    'output_filename': 'quantum_tunneling.gif',
+    'num_frames': 120,
+    'spatial_points': 2000,
+    'spatial_range': (-100, 100),
+    'total_time': 6.0,
+    'barrier_width': 32.6,
+    'V0': 150.0,
+    'transition_width': 0.05,
+    'vis_settings': {'width': 1280, 'height': 640},
+    'n': 4,
+    'x0': -70.0,
+    'barrier_center_init': 30.215,
+    'engine': 'split_operator',
+    'precision': 'single',
+    'auto_grid': 1
+}
+
+def default_sim_params():
+    """A fresh copy of the menu's default parameters."""
+    return dict(DEFAULT_SIM_PARAMS, vis_settings=dict(DEFAULT_SIM_PARAMS['vis_settings']))
+
+def validate_params(sim_params):
+    """
+    Apply the menu's range checks to every checked parameter in sim_params.
+
+    Returns a copy with the checked values converted to their types, and
+    raises ValueError listing every parameter that is out of range.
+    """
+    checked = dict(sim_params)
+    errors = []
+    for spec in PARAM_SPECS:
+        if spec.name in checked:
+            try:
+                checked[spec.name] = spec.check(checked[spec.name])
+            except ValueError as e:
+                errors.append(str(e))
+    if errors:
+        raise ValueError("; ".join(errors))
+    return checked
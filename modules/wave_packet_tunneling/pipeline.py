@@ -0,0 +1,82 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class FramePipeline:
+    """
+    Producer/consumer pipeline that renders and encodes frames while the solver runs.
+
+    The solver submits psi snapshots, a pool of render workers turns them into
+    images, and a writer thread hands the images to an incremental encoder in
+    submission order. If the encoder has a prepare() method (quantization,
+    compression) it is run on the render workers too, so that only the
+    order-dependent part of encoding is serial. The queue of pending frames
+    is bounded, so peak memory does not depend on the number of frames.
+    """
+
+    def __init__(self, render_frame, writer, render_workers=None, max_pending=None):
+        self.render_frame = render_frame
+        self.writer = writer
+        self.render_workers = render_workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending or 2 * self.render_workers
+
+        self._executor = ThreadPoolExecutor(max_workers=self.render_workers)
+        self._pending = queue.Queue(maxsize=self.max_pending)
+        self._error = None
+        self._closed = False
+        self._writer_thread = threading.Thread(target=self._write_frames, daemon=True)
+        self._writer_thread.start()
+
+    def submit(self, psi, *args, **kwargs):
+        """
+        Queue a snapshot of psi for rendering.
+
+        Extra arguments are passed to render_frame. Blocks while the queue of
+        pending frames is full.
+        """
+        if self._error is not None:
+            raise self._error
+        future = self._executor.submit(self._render, psi.copy(), *args, **kwargs)
+        self._pending.put(future)
+
+    def _render(self, psi, *args, **kwargs):
+        img = self.render_frame(psi, *args, **kwargs)
+        prepare = getattr(self.writer, 'prepare', None)
+        return prepare(img) if prepare is not None else img
+
+    def _write_frames(self):
+        while True:
+            future = self._pending.get()
+            if future is None:
+                break
+            if self._error is not None:
+                # Keep draining so the solver is never blocked on a failed pipeline
+                future.cancel()
+                continue
+            try:
+                self.writer.write(future.result())
+            except Exception as e:
+                self._error = e
+
+    @property
+    def frame_count(self):
+        return self.writer.frame_count
+
+    def close(self):
+        """Wait for all queued frames to be written and finalize the output."""
+        if self._closed:
+            return
+        self._closed = True
+        self._pending.put(None)
+        self._writer_thread.join()
+        self._executor.shutdown()
+        self.writer.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
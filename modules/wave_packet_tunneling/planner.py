@@ -0,0 +1,184 @@
+import time
+import numpy as np
+from .wavefunction import WaveFunction, DEFAULT_PACKET_ALPHA
+from .potential import PotentialBarrier
+from .evolution import WaveFunctionEvolution, SplitOperatorPropagator
+
+class GridPlan:
+    """A grid size and time step chosen by GridPlanner, with its predicted cost."""
+
+    def __init__(self, spatial_points, dt, num_time_steps, limited_by, k_packet, k_edges,
+                 step_seconds, current=None):
+        self.spatial_points = spatial_points
+        self.dt = dt
+        self.num_time_steps = num_time_steps
+        self.limited_by = limited_by
+        self.k_packet = k_packet
+        self.k_edges = k_edges
+        self.step_seconds = step_seconds
+        # (spatial_points, dt, num_time_steps, step_seconds) of the unplanned settings
+        self.current = current
+
+    @property
+    def predicted_seconds(self):
+        return self.num_time_steps * self.step_seconds
+
+    def apply(self, sim_params):
+        """Return a copy of sim_params using this grid and time step."""
+        return dict(sim_params, spatial_points=self.spatial_points, dt=self.dt)
+
+    def report(self):
+        """Human-readable description of the plan and its predicted cost."""
+        lines = [
+            f"Grid plan: {self.spatial_points} points, dt {self.dt:.3e} ({self.num_time_steps} steps), "
+            f"resolution set by {self.limited_by}",
+            f"Packet needs |k| <= {self.k_packet:.2f}, barrier edges |k| <= {self.k_edges:.2f}",
+            f"Predicted solver time: {self.predicted_seconds:.1f} s "
+            f"({self.step_seconds * 1e6:.1f} us/step)",
+        ]
+        if self.current is not None:
+            points, dt, steps, step_seconds = self.current
+            lines.append(f"Current settings: {points} points, dt {dt:.3e} ({steps} steps), "
+                         f"{steps * step_seconds:.1f} s")
+        return "\n".join(lines)
+
+class GridPlanner:
+    """
+    Choose the smallest FFT-friendly grid and the largest time step for a run.
+
+    The grid must hold the initial packet's momentum spectrum, up to all but
+    spectral_tolerance of its probability and including the speed-up inside
+    wells, and the barrier's edges, whose spectrum falls off as
+    exp(-pi k transition_width). The number of points is the smallest
+    5-smooth number (or power of two) that gives that k_max over the
+    spatial_range. The time step keeps the phase that any significant
+    component gains per step, kinetic or potential, below phase_tolerance;
+    components beyond the packet's band carry no probability, so unlike the
+    default time step it does not shrink with the grid's own k_max.
+
+    The cost is predicted from a short timed run of the propagator at each
+    grid size, cached per size.
+    """
+    DEFAULT_SPECTRAL_TOLERANCE = 1e-8
+    DEFAULT_PHASE_TOLERANCE = 0.05
+    CALIBRATION_STEPS = 50
+    CALIBRATION_REPEATS = 3
+    EDGE_ITERATIONS = 20
+    # The probe grid reaches this many sqrt(packet_alpha) beyond the carrier wavenumber
+    PROBE_WIDTHS = 20
+    MAX_PROBE_POINTS = 2**22
+
+    _step_seconds = {}
+
+    def __init__(self, spectral_tolerance=None, phase_tolerance=None, power_of_two=False, calibrate=True):
+        self.spectral_tolerance = spectral_tolerance or self.DEFAULT_SPECTRAL_TOLERANCE
+        self.phase_tolerance = phase_tolerance or self.DEFAULT_PHASE_TOLERANCE
+        self.power_of_two = power_of_two
+        self.calibrate = calibrate
+
+    @staticmethod
+    def smooth_size(n, power_of_two=False):
+        """Smallest power of two, or number with no prime factors above 5, that is at least n."""
+        if power_of_two:
+            return 1 << int(np.ceil(np.log2(max(n, 1))))
+        size = max(n, 1)
+        while True:
+            m = size
+            for p in (2, 3, 5):
+                while m % p == 0:
+                    m //= p
+            if m == 1:
+                return size
+            size += 1
+
+    def packet_cutoff(self, sim_params):
+        """Wavenumber below which the initial packet holds all but spectral_tolerance of its probability."""
+        start, end = sim_params['spatial_range']
+        alpha = sim_params.get('packet_alpha', DEFAULT_PACKET_ALPHA)
+        # Start from a probe grid that cannot alias the carrier wave
+        k_probe = WaveFunction.calculate_kappa_n(sim_params['n']) + self.PROBE_WIDTHS * np.sqrt(alpha)
+        points = self.smooth_size(int(np.ceil((end - start) * k_probe / np.pi)) + 1, power_of_two=True)
+        while True:
+            x = np.linspace(start, end, points)
+            psi = WaveFunction.initialize_wavefunction(x, sim_params['n'], sim_params['x0'], alpha=alpha)
+            density = np.abs(np.fft.fft(psi))**2
+            density /= density.sum()
+            k = np.abs(np.fft.fftfreq(points, d=x[1] - x[0]) * 2 * np.pi)
+            order = np.argsort(k)[::-1]
+            # Probability beyond each |k|, from the top of the grid downwards
+            tail = np.cumsum(density[order])
+            # The probe grid must itself be far beyond the packet's band
+            if tail[len(tail) // 10] < self.spectral_tolerance / 100 or points >= self.MAX_PROBE_POINTS:
+                break
+            points *= 2
+        return k[order][np.searchsorted(tail, self.spectral_tolerance)]
+
+    def edge_cutoff(self, sim_params):
+        """
+        Wavenumber beyond which the barrier edges scatter a negligible amplitude.
+
+        The edges' spectrum at wavenumber q falls off as V0 exp(-pi q
+        transition_width), and the amplitude it scatters into q as that over
+        the kinetic energy q^2 / 2; the cutoff is where this reaches the
+        square root of spectral_tolerance.
+        """
+        V0 = abs(sim_params['V0'])
+        width = sim_params['transition_width']
+        if V0 == 0 or width <= 0:
+            return 0.0
+        # Fixed-point iteration of q = ln(2 V0 / (q^2 sqrt(tol))) / (pi w)
+        q = 1.0
+        for _ in range(self.EDGE_ITERATIONS):
+            q = max(1.0, np.log(2 * V0 / (q**2 * np.sqrt(self.spectral_tolerance))) / (np.pi * width))
+        return q
+
+    @classmethod
+    def step_seconds(cls, points, sim_params):
+        """Measured time of one propagator step at a grid size."""
+        precision = sim_params.get('precision', 'double')
+        key = (points, precision, sim_params.get('fft_backend'))
+        if key not in cls._step_seconds:
+            x = np.linspace(-1, 1, points)
+            propagator = SplitOperatorPropagator(
+                x, 1e-6, np.zeros(points), fft_backend=sim_params.get('fft_backend'), precision=precision
+            )
+            psi = propagator.advance(np.ones(points, dtype=complex), 1)
+            best = np.inf
+            for _ in range(cls.CALIBRATION_REPEATS):
+                start = time.perf_counter()
+                psi = propagator.advance(psi, cls.CALIBRATION_STEPS)
+                best = min(best, time.perf_counter() - start)
+            cls._step_seconds[key] = best / cls.CALIBRATION_STEPS
+        return cls._step_seconds[key]
+
+    def plan(self, sim_params):
+        """Plan the grid size and time step for a 1D run in the sim_params schema."""
+        start, end = sim_params['spatial_range']
+        k_packet = self.packet_cutoff(sim_params)
+
+        # Inside a well the packet speeds up
+        probe = np.linspace(start, end, sim_params['spatial_points'])
+        V = np.real(PotentialBarrier.create_total_potential(
+            probe, sim_params['barrier_center_init'], sim_params['V0'],
+            sim_params['barrier_width'], sim_params['transition_width']
+        ))
+        k_local = np.sqrt(k_packet**2 + 2 * max(0.0, -V.min()))
+        kinetic_energy = k_local**2 / 2
+        k_edges = self.edge_cutoff(sim_params)
+
+        k_max = max(k_local, k_edges)
+        limited_by = 'packet spectrum' if k_local >= k_edges else 'barrier edges'
+        # k_max = pi / dx on a linspace grid of spatial_points points
+        points = self.smooth_size(int(np.ceil((end - start) * k_max / np.pi)) + 1, self.power_of_two)
+
+        dt = self.phase_tolerance / max(kinetic_energy, np.abs(V).max())
+        num_time_steps = int(sim_params['total_time'] / dt) + 1
+
+        step_seconds = self.step_seconds(points, sim_params) if self.calibrate else np.nan
+        current_points = sim_params['spatial_points']
+        current_dt = sim_params.get('dt') or WaveFunctionEvolution.compute_time_step(probe)
+        current = (
+            current_points, current_dt, int(sim_params['total_time'] / current_dt) + 1,
+            self.step_seconds(current_points, sim_params) if self.calibrate else np.nan,
+        )
+        return GridPlan(points, dt, num_time_steps, limited_by, k_packet, k_edges, step_seconds, current)
@@ -1,5 +1,8 @@
 import numpy as np
 
+# Peak absorption rate of the edge layers
+DEFAULT_ABSORBER_STRENGTH = 50.0
+
 class PotentialBarrier:
     @staticmethod
     def smooth_step(x, edge, width):
@@ -19,6 +22,228 @@ class PotentialBarrier:
         return V
 
     @staticmethod
-    def create_total_potential(x, barrier_center=0.0, V0=20.0, barrier_width=1.0, transition_width=0.05):
-        """Create the total potential including the stationary barrier."""
-        return PotentialBarrier.create_potential_barrier(x, barrier_center, V0, barrier_width, transition_width)
+    def rectangular_transmission(E, V0, barrier_width):
+        """
+        Analytic transmission probability of a rectangular barrier at energies E (hbar = m = 1).
+
+        The limit of create_potential_barrier for a vanishing transition width.
+        """
+        E = np.asarray(E, dtype=float)
+        # k_inside is imaginary below the barrier top, where sin turns into sinh
+        k_inside = np.sqrt(2 * (E - V0) + 0j)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.abs(np.sin(k_inside * barrier_width))**2 / (4 * E * np.abs(E - V0))
+            T = 1 / (1 + V0**2 * ratio)
+        # At E = V0, sin(k a)^2 / |E - V0| tends to 2 a^2
+        return np.where(np.isclose(E, V0), 1 / (1 + V0 * barrier_width**2 / 2), T)[()]
+
+    @staticmethod
+    def create_absorbing_potential(x, width, strength=DEFAULT_ABSORBER_STRENGTH):
+        """
+        Create a complex absorbing potential -iW(x) in layers of the given width at both grid edges.
+
+        W rises quadratically from 0 at the inner edge of each layer to
+        strength at the grid edge, so outgoing packets are damped before they
+        wrap around the periodic grid, with little reflection from the layer.
+        """
+        W = np.zeros_like(x)
+        left = x < x[0] + width
+        W[left] = strength * ((x[0] + width - x[left]) / width)**2
+        right = x > x[-1] - width
+        W[right] = strength * ((x[right] - (x[-1] - width)) / width)**2
+        return -1j * W
+
+    @staticmethod
+    def create_total_potential(x, barrier_center=0.0, V0=20.0, barrier_width=1.0, transition_width=0.05,
+                               absorber_width=0.0, absorber_strength=DEFAULT_ABSORBER_STRENGTH):
+        """
+        Create the total potential including the stationary barrier.
+
+        With absorber_width > 0, absorbing layers are added at the grid edges
+        and the potential is complex.
+        """
+        V = PotentialBarrier.create_potential_barrier(x, barrier_center, V0, barrier_width, transition_width)
+        if absorber_width > 0:
+            V = V + PotentialBarrier.create_absorbing_potential(x, absorber_width, absorber_strength)
+        return V
+
+class BarrierSchedule:
+    """
+    How the barrier of PotentialBarrier.create_potential_barrier changes over time.
+
+    center(t) and height(t) give the barrier at time t (scalars or arrays of
+    times). The base class is a static barrier. period is the repeat time
+    of periodic schedules and settles_at the time after which the barrier
+    no longer changes; either may be None.
+    """
+    static = True
+    period = None
+    settles_at = None
+    # Smooth step tails further than this many transition widths from an edge
+    # are ignored; exp(-25) of the barrier height is far below rounding of exp_V
+    TAIL_WIDTHS = 25
+    # sim_params keys of the schedule's own arguments, and the argument names
+    PARAMS = {}
+
+    def __init__(self, barrier_center=0.0, V0=20.0, barrier_width=1.0, transition_width=0.05):
+        self.barrier_center = barrier_center
+        self.V0 = V0
+        self.barrier_width = barrier_width
+        self.transition_width = transition_width
+
+    @staticmethod
+    def from_params(sim_params):
+        """Create the schedule named by sim_params['barrier_schedule'] (default 'static')."""
+        name = sim_params.get('barrier_schedule', 'static')
+        if name not in SCHEDULES:
+            raise ValueError(f"Unknown barrier schedule '{name}'. Choose from {list(SCHEDULES)}")
+        cls = SCHEDULES[name]
+        return cls(
+            sim_params['barrier_center_init'], sim_params['V0'],
+            sim_params['barrier_width'], sim_params['transition_width'],
+            **{arg: sim_params[key] for key, arg in cls.PARAMS.items() if key in sim_params}
+        )
+
+    def center(self, t):
+        return self.barrier_center if np.ndim(t) == 0 else np.full(np.shape(t), float(self.barrier_center))
+
+    def height(self, t):
+        return self.V0 if np.ndim(t) == 0 else np.full(np.shape(t), float(self.V0))
+
+    def potential(self, x, t):
+        """The barrier at time t on the grid x."""
+        return PotentialBarrier.create_potential_barrier(
+            x, self.center(t), self.height(t), self.barrier_width, self.transition_width
+        )
+
+    def extent(self, t_end):
+        """Lowest and highest x covered by the barrier between t = 0 and t_end."""
+        centers = self.center(np.linspace(0, t_end, 1025))
+        return centers.min() - self.barrier_width / 2, centers.max() + self.barrier_width / 2
+
+    def region(self, x, t_end):
+        """Slice of the grid x where the potential can change between t = 0 and t_end."""
+        if self.static:
+            return slice(0, 0)
+        return self._slice(x, *self.extent(t_end))
+
+    def _slice(self, x, start, end):
+        margin = self.TAIL_WIDTHS * self.transition_width
+        return slice(np.searchsorted(x, start - margin), np.searchsorted(x, end + margin, side='right'))
+
+    def changed_slices(self, x, times):
+        """
+        Slices of the grid x where the potential can differ between any of the given times.
+
+        The whole range of centers over the times is used, so schedules that
+        move back and forth within it are covered. A change of height
+        affects the whole barrier; a pure move only the neighbourhoods of
+        its two edges.
+        """
+        centers = self.center(np.asarray(times, dtype=float))
+        heights = self.height(np.asarray(times, dtype=float))
+        low, high = float(centers.min()), float(centers.max())
+        half_width = self.barrier_width / 2
+        if heights.min() != heights.max():
+            return [self._slice(x, low - half_width, high + half_width)]
+        if low == high:
+            return []
+        return [self._slice(x, low - half_width, high - half_width),
+                self._slice(x, low + half_width, high + half_width)]
+
+class TranslatingBarrier(BarrierSchedule):
+    """Barrier moving at a constant velocity."""
+    static = False
+    PARAMS = {'barrier_velocity': 'velocity'}
+
+    def __init__(self, barrier_center=0.0, V0=20.0, barrier_width=1.0, transition_width=0.05, velocity=1.0):
+        super().__init__(barrier_center, V0, barrier_width, transition_width)
+        self.velocity = velocity
+
+    def center(self, t):
+        return self.barrier_center + self.velocity * np.asarray(t, dtype=float)
+
+class OscillatingBarrier(BarrierSchedule):
+    """Barrier oscillating about its initial center with the given amplitude and period."""
+    static = False
+    PARAMS = {'oscillation_amplitude': 'amplitude', 'oscillation_period': 'period'}
+
+    def __init__(self, barrier_center=0.0, V0=20.0, barrier_width=1.0, transition_width=0.05,
+                 amplitude=1.0, period=1.0):
+        super().__init__(barrier_center, V0, barrier_width, transition_width)
+        self.amplitude = amplitude
+        self.period = period
+
+    def center(self, t):
+        return self.barrier_center + self.amplitude * np.sin(2 * np.pi * np.asarray(t, dtype=float) / self.period)
+
+class RampedBarrier(BarrierSchedule):
+    """Barrier whose height rises linearly from V0_start to V0 over ramp_time, then stays."""
+    static = False
+    PARAMS = {'ramp_time': 'ramp_time', 'V0_start': 'V0_start'}
+
+    def __init__(self, barrier_center=0.0, V0=20.0, barrier_width=1.0, transition_width=0.05,
+                 ramp_time=1.0, V0_start=0.0):
+        super().__init__(barrier_center, V0, barrier_width, transition_width)
+        self.ramp_time = ramp_time
+        self.V0_start = V0_start
+        self.settles_at = ramp_time
+
+    def height(self, t):
+        fraction = np.clip(np.asarray(t, dtype=float) / self.ramp_time, 0, 1)
+        return self.V0_start + (self.V0 - self.V0_start) * fraction
+
+SCHEDULES = {
+    'static': BarrierSchedule,
+    'translating': TranslatingBarrier,
+    'oscillating': OscillatingBarrier,
+    'ramped': RampedBarrier,
+}
+
+class PotentialBarrier2D:
+    """2D potentials on a grid of rows y and columns x, stored as V[y, x]."""
+    SHAPES = ('barrier', 'slits', 'well')
+
+    @staticmethod
+    def create_barrier(x, y, barrier_center=0.0, V0=20.0, barrier_width=1.0, transition_width=0.05):
+        """Create a wall across the whole grid, perpendicular to x, with the 1D barrier profile."""
+        profile = PotentialBarrier.create_potential_barrier(x, barrier_center, V0, barrier_width, transition_width)
+        return np.broadcast_to(profile, (len(y), len(x))).copy()
+
+    @staticmethod
+    def create_slits(x, y, barrier_center=0.0, V0=20.0, barrier_width=1.0, transition_width=0.05,
+                     num_slits=2, slit_width=5.0, slit_separation=15.0):
+        """Create a wall perpendicular to x with num_slits openings, centred on y = 0."""
+        openings = np.zeros_like(y)
+        for center in (np.arange(num_slits) - (num_slits - 1) / 2) * slit_separation:
+            openings += PotentialBarrier.create_potential_barrier(y, center, 1.0, slit_width, transition_width)
+        wall = PotentialBarrier.create_potential_barrier(x, barrier_center, V0, barrier_width, transition_width)
+        return np.multiply.outer(1 - np.clip(openings, 0, 1), wall)
+
+    @staticmethod
+    def create_well(x, y, center=(0.0, 0.0), V0=-20.0, radius=1.0, transition_width=0.05):
+        """Create a circular well (V0 < 0) or bump (V0 > 0) with smooth edges."""
+        r = np.hypot.outer(y - center[1], x - center[0])
+        return V0 * (1 - PotentialBarrier.smooth_step(r, radius, transition_width))
+
+    @staticmethod
+    def create_total_potential(x, y, shape='barrier', barrier_center=0.0, V0=20.0, barrier_width=1.0,
+                               transition_width=0.05, **shape_params):
+        """
+        Create the total 2D potential.
+
+        shape is 'barrier', 'slits' (shape_params: num_slits, slit_width,
+        slit_separation) or 'well', a disc of diameter barrier_width centred
+        on (barrier_center, 0).
+        """
+        if shape == 'barrier':
+            return PotentialBarrier2D.create_barrier(x, y, barrier_center, V0, barrier_width, transition_width)
+        if shape == 'slits':
+            return PotentialBarrier2D.create_slits(
+                x, y, barrier_center, V0, barrier_width, transition_width, **shape_params
+            )
+        if shape == 'well':
+            return PotentialBarrier2D.create_well(
+                x, y, (barrier_center, 0.0), V0, barrier_width / 2, transition_width
+            )
+        raise ValueError(f"Unknown shape '{shape}'. Choose from {PotentialBarrier2D.SHAPES}")
@@ -0,0 +1,121 @@
+import numpy as np
+
+# Bit of each dot in a braille cell, indexed by [row, column] of the 4x2 dot grid
+BRAILLE_DOTS = np.array([[0x01, 0x08], [0x02, 0x10], [0x04, 0x20], [0x40, 0x80]], dtype=np.uint16)
+BRAILLE_BASE = 0x2800
+
+class TerminalPreview:
+    """
+    Low-cost live plot of a 1D run for a text terminal.
+
+    capture() decimates the wave function on the solver's thread to a fixed
+    number of bins, keeping the minimum and maximum of |psi|^2 and Re psi in
+    each, so narrow peaks and fast oscillations survive. render() re-bins
+    that to the terminal's width (min/max binning composes) and draws the
+    two curves as braille dots, one panel each, with the barrier's columns
+    highlighted. Both are vectorized, so a preview costs far less than a
+    solver step on a typical grid.
+    """
+    CAPTURE_BINS = 512
+    STYLE_DENSITY = 'class:preview-density'
+    STYLE_REAL = 'class:preview-real'
+    STYLE_BARRIER = ' class:preview-barrier'
+    STYLE_LABEL = 'class:preview-label'
+
+    @staticmethod
+    def decimate(values, bins):
+        """Minimum and maximum of values over bins equal runs; runs repeat values when bins > len(values)."""
+        starts = np.arange(bins) * len(values) // bins
+        return np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts)
+
+    @staticmethod
+    def capture(psi, x, t, barrier_start, barrier_end, bins=None):
+        """Decimated snapshot of a wave function, small enough to hand to the UI thread."""
+        bins = min(bins or TerminalPreview.CAPTURE_BINS, len(x))
+        density = np.abs(psi)**2
+        real = np.real(psi)
+        density_min, density_max = TerminalPreview.decimate(density, bins)
+        real_min, real_max = TerminalPreview.decimate(real, bins)
+        return {
+            't': t, 'x_range': (float(x[0]), float(x[-1])),
+            'barrier': (barrier_start, barrier_end),
+            'density': (density_min, density_max),
+            'real': (real_min, real_max),
+        }
+
+    @staticmethod
+    def braille(lower, upper, rows):
+        """
+        Draw one value range per dot column as braille text.
+
+        lower and upper are dot rows counted from the top, one pair per dot
+        column (two per character). Each column is widened to meet its left
+        neighbour so that steep curves stay connected. Returns rows strings.
+        """
+        lower = np.asarray(lower, dtype=int)
+        upper = np.asarray(upper, dtype=int)
+        top = np.minimum(upper, lower)
+        bottom = np.maximum(upper, lower)
+        top[1:] = np.minimum(top[1:], bottom[:-1])
+        bottom[1:] = np.maximum(bottom[1:], top[:-1])
+
+        dot_rows = np.arange(rows * 4)[:, None]
+        dots = (dot_rows >= top) & (dot_rows <= bottom)
+        cells = dots.reshape(rows, 4, -1, 2) * BRAILLE_DOTS[None, :, None, :]
+        codes = cells.sum(axis=(1, 3)) + BRAILLE_BASE
+        return ["".join(map(chr, row)) for row in codes]
+
+    @staticmethod
+    def _dot_rows(values, low, high, rows):
+        """Map values in [low, high] to dot rows counted from the top."""
+        span = high - low if high > low else 1.0
+        scaled = (high - np.clip(values, low, high)) / span
+        return np.rint(scaled * (rows * 4 - 1)).astype(int)
+
+    @staticmethod
+    def render(preview, width, rows=5):
+        """
+        Formatted-text fragments of a captured preview, width characters wide.
+
+        The |psi|^2 and Re psi panels are rows lines high each, under a
+        label line; the cells over the barrier carry the barrier style.
+        """
+        width = max(width, 1)
+        columns = 2 * width
+        density_min, density_max = preview['density']
+        real_min, real_max = preview['real']
+        density_min = TerminalPreview.decimate(density_min, columns)[0]
+        density_max = TerminalPreview.decimate(density_max, columns)[1]
+        real_min = TerminalPreview.decimate(real_min, columns)[0]
+        real_max = TerminalPreview.decimate(real_max, columns)[1]
+
+        peak = float(density_max.max())
+        amplitude = float(max(abs(real_min.min()), abs(real_max.max())))
+        density = TerminalPreview.braille(
+            TerminalPreview._dot_rows(density_min, 0.0, peak, rows),
+            TerminalPreview._dot_rows(density_max, 0.0, peak, rows), rows
+        )
+        real = TerminalPreview.braille(
+            TerminalPreview._dot_rows(real_min, -amplitude, amplitude, rows),
+            TerminalPreview._dot_rows(real_max, -amplitude, amplitude, rows), rows
+        )
+
+        # Character cells that overlap the barrier, at least one
+        x_start, x_end = preview['x_range']
+        barrier_start, barrier_end = preview['barrier']
+        scale = width / (x_end - x_start)
+        first = int(np.clip(np.floor((barrier_start - x_start) * scale), 0, width - 1))
+        last = int(np.clip(np.ceil((barrier_end - x_start) * scale), first + 1, width))
+
+        label = f" t = {preview['t']:.3f}   |psi|^2 peak {peak:.3g}   Re psi max {amplitude:.3g}\n"
+        fragments = [(TerminalPreview.STYLE_LABEL, label)]
+        for lines, style in ((density, TerminalPreview.STYLE_DENSITY), (real, TerminalPreview.STYLE_REAL)):
+            for line in lines:
+                fragments += [
+                    (style, line[:first]),
+                    (style + TerminalPreview.STYLE_BARRIER, line[first:last]),
+                    (style, line[last:] + "\n"),
+                ]
+        style, text = fragments[-1]
+        fragments[-1] = (style, text[:-1])
+        return fragments
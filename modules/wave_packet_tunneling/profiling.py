@@ -0,0 +1,195 @@
+import contextlib
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None if unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class Profiler:
+    """
+    Per-stage timers for the animation pipeline.
+
+    Code under measurement wraps each stage in `with profiler.stage(name)`.
+    For every stage the profiler keeps the call count, total and maximum
+    wall time, and how much the process's peak RSS grew while the stage ran.
+    Stages may run concurrently on several threads (render workers), so
+    their totals can add up to more than the wall time of the run.
+
+    Optional outputs, written by stop():
+    json_path      -- per-stage summary as JSON
+    trace_path     -- every stage call in Chrome trace format (chrome://tracing, Perfetto)
+    cprofile_path  -- cProfile statistics of the thread that called start()
+    use_tracemalloc -- add the top allocation sites to the report
+    """
+    TRACEMALLOC_TOP = 10
+
+    def __init__(self, json_path=None, trace_path=None, cprofile_path=None, use_tracemalloc=False):
+        self.json_path = json_path
+        self.trace_path = trace_path
+        self.cprofile_path = cprofile_path
+        self.use_tracemalloc = use_tracemalloc
+        self.stages = {}
+        self.events = []
+        self.wall_time = None
+        self.tracemalloc_report = None
+        self._lock = threading.Lock()
+        self._start = None
+        self._cprofile = None
+
+    @classmethod
+    def from_env(cls):
+        """
+        Create a profiler configured by the environment.
+
+        VIZPHYS_PROFILE_JSON, VIZPHYS_PROFILE_TRACE and VIZPHYS_PROFILE_CPROFILE
+        name the output files; VIZPHYS_PROFILE_TRACEMALLOC=1 enables tracemalloc.
+        """
+        return cls(
+            json_path=os.environ.get('VIZPHYS_PROFILE_JSON'),
+            trace_path=os.environ.get('VIZPHYS_PROFILE_TRACE'),
+            cprofile_path=os.environ.get('VIZPHYS_PROFILE_CPROFILE'),
+            use_tracemalloc=os.environ.get('VIZPHYS_PROFILE_TRACEMALLOC', '') not in ('', '0'),
+        )
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        rss_before = peak_rss_bytes()
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            rss_after = peak_rss_bytes()
+            self._record(name, start, end, rss_before, rss_after)
+
+    def _record(self, name, start, end, rss_before, rss_after):
+        duration = end - start
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = {'count': 0, 'total_ns': 0, 'max_ns': 0, 'rss_growth': 0}
+            stats['count'] += 1
+            stats['total_ns'] += duration
+            stats['max_ns'] = max(stats['max_ns'], duration)
+            if rss_before is not None:
+                stats['rss_growth'] += rss_after - rss_before
+            if self.trace_path:
+                self.events.append((name, start, duration, threading.get_ident()))
+
+    def start(self):
+        """Start timing the run, and cProfile/tracemalloc if requested."""
+        self._start = time.perf_counter_ns()
+        if self.use_tracemalloc:
+            tracemalloc.start()
+        if self.cprofile_path:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop(self):
+        """Stop timing and write the requested outputs."""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_path)
+            self._cprofile = None
+        if self.use_tracemalloc and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            lines = [f"tracemalloc peak: {peak / 1024**2:.1f} MiB"]
+            for stat in snapshot.statistics('lineno')[:self.TRACEMALLOC_TOP]:
+                lines.append(f"  {stat.size / 1024**2:8.2f} MiB  {stat.traceback}")
+            self.tracemalloc_report = "\n".join(lines)
+        if self._start is not None:
+            self.wall_time = (time.perf_counter_ns() - self._start) / 1e9
+        if self.json_path:
+            with open(self.json_path, 'w') as f:
+                json.dump(self.summary(), f, indent=2)
+        if self.trace_path:
+            self.write_chrome_trace(self.trace_path)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def summary(self):
+        """Per-stage statistics in seconds and bytes."""
+        with self._lock:
+            stages = {
+                name: {
+                    'count': stats['count'],
+                    'total_s': stats['total_ns'] / 1e9,
+                    'mean_ms': stats['total_ns'] / stats['count'] / 1e6,
+                    'max_ms': stats['max_ns'] / 1e6,
+                    'peak_rss_growth_bytes': stats['rss_growth'],
+                }
+                for name, stats in self.stages.items()
+            }
+        return {'wall_time_s': self.wall_time, 'peak_rss_bytes': peak_rss_bytes(), 'stages': stages}
+
+    def postfix(self, top=4):
+        """Short live breakdown of the most expensive stages, for a progress bar."""
+        with self._lock:
+            totals = sorted(((stats['total_ns'], name) for name, stats in self.stages.items()), reverse=True)
+        return " ".join(f"{name}={total / 1e9:.1f}s" for total, name in totals[:top])
+
+    def report(self):
+        """Human-readable per-stage table."""
+        summary = self.summary()
+        lines = [f"{'stage':<18} {'calls':>7} {'total s':>9} {'mean ms':>9} {'max ms':>9} {'RSS +MiB':>9}"]
+        for name, stats in sorted(summary['stages'].items(), key=lambda item: -item[1]['total_s']):
+            lines.append(
+                f"{name:<18} {stats['count']:>7} {stats['total_s']:>9.3f} {stats['mean_ms']:>9.3f} "
+                f"{stats['max_ms']:>9.3f} {stats['peak_rss_growth_bytes'] / 1024**2:>9.1f}"
+            )
+        footer = []
+        if summary['wall_time_s'] is not None:
+            footer.append(f"wall time {summary['wall_time_s']:.3f} s")
+        if summary['peak_rss_bytes'] is not None:
+            footer.append(f"peak RSS {summary['peak_rss_bytes'] / 1024**2:.1f} MiB")
+        if footer:
+            lines.append(", ".join(footer))
+        if self.tracemalloc_report:
+            lines.append(self.tracemalloc_report)
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path):
+        """Write every recorded stage call as a Chrome trace 'complete' event."""
+        origin = self._start if self._start is not None else min((e[1] for e in self.events), default=0)
+        with self._lock:
+            events = [
+                {
+                    'name': name, 'cat': 'vizphys', 'ph': 'X',
+                    'ts': (start - origin) / 1000, 'dur': duration / 1000,
+                    'pid': os.getpid(), 'tid': tid,
+                }
+                for name, start, duration, tid in self.events
+            ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+class NullProfiler:
+    """Profiler stand-in that records nothing, used when profiling is off."""
+    _stage = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._stage
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,68 @@
+# modules/wave_packet_tunneling/render.py
+#
+# Render-only entry point: produce an animation from a stored trajectory
+# without re-running the solver.
+#   python -m modules.wave_packet_tunneling.render TRAJECTORY OUTPUT.gif --width 640 --height 320
+
+import argparse
+from .trajectory import TrajectoryReader
+from .potential import BarrierSchedule
+from .visualization import Visualizer
+from .encoding import create_writer
+from .pipeline import FramePipeline
+
+def render_trajectory(trajectory_path, output_filename, vis_settings=None, duration=None, progress=None,
+                      profiler=None):
+    """
+    Render the frames of a stored trajectory into an animation.
+
+    vis_settings and duration (ms per frame) default to those of the
+    original run. Frames are read lazily from the memory-mapped trajectory,
+    so memory use does not depend on its length. progress, if given, is
+    called as progress(done, total) after each frame is queued; profiler, if
+    given, records the rendering and encoding stages. Returns the number of
+    frames.
+    """
+    trajectory = TrajectoryReader(trajectory_path)
+    params = trajectory.params
+    if vis_settings is None:
+        vis_settings = params['vis_settings']
+    if duration is None:
+        duration = int(params['total_time'] / params['num_frames'] * 1000)
+
+    schedule = BarrierSchedule.from_params(params)
+
+    visualizer = Visualizer(vis_settings, profiler=profiler)
+    writer = create_writer(output_filename, duration, profiler=profiler, palette=Visualizer.scene_palette())
+    with FramePipeline(visualizer.create_frame, writer) as pipeline:
+        for i in range(len(trajectory)):
+            # The pipeline copies each frame, so only a bounded number are in memory
+            pipeline.submit(
+                trajectory.psi[i], trajectory.x,
+                barrier_center=float(schedule.center(trajectory.times[i])),
+                barrier_width=params['barrier_width']
+            )
+            if progress is not None:
+                progress(i + 1, len(trajectory))
+    return pipeline.frame_count
+
+def main():
+    parser = argparse.ArgumentParser(description="Render an animation from a stored trajectory.")
+    parser.add_argument('trajectory', help="trajectory directory written by the solver")
+    parser.add_argument('output', help="output animation (.gif, .png/.apng, or a directory for PNG frames)")
+    parser.add_argument('--width', type=int, help="frame width in pixels")
+    parser.add_argument('--height', type=int, help="frame height in pixels")
+    parser.add_argument('--renderer', choices=Visualizer.RENDERERS, help="frame renderer")
+    parser.add_argument('--duration', type=int, help="milliseconds per frame")
+    args = parser.parse_args()
+
+    vis_settings = dict(TrajectoryReader(args.trajectory).params['vis_settings'])
+    for key in ('width', 'height', 'renderer'):
+        if getattr(args, key) is not None:
+            vis_settings[key] = getattr(args, key)
+
+    frame_count = render_trajectory(args.trajectory, args.output, vis_settings, args.duration)
+    print(f"Rendered {frame_count} frames to {args.output}")
+
+if __name__ == "__main__":
+    main()
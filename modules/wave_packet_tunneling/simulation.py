@@ -0,0 +1,490 @@
+import os
+import time
+import numpy as np
+from .wavefunction import WaveFunction, WaveFunction2D, DEFAULT_PACKET_ALPHA
+from .potential import PotentialBarrier, PotentialBarrier2D, BarrierSchedule, DEFAULT_ABSORBER_STRENGTH
+from .evolution import (
+    WaveFunctionEvolution, WaveFunctionEvolution2D, SplitOperatorPropagator,
+    SplitOperatorPropagator2D, TimeDependentPropagator, EigenPropagator, ChebyshevPropagator
+)
+from .fft_backend import get_fft_backend, FFT_BACKEND_ENV
+from .profiling import NULL_PROFILER
+
+class Observer:
+    """
+    An observable recorded while a simulation runs.
+
+    every is the cadence in time steps; None records the observable at every
+    frame. Observers describe themselves as weight rows contracted with |psi|^2
+    (position_weights) and |psi_k|^2 (momentum_weights), so all observers due
+    at a step are evaluated together in one matrix product per space.
+    combine() turns the resulting moments into the observable's value, and
+    offset() adds anything that is not a moment of psi, such as probability
+    already removed by absorbing boundaries.
+    """
+    name = None
+
+    def __init__(self, every=None, name=None):
+        self.every = every
+        if name is not None:
+            self.name = name
+
+    def position_weights(self, simulation):
+        return None
+
+    def momentum_weights(self, simulation):
+        return None
+
+    def combine(self, position_moments, momentum_moments):
+        raise NotImplementedError
+
+    def offset(self, simulation):
+        return 0.0
+
+class NormObserver(Observer):
+    """Total probability."""
+    name = 'probability'
+
+    def position_weights(self, simulation):
+        return np.full((1, simulation.N), simulation.dx)
+
+    def combine(self, position_moments, momentum_moments):
+        return position_moments[0]
+
+class TransmissionObserver(Observer):
+    """Probability past the far edge of the barrier, including any absorbed at the right edge."""
+    name = 'transmission'
+
+    def position_weights(self, simulation):
+        return ((simulation.x > simulation.barrier_end) * simulation.dx)[None, :]
+
+    def combine(self, position_moments, momentum_moments):
+        return position_moments[0]
+
+    def offset(self, simulation):
+        return simulation.absorbed[1]
+
+class ReflectionObserver(Observer):
+    """Probability before the near edge of the barrier, including any absorbed at the left edge."""
+    name = 'reflection'
+
+    def position_weights(self, simulation):
+        return ((simulation.x < simulation.barrier_start) * simulation.dx)[None, :]
+
+    def combine(self, position_moments, momentum_moments):
+        return position_moments[0]
+
+    def offset(self, simulation):
+        return simulation.absorbed[0]
+
+class AbsorbedObserver(Observer):
+    """Probability removed so far by the absorbing layer at one grid edge ('left' or 'right')."""
+    SIDES = ('left', 'right')
+
+    def __init__(self, side, every=None, name=None):
+        if side not in self.SIDES:
+            raise ValueError(f"Unknown side '{side}'. Choose from {self.SIDES}")
+        super().__init__(every, name or f"absorbed_{side}")
+        self.side = self.SIDES.index(side)
+
+    def combine(self, position_moments, momentum_moments):
+        return 0.0
+
+    def offset(self, simulation):
+        return simulation.absorbed[self.side]
+
+class PositionObserver(Observer):
+    """Expectation value <x>."""
+    name = 'position'
+
+    def position_weights(self, simulation):
+        return np.stack([simulation.x, np.ones(simulation.N)])
+
+    def combine(self, position_moments, momentum_moments):
+        return position_moments[0] / position_moments[1]
+
+class MomentumObserver(Observer):
+    """Expectation value <p>."""
+    name = 'momentum'
+
+    def momentum_weights(self, simulation):
+        return np.stack([simulation.k, np.ones(simulation.N)])
+
+    def combine(self, position_moments, momentum_moments):
+        return momentum_moments[0] / momentum_moments[1]
+
+class EnergyObserver(Observer):
+    """Expectation value <H> = <T> + <V>."""
+    name = 'energy'
+
+    def position_weights(self, simulation):
+        return np.stack([np.real(simulation.V_total), np.ones(simulation.N)])
+
+    def momentum_weights(self, simulation):
+        return np.stack([simulation.T, np.ones(simulation.N)])
+
+    def combine(self, position_moments, momentum_moments):
+        return (position_moments[0] / position_moments[1] +
+                momentum_moments[0] / momentum_moments[1])
+
+class Simulation:
+    """
+    Single time-stepping engine behind every animation entry point.
+
+    Built from a dict in the sim_params schema; params.PARAM_SPECS and
+    params.OPTION_DOCS describe its keys.
+    """
+    ENGINES = ('split_operator', 'eigen', 'chebyshev')
+    # Solver seconds between progress reports when on_progress is given
+    PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, sim_params, observers=None, on_norm_drift='warn', profiler=None):
+        self.sim_params = sim_params
+        self.on_norm_drift = on_norm_drift
+        self.profiler = profiler or NULL_PROFILER
+        self.engine = sim_params.get('engine', 'split_operator')
+        self.precision = sim_params.get('precision', 'double')
+        self.fft_backend = sim_params.get('fft_backend')
+        if self.engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine '{self.engine}'. Choose from {self.ENGINES}")
+        if self.precision != 'double' and self.engine != 'split_operator':
+            raise ValueError(f"The {self.engine} engine only supports double precision.")
+        self.absorber_width = sim_params.get('absorber_width', 0.0)
+        if self.absorber_width > 0 and self.engine != 'split_operator':
+            # Both need a Hermitian Hamiltonian
+            raise ValueError(f"The {self.engine} engine does not support absorbing boundaries.")
+        self.schedule = BarrierSchedule.from_params(sim_params)
+        if not self.schedule.static and self.engine != 'split_operator':
+            # Both rely on a time-independent Hamiltonian
+            raise ValueError(f"The {self.engine} engine does not support time-dependent barriers.")
+
+        # Initialize spatial grid
+        self.x = np.linspace(sim_params['spatial_range'][0],
+                             sim_params['spatial_range'][1],
+                             sim_params['spatial_points'])
+        self.dx = self.x[1] - self.x[0]
+        self.N = len(self.x)
+        self.k = np.fft.fftfreq(self.N, d=self.dx) * 2 * np.pi
+        self.T = (self.k**2) / 2
+
+        # Initialize components
+        self.psi = WaveFunction.initialize_wavefunction(
+            self.x, sim_params['n'], sim_params['x0'],
+            alpha=sim_params.get('packet_alpha', DEFAULT_PACKET_ALPHA)
+        )
+        self.V_total = PotentialBarrier.create_total_potential(
+            self.x, sim_params['barrier_center_init'],
+            sim_params['V0'], sim_params['barrier_width'],
+            sim_params['transition_width'],
+            self.absorber_width,
+            sim_params.get('absorber_strength', DEFAULT_ABSORBER_STRENGTH)
+        )
+
+        # Time step and frame schedule; frame i is taken after frame_steps[i] steps
+        self.dt = sim_params.get('dt') or WaveFunctionEvolution.compute_time_step(self.x)
+        self.num_time_steps = int(sim_params['total_time'] / self.dt) + 1
+        frame_indices = np.linspace(0, self.num_time_steps - 1, sim_params['num_frames']).astype(int)
+        self.frame_steps = np.unique(frame_indices) + 1
+        self.barrier_start, self.barrier_end = self.schedule.extent(self.num_time_steps * self.dt)
+        if not self.schedule.static:
+            # The part of the potential that does not change: everything but the barrier
+            self.V_base = PotentialBarrier.create_total_potential(
+                self.x, sim_params['barrier_center_init'], 0.0,
+                sim_params['barrier_width'], sim_params['transition_width'],
+                self.absorber_width,
+                sim_params.get('absorber_strength', DEFAULT_ABSORBER_STRENGTH)
+            )
+            self.V_total = self.V_base + self.schedule.potential(self.x, 0.0)
+
+        if observers is None:
+            observers = [NormObserver(), TransmissionObserver(), ReflectionObserver()]
+            if self.absorber_width > 0:
+                observers += [AbsorbedObserver('left'), AbsorbedObserver('right')]
+        names = [observer.name for observer in observers]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Observer names must be unique. Received {names}")
+        self.observers = observers
+
+        self.propagator = None
+        self.results = {}
+        self._weights_cache = {}
+        self._max_norm_error = 0.0
+        self._max_energy_error = 0.0
+
+    @property
+    def absorbed(self):
+        """Probability absorbed so far at the left and right grid edges."""
+        if isinstance(self.propagator, SplitOperatorPropagator):
+            return self.propagator.absorbed
+        return np.zeros(2)
+
+    def barrier_center(self, t):
+        """Center of the barrier at time t."""
+        return float(self.schedule.center(t))
+
+    def _create_propagator(self):
+        if not self.schedule.static:
+            return TimeDependentPropagator(
+                self.x, self.dt, self.V_base, self.schedule, self.num_time_steps * self.dt,
+                fft_backend=self.fft_backend, precision=self.precision,
+                on_norm_drift=self.on_norm_drift
+            )
+        if self.engine == 'eigen':
+            propagator = EigenPropagator(self.x, self.V_total)
+            self._coefficients = propagator.project(self.psi)
+            return propagator
+        if self.engine == 'chebyshev':
+            return ChebyshevPropagator(self.x, self.V_total, fft_backend=self.fft_backend)
+        return SplitOperatorPropagator(
+            self.x, self.dt, self.V_total,
+            fft_backend=self.fft_backend, precision=self.precision,
+            on_norm_drift=self.on_norm_drift
+        )
+
+    def _advance(self, psi, from_step, to_step):
+        """Evolve psi from one step count to a later one."""
+        if self.engine == 'eigen':
+            return self.propagator.state_at(self._coefficients, to_step * self.dt)
+        if self.engine == 'chebyshev':
+            if to_step == from_step:
+                return psi
+            psi, info = self.propagator.advance(psi, (to_step - from_step) * self.dt)
+            self._max_norm_error = max(self._max_norm_error, info['norm_error'])
+            self._max_energy_error = max(self._max_energy_error, info['energy_error'])
+            return psi
+        return self.propagator.advance(psi, to_step - from_step)
+
+    def _weights(self, due):
+        """Stack the weight rows of a set of observers, cached per set."""
+        key = tuple(id(observer) for observer in due)
+        if key not in self._weights_cache:
+            position_rows, momentum_rows, slices = [], [], []
+            for observer in due:
+                position = observer.position_weights(self)
+                momentum = observer.momentum_weights(self)
+                position = np.empty((0, self.N)) if position is None else position
+                # Parseval: sum |psi|^2 dx = sum |psi_k|^2 dx / N
+                momentum = np.empty((0, self.N)) if momentum is None else momentum * self.dx / self.N
+                slices.append((
+                    slice(len(position_rows), len(position_rows) + len(position)),
+                    slice(len(momentum_rows), len(momentum_rows) + len(momentum)),
+                ))
+                position_rows.extend(position)
+                momentum_rows.extend(momentum)
+            self._weights_cache[key] = (
+                np.array(position_rows).reshape(-1, self.N),
+                np.array(momentum_rows).reshape(-1, self.N),
+                slices,
+            )
+        return self._weights_cache[key]
+
+    def _observe(self, psi, due):
+        """Evaluate all due observers with one pass over |psi|^2 (and |psi_k|^2 if needed)."""
+        position_weights, momentum_weights, slices = self._weights(due)
+        position_moments = position_weights @ (psi.real**2 + psi.imag**2)
+        momentum_moments = np.empty(0)
+        if len(momentum_weights):
+            psi_k = get_fft_backend(self.fft_backend).fft(psi, out=np.empty_like(psi))
+            momentum_moments = momentum_weights @ (psi_k.real**2 + psi_k.imag**2)
+        return {
+            observer.name: float(observer.combine(position_moments[p], momentum_moments[m]) + observer.offset(self))
+            for observer, (p, m) in zip(due, slices)
+        }
+
+    def run(self, on_frame=None, on_progress=None):
+        """
+        Run the simulation over total_time.
+
+        on_frame(psi, t, observables) is called at every frame, with the values
+        of the frame-cadence observers. on_progress(step, num_time_steps) is
+        called whenever the solver has advanced; the split-operator engine
+        then steps in chunks of about PROGRESS_INTERVAL seconds between
+        frames, so that on_progress can also stop the run by raising.
+        Returns a dict mapping each observer name to a (times, values) pair
+        of arrays.
+        """
+        self.propagator = self._create_propagator()
+        frame_observers = [observer for observer in self.observers if observer.every is None]
+        step_observers = [observer for observer in self.observers if observer.every]
+        next_due = [observer.every for observer in step_observers]
+        records = {observer.name: ([], []) for observer in self.observers}
+
+        # The eigen and Chebyshev engines jump to each event in one call
+        chunked = on_progress is not None and self.engine == 'split_operator'
+        chunk_steps = 1
+
+        psi = self.psi.copy()
+        step = 0
+        frame = 0
+        while step < self.num_time_steps:
+            # Advance to the next frame or observer event, whichever comes first
+            next_frame = self.frame_steps[frame] if frame < len(self.frame_steps) else self.num_time_steps
+            target = min([next_frame, self.num_time_steps] + next_due)
+            if chunked:
+                target = min(target, step + chunk_steps)
+            start = time.perf_counter()
+            with self.profiler.stage('evolution'):
+                psi = self._advance(psi, step, target)
+            elapsed = time.perf_counter() - start
+            if chunked:
+                # Size the next chunk from the measured step rate
+                chunk_steps = max(1, int((target - step) * self.PROGRESS_INTERVAL / max(elapsed, 1e-9)))
+            step = target
+
+            due = []
+            for i, observer in enumerate(step_observers):
+                if next_due[i] == step:
+                    due.append(observer)
+                    next_due[i] += observer.every
+            is_frame = step == next_frame and frame < len(self.frame_steps)
+            if is_frame:
+                due.extend(frame_observers)
+
+            t = step * self.dt
+            values = {}
+            if due:
+                if not self.schedule.static:
+                    # Observers that weight by V see the current potential
+                    self.V_total = self.V_base + self.schedule.potential(self.x, t)
+                    self._weights_cache.clear()
+                with self.profiler.stage('observables'):
+                    values = self._observe(psi, due)
+            for name, value in values.items():
+                records[name][0].append(t)
+                records[name][1].append(value)
+
+            if is_frame:
+                if on_frame is not None:
+                    on_frame(psi, t, {observer.name: values[observer.name] for observer in frame_observers})
+                frame += 1
+            if on_progress is not None:
+                on_progress(step, self.num_time_steps)
+
+        self.psi = psi
+        self.results = {name: (np.array(times), np.array(values)) for name, (times, values) in records.items()}
+        return self.results
+
+    def summary(self):
+        """One line describing the accuracy of the finished run."""
+        if self.engine == 'chebyshev':
+            return (f"Chebyshev: {self.propagator.hamiltonian_applications} Hamiltonian applications, "
+                    f"max norm error per jump {self._max_norm_error:.2e}, "
+                    f"max energy error per jump {self._max_energy_error:.2e}")
+        if self.engine == 'eigen':
+            return f"Eigen: {len(self.propagator.energies)} eigenpairs"
+        line = f"Norm drift: {self.propagator.norm_drift:.2e} ({self.precision} precision)"
+        if self.absorber_width > 0:
+            left, right = self.absorbed
+            line += f", absorbed {left:.4f} left / {right:.4f} right"
+        return line
+
+class Simulation2D:
+    """
+    Split-operator engine for 2D runs, with the same frame schedule and run() interface as Simulation.
+
+    sim_params uses the 1D schema for x ('spatial_points', 'spatial_range',
+    'x0', 'n', barrier parameters) plus optional 'spatial_points_y' and
+    'spatial_range_y' (default: as for x), 'y0' (default 0) and 'shape' with
+    its parameters (see PotentialBarrier2D.create_total_potential). Without
+    an explicit 'fft_backend' or VIZPHYS_FFT_BACKEND the fastest installed
+    backend is used, so transforms are multithreaded where possible.
+
+    The probability, transmission and reflection are recorded at every
+    frame, from one pass over |psi|^2 reduced to its x marginal.
+    """
+    SHAPE_PARAMS = ('num_slits', 'slit_width', 'slit_separation')
+
+    def __init__(self, sim_params, on_norm_drift='warn', profiler=None):
+        self.sim_params = sim_params
+        self.on_norm_drift = on_norm_drift
+        self.profiler = profiler or NULL_PROFILER
+        self.precision = sim_params.get('precision', 'double')
+        self.fft_backend = sim_params.get('fft_backend') or os.environ.get(FFT_BACKEND_ENV, 'auto')
+
+        # Initialize spatial grid; arrays are indexed [y, x]
+        self.x = np.linspace(sim_params['spatial_range'][0],
+                             sim_params['spatial_range'][1],
+                             sim_params['spatial_points'])
+        range_y = sim_params.get('spatial_range_y', sim_params['spatial_range'])
+        self.y = np.linspace(range_y[0], range_y[1], sim_params.get('spatial_points_y', sim_params['spatial_points']))
+        self.dx = self.x[1] - self.x[0]
+        self.dy = self.y[1] - self.y[0]
+
+        # Initialize components
+        self.psi = WaveFunction2D.initialize_wavefunction(
+            self.x, self.y, sim_params['n'], sim_params['x0'], sim_params.get('y0', 0.0)
+        )
+        self.V_total = PotentialBarrier2D.create_total_potential(
+            self.x, self.y, sim_params.get('shape', 'barrier'),
+            sim_params['barrier_center_init'], sim_params['V0'],
+            sim_params['barrier_width'], sim_params['transition_width'],
+            **{name: sim_params[name] for name in self.SHAPE_PARAMS if name in sim_params}
+        )
+        self.barrier_start = sim_params['barrier_center_init'] - sim_params['barrier_width'] / 2
+        self.barrier_end = sim_params['barrier_center_init'] + sim_params['barrier_width'] / 2
+
+        # Time step and frame schedule; frame i is taken after frame_steps[i] steps
+        self.dt = WaveFunctionEvolution2D.compute_time_step(self.x, self.y)
+        self.num_time_steps = int(sim_params['total_time'] / self.dt) + 1
+        frame_indices = np.linspace(0, self.num_time_steps - 1, sim_params['num_frames']).astype(int)
+        self.frame_steps = np.unique(frame_indices) + 1
+
+        # Rows: probability, transmission, reflection
+        self._weights = np.stack([
+            np.ones_like(self.x),
+            self.x > self.barrier_end,
+            self.x < self.barrier_start,
+        ]) * self.dx * self.dy
+
+        self.propagator = None
+        self.results = {}
+
+    def _observe(self, density):
+        """Evaluate the observables from |psi|^2."""
+        probability, transmission, reflection = self._weights @ density.sum(axis=0, dtype=np.float64)
+        return {'probability': probability, 'transmission': transmission, 'reflection': reflection}
+
+    def run(self, on_frame=None, on_progress=None):
+        """
+        Run the simulation over total_time.
+
+        on_frame(psi, t, observables) is called at every frame, where
+        observables holds the values from _observe(); psi is only valid
+        during the call. on_progress(step, num_time_steps) is called after
+        every frame. Returns a dict mapping each observable to a (times,
+        values) pair of arrays.
+        """
+        self.propagator = SplitOperatorPropagator2D(
+            self.x, self.y, self.dt, self.V_total,
+            fft_backend=self.fft_backend, precision=self.precision,
+            on_norm_drift=self.on_norm_drift
+        )
+        records = {}
+        psi = self.psi.copy()
+        step = 0
+        for frame_step in self.frame_steps:
+            with self.profiler.stage('evolution'):
+                psi = self.propagator.advance(psi, frame_step - step)
+            step = frame_step
+
+            t = step * self.dt
+            with self.profiler.stage('observables'):
+                values = self._observe(psi.real**2 + psi.imag**2)
+            for name, value in values.items():
+                times, series = records.setdefault(name, ([], []))
+                times.append(t)
+                series.append(float(value))
+
+            if on_frame is not None:
+                on_frame(psi, t, values)
+            if on_progress is not None:
+                on_progress(step, self.num_time_steps)
+
+        self.psi = psi
+        self.results = {name: (np.array(times), np.array(values)) for name, (times, values) in records.items()}
+        return self.results
+
+    def summary(self):
+        """One line describing the accuracy of the finished run."""
+        return (f"Norm drift: {self.propagator.norm_drift:.2e} ({self.precision} precision, "
+                f"{self.propagator.fft_backend.name} FFT)")
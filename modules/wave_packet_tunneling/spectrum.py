@@ -0,0 +1,215 @@
+# modules/wave_packet_tunneling/spectrum.py
+#
+# Energy-resolved transmission T(E) from a single broadband wave packet run.
+#   python -m modules.wave_packet_tunneling.spectrum --V0 10 --barrier-width 1 --n 1
+
+import argparse
+import numpy as np
+from .simulation import Simulation
+from .evolution import SplitOperatorPropagator
+from .potential import PotentialBarrier
+from .wavefunction import DEFAULT_PACKET_ALPHA
+from .profiling import NULL_PROFILER
+
+class TransmissionSpectrum:
+    """
+    Transmission probability T(E) over a packet's whole energy band, from one run.
+
+    The wave function and its spatial derivative are recorded at a detector
+    point beyond the barrier while the transmitted packet passes it. Their
+    Fourier transforms over time give the energy-resolved flux through the
+    detector,
+
+        P_T(E) = Re[conj(psi(E)) (-i d/dx psi(E))] / (2 pi),
+
+    which is the transmitted probability per unit energy. Dividing it by the
+    incident probability per unit energy of the initial packet,
+    |phi_0(k)|^2 / k with k = sqrt(2 E), gives T(E).
+
+    sim_params is in the Simulation schema; a large 'packet_alpha' (a narrow
+    packet) gives a broad band. Absorbing layers ('absorber_width', on by
+    default here) stop the reflected and transmitted parts from wrapping
+    around the periodic grid and reaching the detector again. The run lasts
+    until the slowest energy in the band has passed the detector, unless
+    total_time is given.
+    """
+    DEFAULT_ABSORBER_WIDTH = 15.0
+    # Energies whose incident density is below this fraction of the peak are
+    # left out, and so are momenta below this fraction of the peak momentum,
+    # which would take too long to reach the detector
+    BAND_THRESHOLD = 1e-2
+    MIN_MOMENTUM_FRACTION = 0.25
+    # Samples per period of the fastest oscillation in the band
+    SAMPLES_PER_PERIOD = 4
+
+    def __init__(self, sim_params, detector_x=None, energies=None, total_time=None, profiler=None):
+        sim_params = dict(sim_params, num_frames=1)
+        sim_params.setdefault('absorber_width', self.DEFAULT_ABSORBER_WIDTH)
+        sim_params.setdefault('total_time', 0.0)
+        if sim_params.get('engine', 'split_operator') != 'split_operator':
+            raise ValueError("The transmission spectrum needs the split_operator engine.")
+        if sim_params.get('barrier_schedule', 'static') != 'static':
+            raise ValueError("The transmission spectrum needs a static barrier.")
+        self.profiler = profiler or NULL_PROFILER
+        self.simulation = Simulation(sim_params, observers=[])
+        x = self.simulation.x
+        self.sim_params = sim_params
+        self.V0 = sim_params['V0']
+        self.barrier_width = sim_params['barrier_width']
+
+        # Default detector: a quarter of the way from the barrier to the absorbing layer
+        if detector_x is None:
+            right_edge = x[-1] - sim_params['absorber_width']
+            detector_x = self.simulation.barrier_end + (right_edge - self.simulation.barrier_end) / 4
+        self.detector_index = int(np.argmin(np.abs(x - detector_x)))
+        self.detector_x = x[self.detector_index]
+
+        # Spectral derivative at the detector as one row of the differentiation matrix
+        d = np.fft.ifft(1j * self.simulation.k)
+        self._derivative_row = d[(self.detector_index - np.arange(self.simulation.N)) % self.simulation.N]
+
+        # Incident probability per unit energy, from the initial packet's momenta
+        if energies is None:
+            energies = self._band()
+        self.energies = np.asarray(energies, dtype=float)
+        self.incident = self.incident_density(self.energies)
+
+        # Sampling interval and run length
+        dt = self.simulation.dt
+        self.sample_every = max(1, int(2 * np.pi / self.SAMPLES_PER_PERIOD / self.energies.max() / dt))
+        if total_time is None:
+            slowest = np.sqrt(2 * self.energies.min())
+            packet_width = 4 / np.sqrt(2 * sim_params.get('packet_alpha', DEFAULT_PACKET_ALPHA))
+            total_time = (self.detector_x - sim_params['x0'] + packet_width) / slowest
+        self.total_time = total_time
+        self.num_samples = int(total_time / (self.sample_every * dt)) + 1
+
+        self.times = None
+        self.flux = None
+        self.transmitted = None
+        self.transmission = None
+
+    def _momentum_amplitude(self, k):
+        """phi_0(k) of the initial packet, normalized so that the integral of |phi_0|^2 dk is 1."""
+        x = self.simulation.x
+        phases = np.exp(-1j * np.outer(k, x))
+        return phases @ self.simulation.psi * self.simulation.dx / np.sqrt(2 * np.pi)
+
+    def incident_density(self, energies):
+        """Incident probability per unit energy, |phi_0(k)|^2 / k for right-moving k = sqrt(2 E)."""
+        k = np.sqrt(2 * np.asarray(energies, dtype=float))
+        return np.abs(self._momentum_amplitude(k))**2 / k
+
+    def _band(self, points=400):
+        """Energies where the initial packet carries a non-negligible share of its probability."""
+        k = self.simulation.k[self.simulation.k > 0]
+        density = np.abs(self._momentum_amplitude(k))**2
+        peak = k[np.argmax(density)]
+        inside = k[(density > self.BAND_THRESHOLD * density.max()) & (k >= self.MIN_MOMENTUM_FRACTION * peak)]
+        return np.linspace(inside.min()**2 / 2, inside.max()**2 / 2, points)
+
+    def run(self, on_progress=None):
+        """
+        Run the packet past the detector and compute T(E).
+
+        on_progress(sample, num_samples) is called after each sample.
+        Returns a dict with the energies, T(E), the transmitted and incident
+        densities per unit energy, and the recorded flux through the detector.
+        """
+        simulation = self.simulation
+        propagator = SplitOperatorPropagator(
+            simulation.x, simulation.dt, simulation.V_total,
+            fft_backend=simulation.fft_backend, precision=simulation.precision
+        )
+        psi = simulation.psi.copy()
+        values = np.empty(self.num_samples, dtype=complex)
+        derivatives = np.empty(self.num_samples, dtype=complex)
+        for sample in range(self.num_samples):
+            if sample:
+                with self.profiler.stage('evolution'):
+                    psi = propagator.advance(psi, self.sample_every)
+            with self.profiler.stage('observables'):
+                values[sample] = psi[self.detector_index]
+                derivatives[sample] = self._derivative_row @ psi
+            if on_progress is not None:
+                on_progress(sample + 1, self.num_samples)
+        simulation.psi = psi
+
+        sample_dt = self.sample_every * simulation.dt
+        self.times = np.arange(self.num_samples) * sample_dt
+        self.flux = np.imag(np.conj(values) * derivatives)
+
+        # Fourier transforms over time at each energy
+        with self.profiler.stage('fourier_transform'):
+            phases = np.exp(1j * np.outer(self.energies, self.times)) * sample_dt
+            values_E = phases @ values
+            derivatives_E = phases @ derivatives
+        self.transmitted = np.real(np.conj(values_E) * -1j * derivatives_E) / (2 * np.pi)
+        self.transmission = self.transmitted / self.incident
+        return {
+            'energy': self.energies,
+            'transmission': self.transmission,
+            'transmitted': self.transmitted,
+            'incident': self.incident,
+            'times': self.times,
+            'flux': self.flux,
+        }
+
+    def analytic(self):
+        """T(E) of the rectangular barrier with the same height and width."""
+        return PotentialBarrier.rectangular_transmission(self.energies, self.V0, self.barrier_width)
+
+    def summary(self):
+        """Lines comparing the total transmitted probability with the flux and the analytic T(E)."""
+        through_detector = np.sum(self.flux) * (self.times[1] - self.times[0])
+        # Trapezoidal rule over the (possibly non-uniform) energies
+        from_spectrum = np.sum((self.transmitted[1:] + self.transmitted[:-1]) / 2 * np.diff(self.energies))
+        lines = [
+            f"Detector at x = {self.detector_x:.2f}, {self.num_samples} samples every "
+            f"{self.sample_every} steps, E in [{self.energies.min():.3g}, {self.energies.max():.3g}]",
+            f"Probability through detector: {through_detector:.5f} (flux), "
+            f"{from_spectrum:.5f} (integral of T(E) spectrum)",
+        ]
+        if self.sim_params['transition_width'] < self.barrier_width:
+            deviation = np.abs(self.transmission - self.analytic())
+            lines.append(f"Max |T(E) - T_rectangular(E)|: {deviation.max():.3e}")
+        return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute the transmission spectrum T(E) from one wave packet run.")
+    parser.add_argument('--V0', type=float, default=10.0)
+    parser.add_argument('--barrier-width', type=float, default=1.0)
+    parser.add_argument('--transition-width', type=float, default=0.01)
+    parser.add_argument('--n', type=int, default=1, help="carrier wavenumber index (a perfect square)")
+    parser.add_argument('--packet-alpha', type=float, default=3.0, help="packet width parameter; larger is broader in E")
+    parser.add_argument('--x0', type=float, default=-15.0)
+    parser.add_argument('--spatial-points', type=int, default=1024)
+    parser.add_argument('--spatial-range', type=float, nargs=2, default=(-40.0, 40.0))
+    parser.add_argument('--output', default='transmission_spectrum.png', help="plot of T(E) against the analytic curve")
+    args = parser.parse_args()
+
+    spectrum = TransmissionSpectrum({
+        'spatial_points': args.spatial_points, 'spatial_range': tuple(args.spatial_range),
+        'barrier_width': args.barrier_width, 'V0': args.V0, 'transition_width': args.transition_width,
+        'n': args.n, 'x0': args.x0, 'barrier_center_init': 0.0, 'packet_alpha': args.packet_alpha,
+    })
+    results = spectrum.run()
+    print(spectrum.summary())
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(10, 6))
+    plt.plot(results['energy'], results['transmission'], label='single run')
+    plt.plot(results['energy'], spectrum.analytic(), '--', label='rectangular barrier')
+    plt.xlabel('Energy')
+    plt.ylabel('Transmission probability')
+    plt.title(f"T(E), V0 = {args.V0}, width = {args.barrier_width}")
+    plt.legend()
+    plt.grid(True)
+    plt.savefig(args.output)
+    plt.close()
+    print(f"Plot saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
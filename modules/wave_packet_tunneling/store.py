@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+class ResultStore:
+    """
+    Content-addressed on-disk store of simulation results.
+
+    Each result is saved as an .npz file named after a hash of the simulation
+    parameters and the version of the code that computes it, so results from
+    older code are not served. Rendering-only parameters do not affect the key.
+    """
+    RENDER_PARAMS = ('output_filename', 'vis_settings')
+    # Sources besides ResultCache.SIMULATION_SOURCES whose changes invalidate stored results
+    PLANNER_SOURCES = ('planner.py',)
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def canonical_params(sim_params):
+        """Return the simulation parameters as canonical JSON text."""
+        params = {
+            key: value for key, value in sim_params.items()
+            if key not in ResultStore.RENDER_PARAMS
+        }
+        return json.dumps(params, sort_keys=True, default=ResultStore.json_default)
+
+    @staticmethod
+    def params_key(sim_params):
+        """Hash the simulation parameters into a store key."""
+        return hashlib.sha256(ResultStore.canonical_params(sim_params).encode()).hexdigest()
+
+    @staticmethod
+    def result_key(sim_params):
+        """Hash the simulation parameters and the simulation code version into a store key."""
+        # cache.py builds on this module
+        from .cache import ResultCache
+        sources = ResultCache.SIMULATION_SOURCES + ResultStore.PLANNER_SOURCES
+        return ResultStore.params_key(dict(sim_params, code_version=ResultCache.code_version(sources)))
+
+    @staticmethod
+    def json_default(value):
+        """Convert NumPy values in parameters to plain JSON types."""
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        raise TypeError(f"Cannot serialize parameter value of type {type(value).__name__}")
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.npz")
+
+    def contains(self, sim_params):
+        return os.path.exists(self.path(self.result_key(sim_params)))
+
+    def save(self, sim_params, results):
+        """Save a dict of arrays for the given parameters and return its key."""
+        key = self.result_key(sim_params)
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so an interrupted save never leaves
+        # a truncated result behind
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, params=np.array(self.canonical_params(sim_params)), **results)
+        os.replace(tmp_path, path)
+        return key
+
+    def load(self, sim_params):
+        """Load the stored results for the given parameters."""
+        return self.load_key(self.result_key(sim_params))
+
+    def load_key(self, key):
+        with np.load(self.path(key)) as data:
+            results = {name: data[name] for name in data.files}
+        results['params'] = json.loads(str(results['params']))
+        return results
@@ -0,0 +1,96 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .simulation import Simulation
+from .planner import GridPlanner
+from .store import ResultStore
+
+def expand_grid(base_params, **axes):
+    """
+    Expand a base sim_params dict over the cartesian product of parameter axes.
+
+    Example: expand_grid(params, V0=[50.0, 100.0], n=[1, 4]) gives four dicts.
+    """
+    names = list(axes)
+    return [
+        {**base_params, **dict(zip(names, values))}
+        for values in itertools.product(*(axes[name] for name in names))
+    ]
+
+def run_point(sim_params):
+    """
+    Run one simulation without rendering and return its observables.
+
+    Observables are recorded at the same steps where an animation would
+    capture its frames. With 'auto_grid' set, the point runs on the grid and
+    time step GridPlanner chooses, as in the menu; 'x' is the grid used.
+    """
+    if sim_params.get('auto_grid'):
+        sim_params = GridPlanner(calibrate=False).plan(sim_params).apply(sim_params)
+    simulation = Simulation(sim_params)
+    results = simulation.run()
+    times, probability = results['probability']
+
+    return {
+        'x': simulation.x,
+        'times': times,
+        'probability': probability,
+        'transmission': results['transmission'][1],
+        'reflection': results['reflection'][1],
+        'final_state': simulation.psi,
+    }
+
+class SweepRunner:
+    """
+    Run a grid of sim_params dicts over a process pool.
+
+    Finished points are written to a ResultStore as soon as they complete, so
+    re-running a sweep skips them and an interrupted sweep resumes where it
+    stopped.
+    """
+
+    def __init__(self, store_dir, max_workers=None):
+        self.store = ResultStore(store_dir)
+        self.max_workers = max_workers
+
+    def run(self, param_grid, progress=None):
+        """
+        Run every point of param_grid that is not already stored.
+
+        progress, if given, is called as progress(done, total) after each point.
+        Returns the store keys in the order of param_grid. Points that fail
+        are reported together after all other points have been stored.
+        """
+        keys = [ResultStore.result_key(params) for params in param_grid]
+
+        # Skip stored points and duplicates within the grid
+        pending = {}
+        for key, params in zip(keys, param_grid):
+            if key not in pending and not self.store.contains(params):
+                pending[key] = params
+
+        total = len(pending)
+        if total == 0:
+            return keys
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(run_point, params): params
+                for params in pending.values()
+            }
+            failures = []
+            for done, future in enumerate(as_completed(futures), start=1):
+                # Keep saving the other points if one of them fails
+                try:
+                    self.store.save(futures[future], future.result())
+                except Exception as e:
+                    failures.append((futures[future], e))
+                if progress is not None:
+                    progress(done, total)
+
+        if failures:
+            params, error = failures[0]
+            raise RuntimeError(
+                f"{len(failures)} of {total} sweep points failed; first failure "
+                f"for {ResultStore.canonical_params(params)}: {error}"
+            ) from error
+        return keys
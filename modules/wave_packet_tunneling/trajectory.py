@@ -0,0 +1,119 @@
+import json
+import os
+import numpy as np
+from .store import ResultStore
+
+class TrajectoryWriter:
+    """
+    Stream psi snapshots, frame times and observables into a trajectory directory.
+
+    The directory holds one memory-mapped .npy file per array (psi.npy,
+    times.npy and one per observable), the grid x.npy, and metadata.json
+    with the simulation parameters. Arrays are sized for num_frames up front
+    and filled as frames arrive, so the solver never holds the trajectory
+    in RAM.
+    """
+
+    def __init__(self, path, x, num_frames, params=None):
+        self.path = path
+        self.num_frames = num_frames
+        self.params = params or {}
+        self.frame_count = 0
+        self.psi = None
+        self.times = None
+        self.observables = {}
+
+        os.makedirs(self.path, exist_ok=True)
+        np.save(os.path.join(self.path, 'x.npy'), x)
+        self._write_metadata()
+
+    def _open(self, name, dtype, shape):
+        return np.lib.format.open_memmap(
+            os.path.join(self.path, f"{name}.npy"), mode='w+', dtype=dtype, shape=shape
+        )
+
+    def append(self, t, psi, **observables):
+        """Write one frame: its time, wave function and scalar observables."""
+        if self.frame_count >= self.num_frames:
+            raise IndexError(f"Trajectory is full ({self.num_frames} frames).")
+
+        # Files are created on the first frame, in the precision of psi
+        if self.psi is None:
+            self.psi = self._open('psi', psi.dtype, (self.num_frames, len(psi)))
+            self.times = self._open('times', np.float64, (self.num_frames,))
+        for name in observables:
+            if name not in self.observables:
+                self.observables[name] = self._open(name, np.float64, (self.num_frames,))
+
+        self.psi[self.frame_count] = psi
+        self.times[self.frame_count] = t
+        for name, value in observables.items():
+            self.observables[name][self.frame_count] = value
+        self.frame_count += 1
+
+        # Keep the frame count on disk current, so an interrupted run stays readable
+        self._write_metadata()
+
+    def _write_metadata(self):
+        metadata = {
+            'params': self.params,
+            'num_frames': self.num_frames,
+            'frame_count': self.frame_count,
+            'observables': sorted(self.observables),
+        }
+        tmp_path = os.path.join(self.path, 'metadata.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(metadata, f, indent=2, default=ResultStore.json_default)
+        os.replace(tmp_path, os.path.join(self.path, 'metadata.json'))
+
+    def close(self):
+        """Flush all arrays and record how many frames were written."""
+        for array in [self.psi, self.times, *self.observables.values()]:
+            if array is not None:
+                array.flush()
+        self._write_metadata()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class TrajectoryReader:
+    """
+    Lazily read a trajectory written by TrajectoryWriter.
+
+    Arrays are opened memory-mapped, so frames are only read from disk when
+    they are accessed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(self.path, 'metadata.json')) as f:
+            self.metadata = json.load(f)
+        self.params = self.metadata['params']
+        self.frame_count = self.metadata['frame_count']
+        self.x = np.load(os.path.join(self.path, 'x.npy'))
+
+        if self.frame_count:
+            self.psi = self._load('psi')
+            self.times = self._load('times')
+        else:
+            self.psi = np.empty((0, len(self.x)), dtype=complex)
+            self.times = np.empty(0)
+        self.observables = {name: self._load(name) for name in self.metadata['observables']}
+
+    def _load(self, name):
+        # Only the frames that were actually written are exposed
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode='r')[:self.frame_count]
+
+    def __len__(self):
+        return self.frame_count
+
+    def frame(self, i):
+        """Return the time and wave function of frame i."""
+        return self.times[i], np.asarray(self.psi[i])
+
+    def __iter__(self):
+        for i in range(self.frame_count):
+            yield self.frame(i)
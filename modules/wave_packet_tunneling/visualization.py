@@ -1,16 +1,177 @@
+import itertools
+import threading
 import numpy as np
-import pandas as pd
-import dask.dataframe as dd
-import datashader as ds
-import datashader.transfer_functions as tf
 from PIL import Image
+from .profiling import NULL_PROFILER
+
+# Line colours (RGB) of the NumPy renderer, matching the datashader colour names
+COLOR_REAL = (255, 0, 0)
+COLOR_IMAG = (0, 0, 255)
+COLOR_ABS = (128, 128, 128)
+COLOR_BARRIER = (255, 165, 0)
+
+# Alpha given to the least-hit pixels of a line, as datashader's shade() default
+MIN_ALPHA = 40
+
+# Alpha steps of the shared animation palette: fine for single lines, coarse
+# where two lines overlap
+PALETTE_LINE_LEVELS = 39
+PALETTE_OVERLAP_LEVELS = 4
+
+# Colour levels of 2D heatmaps: the density ramp, and the ramp tinted where
+# the potential is, which together fill a 256-colour palette
+HEATMAP_LEVELS = 224
+HEATMAP_POTENTIAL_LEVELS = 32
+# Share of the potential colour in the tinted ramp
+HEATMAP_POTENTIAL_TINT = 0.35
 
 class Visualizer:
-    def __init__(self, vis_settings):
+    RENDERERS = ('numpy', 'datashader')
+
+    def __init__(self, vis_settings, profiler=None):
         self.vis_settings = vis_settings
+        # Rasterization and PIL conversion are recorded as profiler stages
+        self.profiler = profiler or NULL_PROFILER
+        self.renderer = vis_settings.get('renderer', 'numpy')
+        if self.renderer not in self.RENDERERS:
+            raise ValueError(f"Unknown renderer '{self.renderer}'. Choose from {self.RENDERERS}")
 
-    def create_datashader_frame(self, wave_function, x, barrier_center=0.0, barrier_width=1.0):
-        """Create a visualization frame."""
+        # Canvas geometry and barrier overlay, reused across frames
+        self._canvas_cache = {}
+        # Per-thread RGBA buffers, so render workers can draw concurrently
+        self._buffers = threading.local()
+
+    def create_frame(self, wave_function, x, barrier_center=0.0, barrier_width=1.0):
+        """Create a visualization frame with the configured renderer."""
+        if self.renderer == 'numpy':
+            return self.create_numpy_frame(wave_function, x, barrier_center, barrier_width)
+        return self.create_datashader_frame(wave_function, x, barrier_center, barrier_width)
+
+    @staticmethod
+    def scene_palette():
+        """
+        Colours that frames are made of, for encoding with one shared palette.
+
+        Black, each line colour at a range of alphas over black, and each pair
+        of line colours drawn over each other (later layers on top), in at
+        most 256 colours.
+        """
+        colors = (COLOR_REAL, COLOR_IMAG, COLOR_ABS, COLOR_BARRIER)
+        palette = [(0, 0, 0)]
+        for color in colors:
+            for alpha in np.linspace(MIN_ALPHA, 255, PALETTE_LINE_LEVELS) / 255:
+                palette.append(tuple(int(round(c * alpha)) for c in color))
+        overlap_alphas = np.linspace(MIN_ALPHA, 255, PALETTE_OVERLAP_LEVELS) / 255
+        for lower, upper in itertools.combinations(colors, 2):
+            for lower_alpha, upper_alpha in itertools.product(overlap_alphas, repeat=2):
+                palette.append(tuple(
+                    int(round(u * upper_alpha + l * lower_alpha * (1 - upper_alpha)))
+                    for l, u in zip(lower, upper)
+                ))
+        return palette
+
+    @staticmethod
+    def heatmap_ramp(levels):
+        """Black-red-yellow-white colour ramp with the given number of levels, as a (levels, 3) array."""
+        t = np.linspace(0, 1, levels)[:, None]
+        return np.clip(3 * t - np.arange(3), 0, 1) * 255
+
+    @staticmethod
+    def heatmap_palette():
+        """
+        Colours of heatmap frames, for encoding with one shared palette.
+
+        The density ramp, followed by a shorter ramp tinted with the
+        potential colour that is used inside the potential mask.
+        """
+        ramp = Visualizer.heatmap_ramp(HEATMAP_LEVELS)
+        tinted = (Visualizer.heatmap_ramp(HEATMAP_POTENTIAL_LEVELS) * (1 - HEATMAP_POTENTIAL_TINT) +
+                  np.array(COLOR_BARRIER) * HEATMAP_POTENTIAL_TINT)
+        return [tuple(int(round(c)) for c in color) for color in np.concatenate([ramp, tinted])]
+
+    @staticmethod
+    def potential_mask(V_total, threshold=0.5):
+        """Where |V| exceeds threshold times its maximum: the outline drawn over heatmaps."""
+        magnitude = np.abs(V_total)
+        peak = magnitude.max()
+        return magnitude > threshold * peak if peak > 0 else np.zeros(V_total.shape, dtype=bool)
+
+    def create_heatmap_frame(self, density, x, y, potential_mask=None):
+        """
+        Create a heatmap frame of a 2D probability density density[y, x].
+
+        density is scaled to its maximum and shown with a square-root ramp, so
+        faint transmitted parts stay visible; pixels inside potential_mask
+        (see potential_mask()) are tinted. y increases upwards.
+        """
+        if self.renderer == 'numpy':
+            return self.create_numpy_heatmap(density, x, y, potential_mask)
+        return self.create_datashader_heatmap(density, x, y, potential_mask)
+
+    @staticmethod
+    def _heatmap_levels(density):
+        """Square-root scaled density in [0, 1]."""
+        peak = np.max(density)
+        return np.sqrt(density / peak) if peak > 0 else np.zeros_like(density)
+
+    def create_numpy_heatmap(self, density, x, y, potential_mask=None):
+        """Create a heatmap frame by indexing the heatmap palette directly, without datashader."""
+        width = self.vis_settings['width']
+        height = self.vis_settings['height']
+        with self.profiler.stage('rasterization'):
+            colors = self._get_heatmap_colors()
+            # Nearest grid point of every pixel, flipped so that y increases upwards
+            rows = np.rint(np.linspace(len(y) - 1, 0, height)).astype(int)
+            cols = np.rint(np.linspace(0, len(x) - 1, width)).astype(int)
+            levels = self._heatmap_levels(density[np.ix_(rows, cols)])
+
+            indices = np.rint(levels * (HEATMAP_LEVELS - 1)).astype(np.intp)
+            if potential_mask is not None:
+                inside = potential_mask[np.ix_(rows, cols)]
+                indices[inside] = HEATMAP_LEVELS + np.rint(
+                    levels[inside] * (HEATMAP_POTENTIAL_LEVELS - 1)
+                ).astype(np.intp)
+            rgb = colors[indices]
+
+        with self.profiler.stage('pil_conversion'):
+            return Image.fromarray(rgb, 'RGB')
+
+    def _get_heatmap_colors(self):
+        colors = self._canvas_cache.get('heatmap')
+        if colors is None:
+            colors = self._canvas_cache['heatmap'] = np.array(self.heatmap_palette(), dtype=np.uint8)
+        return colors
+
+    def create_datashader_heatmap(self, density, x, y, potential_mask=None):
+        """Create a heatmap frame with datashader's raster path."""
+        # The datashader stack is slow to import, so only the renderer that uses it loads it
+        import datashader as ds
+        import datashader.transfer_functions as tf
+        import xarray as xr
+
+        with self.profiler.stage('rasterization'):
+            cvs = ds.Canvas(
+                plot_width=self.vis_settings['width'],
+                plot_height=self.vis_settings['height'],
+                x_range=(x.min(), x.max()),
+                y_range=(y.min(), y.max())
+            )
+            levels = xr.DataArray(self._heatmap_levels(density), coords=[('y', y), ('x', x)])
+            ramp = ['#%02x%02x%02x' % tuple(int(c) for c in color) for color in self.heatmap_ramp(HEATMAP_LEVELS)]
+            img = tf.shade(cvs.raster(levels), cmap=ramp, how='linear', span=(0, 1))
+            if potential_mask is not None:
+                mask = xr.DataArray(potential_mask.astype(np.float32), coords=[('y', y), ('x', x)])
+                overlay = tf.shade(cvs.raster(mask).where(lambda m: m > 0.5), cmap=['orange'],
+                                   alpha=int(255 * HEATMAP_POTENTIAL_TINT))
+                img = tf.stack(img, overlay)
+            img = tf.set_background(img, 'black')
+
+        with self.profiler.stage('pil_conversion'):
+            return img.to_pil()
+
+    @staticmethod
+    def _frame_components(wave_function):
+        """Compute the real part, imaginary part and scaled, smoothed density to plot."""
         # Calculate wave function components
         psi_real = np.real(wave_function)
         psi_imag = np.imag(wave_function)
@@ -26,51 +187,167 @@ class Visualizer:
         kernel = np.ones(window_size) / window_size
         smoothed_density = np.convolve(normalized_density, kernel, mode='same')
         
-        # Prepare DataFrames
-        df_wave = pd.DataFrame({
-            'x': x,
-            'psi_real': psi_real,
-            'psi_imag': psi_imag,
-            'psi_abs': 0.7 * smoothed_density
-        })
+        return psi_real, psi_imag, 0.7 * smoothed_density
+
+    def create_datashader_frame(self, wave_function, x, barrier_center=0.0, barrier_width=1.0):
+        """Create a visualization frame."""
+        import pandas as pd
+        import dask.dataframe as dd
+        import datashader as ds
+        import datashader.transfer_functions as tf
+
+        with self.profiler.stage('rasterization'):
+            psi_real, psi_imag, psi_abs = self._frame_components(wave_function)
+        
+            # Prepare DataFrames
+            df_wave = pd.DataFrame({
+                'x': x,
+                'psi_real': psi_real,
+                'psi_imag': psi_imag,
+                'psi_abs': psi_abs
+            })
         
-        # Barrier visualization
-        barrier_x_left = [barrier_center - barrier_width / 2] * 2
-        barrier_x_right = [barrier_center + barrier_width / 2] * 2
-        barrier_y = [-1, 1]
+            # Barrier visualization
+            barrier_x_left = [barrier_center - barrier_width / 2] * 2
+            barrier_x_right = [barrier_center + barrier_width / 2] * 2
+            barrier_y = [-1, 1]
         
-        df_barrier_left = pd.DataFrame({'x': barrier_x_left, 'y': barrier_y})
-        df_barrier_right = pd.DataFrame({'x': barrier_x_right, 'y': barrier_y})
+            df_barrier_left = pd.DataFrame({'x': barrier_x_left, 'y': barrier_y})
+            df_barrier_right = pd.DataFrame({'x': barrier_x_right, 'y': barrier_y})
         
-        # Convert to dask dataframes
-        ddf_wave = dd.from_pandas(df_wave, npartitions=8)
-        ddf_barrier_left = dd.from_pandas(df_barrier_left, npartitions=1)
-        ddf_barrier_right = dd.from_pandas(df_barrier_right, npartitions=1)
+            # Convert to dask dataframes
+            ddf_wave = dd.from_pandas(df_wave, npartitions=8)
+            ddf_barrier_left = dd.from_pandas(df_barrier_left, npartitions=1)
+            ddf_barrier_right = dd.from_pandas(df_barrier_right, npartitions=1)
         
-        # Create canvas and aggregate
-        cvs = ds.Canvas(
-            plot_width=self.vis_settings['width'],
-            plot_height=self.vis_settings['height'],
-            x_range=(x.min(), x.max()),
-            y_range=(-1, 1)
-        )
+            # Create canvas and aggregate
+            cvs = ds.Canvas(
+                plot_width=self.vis_settings['width'],
+                plot_height=self.vis_settings['height'],
+                x_range=(x.min(), x.max()),
+                y_range=(-1, 1)
+            )
         
-        # Aggregate components
-        agg_real = cvs.line(ddf_wave, 'x', 'psi_real')
-        agg_imag = cvs.line(ddf_wave, 'x', 'psi_imag')
-        agg_abs = cvs.line(ddf_wave, 'x', 'psi_abs')
-        agg_barrier_left = cvs.line(ddf_barrier_left, 'x', 'y')
-        agg_barrier_right = cvs.line(ddf_barrier_right, 'x', 'y')
+            # Aggregate components
+            agg_real = cvs.line(ddf_wave, 'x', 'psi_real')
+            agg_imag = cvs.line(ddf_wave, 'x', 'psi_imag')
+            agg_abs = cvs.line(ddf_wave, 'x', 'psi_abs')
+            agg_barrier_left = cvs.line(ddf_barrier_left, 'x', 'y')
+            agg_barrier_right = cvs.line(ddf_barrier_right, 'x', 'y')
         
-        # Shade components
-        img_real = tf.shade(agg_real, cmap=['red'], how='linear')
-        img_imag = tf.shade(agg_imag, cmap=['blue'], how='linear')
-        img_abs = tf.shade(agg_abs, cmap=['grey'], how='linear')
-        img_barrier_left = tf.shade(agg_barrier_left, cmap=['orange'], how='linear')
-        img_barrier_right = tf.shade(agg_barrier_right, cmap=['orange'], how='linear')
+            # Shade components
+            img_real = tf.shade(agg_real, cmap=['red'], how='linear')
+            img_imag = tf.shade(agg_imag, cmap=['blue'], how='linear')
+            img_abs = tf.shade(agg_abs, cmap=['grey'], how='linear')
+            img_barrier_left = tf.shade(agg_barrier_left, cmap=['orange'], how='linear')
+            img_barrier_right = tf.shade(agg_barrier_right, cmap=['orange'], how='linear')
         
-        # Combine and set background
-        img = tf.stack(img_real, img_imag, img_abs, img_barrier_left, img_barrier_right)
-        img = tf.set_background(img, 'black')
+            # Combine and set background
+            img = tf.stack(img_real, img_imag, img_abs, img_barrier_left, img_barrier_right)
+            img = tf.set_background(img, 'black')
         
-        return img.to_pil()
\ No newline at end of file
+        with self.profiler.stage('pil_conversion'):
+            return img.to_pil()
+
+    def create_numpy_frame(self, wave_function, x, barrier_center=0.0, barrier_width=1.0):
+        """
+        Create a visualization frame by rasterizing the curves directly from NumPy arrays.
+
+        Produces the same layers as create_datashader_frame without building
+        DataFrames or a datashader Canvas for every frame.
+        """
+        width = self.vis_settings['width']
+        height = self.vis_settings['height']
+        with self.profiler.stage('rasterization'):
+            canvas = self._get_canvas(x, barrier_center, barrier_width)
+            psi_real, psi_imag, psi_abs = self._frame_components(wave_function)
+
+            # Reset the reusable buffer to an opaque black background
+            buffer = self._get_buffer(width, height)
+            buffer[..., :3] = 0
+            pixels = buffer.reshape(-1, 4)
+
+            # Later layers are drawn over earlier ones, as with tf.stack
+            for values, color in ((psi_real, COLOR_REAL), (psi_imag, COLOR_IMAG), (psi_abs, COLOR_ABS)):
+                indices, alpha = self._rasterize_line(canvas['columns'], values, width, height)
+                self._composite(pixels, indices, color, alpha)
+            self._composite(pixels, *canvas['barrier'])
+
+        # Copy out of the buffer, since it is overwritten by the next frame
+        with self.profiler.stage('pil_conversion'):
+            return Image.frombuffer('RGBA', (width, height), buffer, 'raw', 'RGBA', 0, 1).copy()
+
+    def _get_buffer(self, width, height):
+        buffer = getattr(self._buffers, 'rgba', None)
+        if buffer is None or buffer.shape != (height, width, 4):
+            buffer = np.empty((height, width, 4), dtype=np.uint8)
+            buffer[..., 3] = 255
+            self._buffers.rgba = buffer
+        return buffer
+
+    def _get_canvas(self, x, barrier_center, barrier_width):
+        """
+        Return the pixel columns of x and the barrier overlay.
+
+        The columns are cached per grid. The barrier overlay is rebuilt for
+        every frame, which is cheap, so that a moving barrier does not add a
+        cache entry per frame.
+        """
+        width = self.vis_settings['width']
+        height = self.vis_settings['height']
+        key = (x[0], x[-1], len(x), width, height)
+        x_min, x_max = x.min(), x.max()
+        columns = self._canvas_cache.get(key)
+        if columns is None:
+            columns = self._canvas_cache[key] = (x - x_min) / (x_max - x_min) * (width - 1)
+
+        # Vertical barrier edges spanning the full plot height
+        edges = np.array([barrier_center - barrier_width / 2, barrier_center + barrier_width / 2])
+        edge_columns = np.rint((edges - x_min) / (x_max - x_min) * (width - 1)).astype(int)
+        edge_columns = np.unique(edge_columns[(edge_columns >= 0) & (edge_columns < width)])
+        barrier_indices = (np.arange(height)[:, None] * width + edge_columns[None, :]).ravel()
+        barrier_alpha = np.full(len(barrier_indices), 255)
+
+        return {
+            'columns': columns,
+            'barrier': (barrier_indices, COLOR_BARRIER, barrier_alpha),
+        }
+
+    @staticmethod
+    def _rasterize_line(columns, values, width, height):
+        """
+        Rasterize a polyline with y in (-1, 1) onto a width x height grid.
+
+        Returns the flat pixel indices hit and their alpha, scaled linearly with
+        the hit count like datashader's shade(how='linear').
+        """
+        # Row 0 is the top of the image (y = 1); clip far off-screen points
+        rows = np.clip((1 - values) / 2 * (height - 1), -1, height)
+
+        # Sample each segment once per pixel along its longer axis
+        dc = np.diff(columns)
+        dr = np.diff(rows)
+        samples = np.ceil(np.maximum(np.abs(dc), np.abs(dr))).astype(int) + 1
+        segment = np.repeat(np.arange(len(samples)), samples)
+        offsets = np.arange(len(segment)) - np.repeat(np.cumsum(samples) - samples, samples)
+        t = offsets / np.maximum(samples - 1, 1)[segment]
+
+        cols = np.rint(columns[:-1][segment] + t * dc[segment]).astype(int)
+        rows = np.rint(rows[:-1][segment] + t * dr[segment]).astype(int)
+        visible = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+
+        indices, counts = np.unique(rows[visible] * width + cols[visible], return_counts=True)
+        if len(counts) == 0:
+            return indices, counts
+        span = counts.max() - counts.min()
+        if span == 0:
+            alpha = np.full(len(counts), 255)
+        else:
+            alpha = MIN_ALPHA + (counts - counts.min()) * (255 - MIN_ALPHA) // span
+        return indices, alpha
+
+    @staticmethod
+    def _composite(pixels, indices, color, alpha):
+        """Draw a colour over the given pixels with per-pixel alpha."""
+        a = (alpha / 255.0)[:, None]
+        pixels[indices, :3] = (np.array(color) * a + pixels[indices, :3] * (1 - a)).astype(np.uint8)
\ No newline at end of file
@@ -1,5 +1,8 @@
 import numpy as np
 
+# Gaussian width parameter of the default packet, |psi|^2 ~ exp(-alpha x^2)
+DEFAULT_PACKET_ALPHA = 0.0126
+
 class WaveFunction:
     @staticmethod
     def calculate_kappa_n(n):
@@ -10,12 +13,13 @@ class WaveFunction:
         return np.pi * (m ** 3)
 
     @staticmethod
-    def wavefunction_1d(x, n, x0=0.0):
+    def wavefunction_1d(x, n, x0=0.0, alpha=DEFAULT_PACKET_ALPHA):
         """
         Calculate the 1D wavefunction as a superposition of two plane waves.
+
+        A larger alpha gives a narrower packet with a broader momentum spread.
         """
         kappa = WaveFunction.calculate_kappa_n(n)
-        alpha = 0.0126  # Gaussian width parameter
         shifted_x = x - x0
         wave = np.exp(1j * kappa * shifted_x)
         gaussian = np.exp(-alpha * shifted_x**2 / 2)
@@ -27,11 +31,55 @@ class WaveFunction:
         return psi / norm
 
     @staticmethod
-    def initialize_wavefunction(x, n, x0=-100.0, sigma=0.8):
+    def initialize_wavefunction(x, n, x0=-100.0, sigma=0.8, alpha=DEFAULT_PACKET_ALPHA):
         """Initialize a custom Gaussian-modulated wave packet."""
-        return WaveFunction.wavefunction_1d(x, n, x0)
+        return WaveFunction.wavefunction_1d(x, n, x0, alpha)
 
     @staticmethod
     def compute_total_probability(psi, dx):
-        """Compute the total probability density."""
-        return np.sum(np.abs(psi)**2) * dx
\ No newline at end of file
+        """Compute the total probability density, accumulated in float64."""
+        return np.sum(np.abs(psi)**2, dtype=np.float64) * dx
+
+    @staticmethod
+    def compute_transmission_reflection(psi, x, dx, barrier_center, barrier_width):
+        """
+        Compute the probability transmitted past and reflected before the barrier.
+
+        psi may be a batch of shape (B, N), with one barrier center and width per member.
+        """
+        barrier_center = np.asarray(barrier_center, dtype=float)[..., None]
+        barrier_width = np.asarray(barrier_width, dtype=float)[..., None]
+        density = np.abs(psi)**2
+        transmitted = np.sum(density * (x > barrier_center + barrier_width / 2), axis=-1) * dx
+        reflected = np.sum(density * (x < barrier_center - barrier_width / 2), axis=-1) * dx
+        return transmitted, reflected
+
+class WaveFunction2D:
+    """2D wave functions on a grid of rows y and columns x, stored as psi[y, x]."""
+
+    @staticmethod
+    def wavefunction_2d(x, y, n, x0=0.0, y0=0.0):
+        """
+        Calculate a 2D Gaussian wave packet moving along +x.
+
+        Along x it is the 1D packet of WaveFunction.wavefunction_1d; along y
+        a Gaussian of the same width. It is built as the outer product of
+        the two 1D factors, so no intermediate full-grid arrays are needed.
+        """
+        alpha = DEFAULT_PACKET_ALPHA
+        psi_x = WaveFunction.wavefunction_1d(x, n, x0)
+        psi_y = np.exp(-alpha * (y - y0)**2 / 2).astype(complex)
+        dy = y[1] - y[0]
+        psi_y /= np.sqrt(np.sum(np.abs(psi_y)**2) * dy)
+        return np.multiply.outer(psi_y, psi_x)
+
+    @staticmethod
+    def initialize_wavefunction(x, y, n, x0=-100.0, y0=0.0):
+        """Initialize a 2D Gaussian-modulated wave packet."""
+        return WaveFunction2D.wavefunction_2d(x, y, n, x0, y0)
+
+    @staticmethod
+    def compute_total_probability(psi, dx, dy):
+        """Compute the total probability, accumulated in float64."""
+        return (np.einsum('...ij,...ij->...', psi.real, psi.real, dtype=np.float64) +
+                np.einsum('...ij,...ij->...', psi.imag, psi.imag, dtype=np.float64)) * dx * dy
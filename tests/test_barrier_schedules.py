@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from modules.wave_packet_tunneling.simulation import Simulation
+from modules.wave_packet_tunneling.evolution import WaveFunctionEvolution, TimeDependentPropagator
+from modules.wave_packet_tunneling.potential import PotentialBarrier
+
+POINTS = 1024
+BASE_PARAMS = {
+    'num_frames': 2, 'spatial_points': POINTS, 'spatial_range': (-40.0, 40.0),
+    'barrier_width': 2.0, 'V0': 20.0, 'transition_width': 0.2,
+    'n': 1, 'x0': -3.0, 'barrier_center_init': 0.0, 'packet_alpha': 0.5,
+}
+DT = WaveFunctionEvolution.compute_time_step(np.linspace(-40.0, 40.0, POINTS))
+TOLERANCE = 1e-9
+
+# Every schedule, with periods that are and are not a whole number of steps,
+# and a period of exactly one update block, where the barrier is back at its
+# start position at the end of each block
+SCHEDULES = {
+    'translating': {'barrier_schedule': 'translating', 'barrier_velocity': 20.0},
+    'oscillating': {'barrier_schedule': 'oscillating', 'oscillation_amplitude': 3.0,
+                    'oscillation_period': 383.2 * DT},
+    'oscillating_whole_steps': {'barrier_schedule': 'oscillating', 'oscillation_amplitude': 3.0,
+                                'oscillation_period': 100 * DT},
+    'oscillating_one_block': {'barrier_schedule': 'oscillating', 'oscillation_amplitude': 3.0,
+                              'oscillation_period': TimeDependentPropagator.BLOCK_STEPS * DT},
+    'ramped': {'barrier_schedule': 'ramped', 'ramp_time': 200 * DT},
+    'ramped_from_V0_start': {'barrier_schedule': 'ramped', 'ramp_time': 200 * DT, 'V0_start': 5.0},
+}
+
+def brute_force(sim_params, steps):
+    """Rebuild V at each step's midpoint and take plain split-operator steps."""
+    simulation = Simulation(sim_params)
+    x = simulation.x
+    psi = simulation.psi.copy()
+    V_static = PotentialBarrier.create_total_potential(
+        x, 0.0, 0.0, sim_params['barrier_width'], sim_params['transition_width']
+    )
+    for step in range(steps):
+        V = V_static + simulation.schedule.potential(x, (step + 0.5) * simulation.dt)
+        psi = WaveFunctionEvolution.evolve_wavefunction(psi, x, simulation.dt, V)
+    return psi
+
+@pytest.mark.parametrize('name', SCHEDULES)
+@pytest.mark.parametrize('max_table_bytes', [None, 0])
+def test_schedule_matches_brute_force(name, max_table_bytes):
+    steps = 600
+    sim_params = dict(BASE_PARAMS, total_time=steps * DT, **SCHEDULES[name])
+    simulation = Simulation(sim_params)
+    propagator = TimeDependentPropagator(
+        simulation.x, simulation.dt, simulation.V_base, simulation.schedule,
+        steps * simulation.dt, max_table_bytes=max_table_bytes
+    )
+    psi = propagator.advance(simulation.psi.copy(), steps)
+    assert np.max(np.abs(psi - brute_force(sim_params, steps))) < TOLERANCE
+
+def test_ramped_base_potential_has_no_barrier():
+    sim_params = dict(BASE_PARAMS, total_time=10 * DT, **SCHEDULES['ramped'])
+    simulation = Simulation(sim_params)
+    assert np.max(np.abs(simulation.V_base)) == 0.0
+    assert np.max(np.real(simulation.V_total)) == pytest.approx(0.0)
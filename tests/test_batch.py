@@ -0,0 +1,30 @@
+import json
+import os
+from modules.wave_packet_tunneling.batch import BatchRunner, load_jobs, MANIFEST_NAME
+
+JOB_DEFAULTS = {
+    'num_frames': 30, 'spatial_points': 256, 'spatial_range': [-40.0, 40.0], 'total_time': 1.0,
+    'barrier_width': 2.0, 'V0': 20.0, 'transition_width': 0.2,
+    'n': 1, 'x0': -10.0, 'barrier_center_init': 0.0, 'outputs': ['probability', 'final_state'],
+}
+
+def write_jobs(tmp_path, jobs):
+    path = tmp_path / 'jobs.json'
+    path.write_text(json.dumps({'defaults': JOB_DEFAULTS, 'jobs': jobs}))
+    return str(path)
+
+def test_jobs_default_to_production_settings(tmp_path):
+    jobs = load_jobs(write_jobs(tmp_path, [{}, {'precision': 'single', 'auto_grid': 1}]))
+    assert (jobs[0]['precision'], jobs[0]['auto_grid']) == ('double', 0)
+    assert (jobs[1]['precision'], jobs[1]['auto_grid']) == ('single', 1)
+
+def test_failed_job_leaves_no_output_directory(tmp_path):
+    jobs = load_jobs(write_jobs(tmp_path, [{'name': 'good'}, {'name': 'bad', 'engine': 'unknown'}]))
+    output_dir = tmp_path / 'out'
+    manifest = BatchRunner(str(output_dir), max_workers=2).run(jobs)
+
+    good, bad = manifest['jobs']
+    assert good['status'] == 'done'
+    assert all(os.path.exists(path) for path in good['outputs'].values())
+    assert bad['status'] == 'failed'
+    assert sorted(os.listdir(output_dir)) == ['good', MANIFEST_NAME]
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageSequence
+from modules.wave_packet_tunneling.encoding import GifWriter, APNGWriter, create_writer
+from modules.wave_packet_tunneling.pipeline import FramePipeline
+from modules.wave_packet_tunneling.visualization import Visualizer
+from modules.wave_packet_tunneling.wavefunction import WaveFunction
+
+X = np.linspace(-40.0, 40.0, 256)
+POSITIONS = (-10.0, -8.0, -8.0, -6.0)
+
+def render(psi, x):
+    visualizer = Visualizer({'width': 160, 'height': 80})
+    return visualizer.create_frame(psi, x, barrier_center=0.0, barrier_width=2.0)
+
+def states():
+    return [WaveFunction.initialize_wavefunction(X, 1, x0) for x0 in POSITIONS]
+
+def decode(path):
+    return [np.asarray(frame.convert('RGB')) for frame in ImageSequence.Iterator(Image.open(path))]
+
+def expected_frames(palette):
+    """The frames as the writer should store them: exact, or mapped onto the shared palette."""
+    frames = [render(psi, X).convert('RGB') for psi in states()]
+    if palette is None:
+        return [np.asarray(frame) for frame in frames]
+    colors = np.array(palette, dtype=np.uint8)
+    return [colors[np.asarray(GifWriter('unused.gif', 100, palette=palette).prepare(frame))] for frame in frames]
+
+@pytest.mark.parametrize('writer_class, extension', [(GifWriter, '.gif'), (APNGWriter, '.png')])
+@pytest.mark.parametrize('palette', [Visualizer.scene_palette(), None], ids=['shared_palette', 'own_colors'])
+def test_animation_round_trip(tmp_path, writer_class, extension, palette):
+    path = str(tmp_path / f"animation{extension}")
+    with writer_class(path, 100, palette=palette) as writer:
+        for psi in states():
+            writer.write(render(psi, X))
+    decoded = decode(path)
+    expected = expected_frames(palette)
+    assert len(decoded) == len(POSITIONS)
+    for frame, reference in zip(decoded, expected):
+        assert np.array_equal(frame, reference)
+
+@pytest.mark.parametrize('extension', ['.gif', '.png'])
+def test_pipeline_writes_frames_in_order(tmp_path, extension):
+    sequential = str(tmp_path / f"sequential{extension}")
+    with create_writer(sequential, 100, palette=Visualizer.scene_palette()) as writer:
+        for psi in states():
+            writer.write(render(psi, X))
+
+    pipelined = str(tmp_path / f"pipelined{extension}")
+    writer = create_writer(pipelined, 100, palette=Visualizer.scene_palette())
+    pipeline = FramePipeline(render, writer, render_workers=3)
+    with pipeline:
+        for psi in states():
+            pipeline.submit(psi, X)
+    assert pipeline.frame_count == len(POSITIONS)
+    with open(sequential, 'rb') as a, open(pipelined, 'rb') as b:
+        assert a.read() == b.read()
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+from modules.wave_packet_tunneling.wavefunction import WaveFunction
+from modules.wave_packet_tunneling.potential import PotentialBarrier
+from modules.wave_packet_tunneling.evolution import (
+    WaveFunctionEvolution, SplitOperatorPropagator, EigenPropagator, ChebyshevPropagator, NormDriftError
+)
+from modules.wave_packet_tunneling.ensemble import EnsembleEvolution
+from modules.wave_packet_tunneling.simulation import Simulation
+
+POINTS = 256
+SIM_PARAMS = {
+    'num_frames': 3, 'spatial_points': POINTS, 'spatial_range': (-40.0, 40.0), 'total_time': 1.0,
+    'barrier_width': 2.0, 'V0': 20.0, 'transition_width': 0.2,
+    'n': 1, 'x0': -5.0, 'barrier_center_init': 0.0,
+}
+
+def problem(V0=20.0, x0=-5.0):
+    x = np.linspace(-40.0, 40.0, POINTS)
+    psi = WaveFunction.initialize_wavefunction(x, 1, x0)
+    V_total = PotentialBarrier.create_total_potential(x, 0.0, V0, 2.0, 0.2)
+    return x, psi, V_total
+
+def test_split_operator_matches_evolve_wavefunction():
+    x, psi, V_total = problem()
+    dt = WaveFunctionEvolution.compute_time_step(x)
+    expected = psi
+    for _ in range(100):
+        expected = WaveFunctionEvolution.evolve_wavefunction(expected, x, dt, V_total)
+
+    propagator = SplitOperatorPropagator(x, dt, V_total)
+    assert np.max(np.abs(propagator.advance(psi.copy(), 100) - expected)) < 1e-12
+    # Advancing in several calls gives the same state
+    propagator = SplitOperatorPropagator(x, dt, V_total)
+    state = psi.copy()
+    for steps in (1, 30, 69):
+        state = propagator.advance(state, steps)
+    assert np.max(np.abs(state - expected)) < 1e-12
+
+def test_ensemble_members_match_single_runs():
+    members = [dict(SIM_PARAMS, V0=10.0, x0=-8.0), dict(SIM_PARAMS, V0=30.0)]
+    results = EnsembleEvolution(members).run(num_snapshots=3)
+    for member, final_state in zip(members, results['final_state']):
+        x, psi, V_total = problem(member['V0'], member['x0'])
+        dt = WaveFunctionEvolution.compute_time_step(x)
+        num_time_steps = int(member['total_time'] / dt) + 1
+        expected = SplitOperatorPropagator(x, dt, V_total).advance(psi, num_time_steps)
+        assert np.max(np.abs(final_state - expected)) < 1e-12
+
+def test_eigen_and_chebyshev_agree():
+    x, psi, V_total = problem()
+    eigen = EigenPropagator(x, V_total)
+    coefficients = eigen.project(psi)
+    chebyshev = ChebyshevPropagator(x, V_total)
+    state = psi
+    t = 0.0
+    for jump in (0.25, 0.25, 0.5):
+        state, info = chebyshev.advance(state, jump)
+        t += jump
+        assert info['norm_error'] < 1e-9
+        assert np.max(np.abs(eigen.state_at(coefficients, t) - state)) < 1e-8
+    assert np.allclose(eigen.states_at(coefficients, [0.5, 1.0])[1], eigen.state_at(coefficients, 1.0))
+
+def test_split_operator_converges_to_eigen():
+    x, psi, V_total = problem()
+    exact = EigenPropagator(x, V_total)
+    exact = exact.state_at(exact.project(psi), 0.5)
+    errors = []
+    for steps in (500, 1000):
+        propagator = SplitOperatorPropagator(x, 0.5 / steps, V_total)
+        errors.append(np.max(np.abs(propagator.advance(psi.copy(), steps) - exact)))
+    # Strang splitting is second order in dt
+    assert errors[1] < errors[0] / 3
+    assert errors[1] < 1e-3
+
+@pytest.mark.parametrize('engine', ['eigen', 'chebyshev'])
+def test_simulation_engines_match_split_operator(engine):
+    # Fine time step, so the split-operator error is small
+    sim_params = dict(SIM_PARAMS, dt=1e-4)
+    reference = Simulation(sim_params)
+    reference_results = reference.run()
+    simulation = Simulation(dict(sim_params, engine=engine))
+    results = simulation.run()
+    assert np.max(np.abs(simulation.psi - reference.psi)) < 1e-6
+    assert np.allclose(results['transmission'][1], reference_results['transmission'][1], atol=1e-6)
+
+def test_single_precision_tracks_double():
+    x, psi, V_total = problem()
+    dt = WaveFunctionEvolution.compute_time_step(x)
+    double = SplitOperatorPropagator(x, dt, V_total).advance(psi.copy(), 200)
+    single_propagator = SplitOperatorPropagator(x, dt, V_total, precision='single')
+    single = single_propagator.advance(psi, 200)
+    assert single.dtype == np.complex64
+    assert np.max(np.abs(single - double)) < 2e-5
+    assert single_propagator.norm_drift < single_propagator.norm_tolerance
+
+def test_norm_drift_guardrail_raises():
+    x, psi, V_total = problem()
+    propagator = SplitOperatorPropagator(
+        x, WaveFunctionEvolution.compute_time_step(x), V_total,
+        precision='single', norm_tolerance=1e-12, on_norm_drift='raise'
+    )
+    with pytest.raises(NormDriftError):
+        propagator.advance(psi, 200)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from modules.wave_packet_tunneling.simulation import Simulation
+
+SIM_PARAMS = {
+    'num_frames': 3, 'spatial_points': 256, 'spatial_range': (-40.0, 40.0), 'total_time': 0.5,
+    'barrier_width': 2.0, 'V0': 20.0, 'transition_width': 0.2,
+    'n': 1, 'x0': -10.0, 'barrier_center_init': 0.0,
+}
+
+class Stop(Exception):
+    pass
+
+def test_progress_is_reported_between_frames(monkeypatch):
+    # One step per chunk
+    monkeypatch.setattr(Simulation, 'PROGRESS_INTERVAL', 0.0)
+    steps = []
+    simulation = Simulation(SIM_PARAMS)
+    simulation.run(on_progress=lambda step, total: steps.append(step))
+    assert steps == list(range(1, simulation.num_time_steps + 1))
+
+    reference = Simulation(SIM_PARAMS)
+    reference.run()
+    assert np.max(np.abs(simulation.psi - reference.psi)) < 1e-12
+
+def test_progress_can_stop_the_run(monkeypatch):
+    monkeypatch.setattr(Simulation, 'PROGRESS_INTERVAL', 0.0)
+    frames = []
+
+    def stop_early(step, total):
+        if step == 5:
+            raise Stop()
+
+    simulation = Simulation(SIM_PARAMS)
+    with pytest.raises(Stop):
+        simulation.run(on_frame=lambda psi, t, observables: frames.append(t), on_progress=stop_early)
+    assert len(frames) == 1
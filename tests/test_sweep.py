@@ -0,0 +1,38 @@
+import numpy as np
+from modules.wave_packet_tunneling.cache import ResultCache
+from modules.wave_packet_tunneling.planner import GridPlanner
+from modules.wave_packet_tunneling.store import ResultStore
+from modules.wave_packet_tunneling.sweep import SweepRunner, expand_grid, run_point
+
+SIM_PARAMS = {
+    'num_frames': 3, 'spatial_points': 256, 'spatial_range': (-40.0, 40.0), 'total_time': 0.2,
+    'barrier_width': 2.0, 'V0': 20.0, 'transition_width': 0.2,
+    'n': 1, 'x0': -10.0, 'barrier_center_init': 0.0,
+}
+
+def test_store_key_depends_on_code_version(monkeypatch):
+    key = ResultStore.result_key(SIM_PARAMS)
+    assert ResultStore.result_key(dict(SIM_PARAMS, output_filename='other.gif')) == key
+    monkeypatch.setattr(ResultCache, 'code_version', staticmethod(lambda sources: 'changed'))
+    assert ResultStore.result_key(SIM_PARAMS) != key
+
+def test_sweep_stores_points_and_skips_them_on_rerun(tmp_path):
+    grid = expand_grid(SIM_PARAMS, V0=[10.0, 20.0])
+    runner = SweepRunner(str(tmp_path), max_workers=2)
+    calls = []
+    keys = runner.run(grid, progress=lambda done, total: calls.append(total))
+    assert calls == [2, 2]
+    assert runner.run(grid, progress=lambda done, total: calls.append(total)) == keys
+    assert len(calls) == 2
+
+    stored = runner.store.load(grid[0])
+    expected = run_point(grid[0])
+    assert np.array_equal(stored['final_state'], expected['final_state'])
+    assert stored['params']['V0'] == 10.0
+
+def test_sweep_point_uses_planned_grid():
+    sim_params = dict(SIM_PARAMS, auto_grid=1)
+    plan = GridPlanner(calibrate=False).plan(sim_params)
+    results = run_point(sim_params)
+    assert len(results['x']) == plan.spatial_points
+    assert len(results['final_state']) == plan.spatial_points
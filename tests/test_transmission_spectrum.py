@@ -0,0 +1,28 @@
+import numpy as np
+from modules.wave_packet_tunneling.potential import PotentialBarrier
+from modules.wave_packet_tunneling.spectrum import TransmissionSpectrum
+
+V0 = 10.0
+WIDTH = 1.0
+
+def test_rectangular_transmission_scalar_and_array():
+    energies = np.array([2.0, V0, 20.0])
+    T = PotentialBarrier.rectangular_transmission(energies, V0, WIDTH)
+    assert T.shape == energies.shape
+    for E, expected in zip(energies, T):
+        assert np.ndim(PotentialBarrier.rectangular_transmission(E, V0, WIDTH)) == 0
+        assert PotentialBarrier.rectangular_transmission(E, V0, WIDTH) == expected
+    # The E = V0 limit
+    assert T[1] == 1 / (1 + V0 * WIDTH**2 / 2)
+    # Above the barrier, T = 1 when the barrier holds a whole number of half wavelengths
+    E_resonant = V0 + np.pi**2 / (2 * WIDTH**2)
+    assert np.isclose(PotentialBarrier.rectangular_transmission(E_resonant, V0, WIDTH), 1.0)
+
+def test_flux_transmission_matches_rectangular_barrier():
+    spectrum = TransmissionSpectrum({
+        'spatial_points': 384, 'spatial_range': (-15.0, 15.0), 'absorber_width': 5.0,
+        'barrier_width': WIDTH, 'V0': V0, 'transition_width': 0.01,
+        'n': 1, 'x0': -6.0, 'barrier_center_init': 0.0, 'packet_alpha': 3.0,
+    }, energies=np.linspace(2.0, 20.0, 40))
+    results = spectrum.run()
+    assert np.max(np.abs(results['transmission'] - spectrum.analytic())) < 0.03